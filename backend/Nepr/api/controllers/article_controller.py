@@ -1,9 +1,15 @@
 import logging
 
-from flask import Blueprint, request, jsonify
+import requests
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from databases.db_postgresql_conn import connect
+from api.services.graph_export import gzip_chunks
+from api.services.job_service import IngestJobService
 from api.services.sparql_service import SPARQLService
+from models.browser_pool import get_browser_pool
+from models.wikidata_cache import get_wikidata_cache
+from utils.pagination import parse_limit
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium import webdriver
@@ -14,7 +20,9 @@ options = webdriver.ChromeOptions()
 options.add_argument('--headless')
 options.add_argument('--no-sandbox')
 options.add_argument('--disable-dev-shm-usage')
+options.page_load_strategy = 'eager'
 sparql_service = SPARQLService(service, options)
+ingest_jobs = IngestJobService(sparql_service)
 
 
 @article_blueprint.route('/create', methods=['POST'])
@@ -29,16 +37,48 @@ def create_article():
     if not url:
         return jsonify({"message": "URL is required"}), 400
 
-    success, message, graph_data = sparql_service.create_and_insert_graph(url)
+    if request.json.get('async') or request.args.get('async') == 'true':
+        job = ingest_jobs.submit(url, get_jwt_identity())
+        if job is None:
+            return jsonify({"message": "Ingest queue is full, try again later"}), 429, {"Retry-After": "30"}
+        return jsonify({
+            "message": "Accepted",
+            "job_id": job["id"],
+            "status": job["status"]
+        }), 202, {"Location": f"/article/jobs/{job['id']}"}
+
+    report = {}
+    success, message, graph_data = sparql_service.create_and_insert_graph(url, report)
     if success:
         return jsonify({
             "message": message,
             "data": graph_data,
-            "format": "application/json"
+            "format": "application/json",
+            "extraction_tier": report.get('json_ld_tier')
         }), 201
     logging.info(graph_data)
     return jsonify({"message": "Failed", "error": message}), 500
 
+@article_blueprint.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_ingest_job(job_id):
+    """
+    Reports the status of an asynchronous article ingest.
+    Args:
+        job_id: Identifier returned by POST /article/create with "async": true.
+    Returns:
+        Job status, per-stage timings and, once finished, the article data.
+    """
+    try:
+        verify_jwt_in_request()
+    except Exception as e:
+        logging.error(f"JWT verification failed: {str(e)}")
+        return jsonify({"message": "Unauthorized"}), 401
+    job = ingest_jobs.get(job_id, get_jwt_identity())
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+    return jsonify({"message": "Success", "data": job}), 200
+
 @article_blueprint.route('/search', methods=['GET'])
 @jwt_required()
 def search_keywords():
@@ -51,13 +91,19 @@ def search_keywords():
     if not keywords:
         return jsonify({"message": "Keywords are required"}), 400
 
-    results, match_type = sparql_service.search_articles_by_keywords(keywords)
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        results, match_type, next_cursor = sparql_service.search_articles_by_keywords(
+            keywords, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     if results:
         serializable_results = [
             {key: str(value) for key, value in article.items()}
             for article in results
         ]
-        return jsonify({"message": "Success", "data": serializable_results, "type": match_type}), 200
+        return jsonify({"message": "Success", "data": serializable_results, "type": match_type,
+                        "next_cursor": next_cursor}), 200
     return jsonify({"message": "No articles found"}), 404
 
 @article_blueprint.route("/search/advanced", methods=['GET'])
@@ -88,15 +134,21 @@ def search_advanced():
     if not (
             keywords or wordcount_min or wordcount_max or datePublished_min or datePublished_max or wordcount or datePublished or inLanguage or author_name or author_nationality or publisher):
         return jsonify({"message": "A parameter is required"}), 400
-    results, match_type = sparql_service.advanced_search(keywords, wordcount, inLanguage, author_name,
-                                                         author_nationality, publisher, datePublished, wordcount_min,
-                                                         wordcount_max, datePublished_min, datePublished_max)
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        results, match_type, next_cursor = sparql_service.advanced_search(
+            keywords, wordcount, inLanguage, author_name, author_nationality, publisher, datePublished,
+            wordcount_min, wordcount_max, datePublished_min, datePublished_max,
+            limit=limit, cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     if results:
         serializable_results = [
             {key: str(value) for key, value in article.items()}
             for article in results
         ]
-        return jsonify({"message": "Success", "data": serializable_results, "type": match_type}), 200
+        return jsonify({"message": "Success", "data": serializable_results, "type": match_type,
+                        "next_cursor": next_cursor}), 200
     return jsonify({"message": "No articles found"}), 404
 
 @article_blueprint.route('/', methods=['GET'])
@@ -125,18 +177,25 @@ def get_article_by_url():
 @jwt_required()
 def get_all_articles():
     """
-    Retrieves all articles from the Fuseki dataset.
+    Retrieves the articles of the Fuseki dataset, newest first.
+    Args:
+        limit: Page size (default 10, at most 100).
+        cursor: The next_cursor of the previous page.
     Returns:
-        List of articles in JSON-LD format.
+        List of articles in JSON-LD format and the cursor of the next page.
     """
     try:
         verify_jwt_in_request()
     except Exception as e:
         logging.error(f"JWT verification failed: {str(e)}")
         return jsonify({"message": "Unauthorized"}), 401
-    results = sparql_service.get_all_articles()
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        results, next_cursor = sparql_service.get_all_articles(limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     if results:
-        return jsonify({"message": "Success", "data": results}), 200
+        return jsonify({"message": "Success", "data": results, "next_cursor": next_cursor}), 200
     return jsonify({"message": "No articles found"}), 404
 
 @article_blueprint.route('/', methods=['DELETE'])
@@ -166,16 +225,71 @@ def delete_article_by_url():
 @jwt_required()
 def get_all_data():
     """
-    Retrieves all data from the Fuseki dataset.
+    Retrieves the triples of the Fuseki dataset page by page, or streams the whole dataset.
+    Args:
+        limit: Page size in triples (default 1000, at most 10000); pages hold whole article graphs.
+        cursor: The next_cursor of the previous page.
+        format: 'ntriples', 'nquads' or 'ndjson' to stream a bulk export instead of a page.
+        gzip: 'true' to gzip the export (also used when the client accepts gzip).
     Returns:
-        List of data in JSON-LD format.
+        List of data in JSON-LD format and the cursor of the next page, or the streamed export.
     """
     try:
         verify_jwt_in_request()
     except Exception as e:
         logging.error(f"JWT verification failed: {str(e)}")
         return jsonify({"message": "Unauthorized"}), 401
-    results = sparql_service.get_all_data()
-    if results:
-        return jsonify({"message": "Success", "data": results}), 200
-    return jsonify({"message": "No data found"}), 404
\ No newline at end of file
+    export_format = request.args.get('format')
+    if export_format:
+        return export_data(export_format)
+    try:
+        limit = parse_limit(request.args.get('limit'), default=1000, maximum=10000)
+        page = sparql_service.get_all_data(limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if page and page[0]:
+        results, next_cursor = page
+        return jsonify({"message": "Success", "data": results, "next_cursor": next_cursor}), 200
+    return jsonify({"message": "No data found"}), 404
+
+def export_data(export_format):
+    try:
+        media_type, chunks = sparql_service.export_data(export_format)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Export failed: {e}")
+        return jsonify({"message": "Export failed"}), 502
+    extensions = {'ntriples': 'nt', 'nquads': 'nq', 'ndjson': 'ndjson'}
+    # The encoding follows Accept-Encoding, so shared caches must key the response on it
+    headers = {"Content-Disposition": f"attachment; filename=nepr-export.{extensions[export_format]}",
+               "Vary": "Accept-Encoding"}
+    if request.args.get('gzip') == 'true' or 'gzip' in request.headers.get('Accept-Encoding', ''):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(chunks), mimetype=media_type, headers=headers)
+
+@article_blueprint.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """
+    Reports the runtime metrics of the article service.
+    Returns:
+        Browser pool, ingest queue, Wikidata cache, keyword index, vector index, co-occurrence index
+        and search cache statistics.
+    """
+    try:
+        verify_jwt_in_request()
+    except Exception as e:
+        logging.error(f"JWT verification failed: {str(e)}")
+        return jsonify({"message": "Unauthorized"}), 401
+    return jsonify({
+        "message": "Success",
+        "browser_pool": get_browser_pool(service, options).stats(),
+        "ingest_jobs": ingest_jobs.stats(),
+        "wikidata_cache": get_wikidata_cache().stats(),
+        "keyword_index": sparql_service.keyword_index.stats(),
+        "vector_index": sparql_service.vector_index.stats(),
+        "cooccurrence_index": sparql_service.cooccurrence.stats(),
+        "search_cache": sparql_service.search_cache_stats()
+    }), 200
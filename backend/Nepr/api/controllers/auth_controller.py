@@ -26,18 +26,18 @@ def verify_reset_token(token):
 
 @auth_blueprint.route('/reset-password/<token>', methods=['POST'])
 def reset_password(token):
-    session, _ = connect()
     email = verify_reset_token(token)
 
     if not email:
         return jsonify({'message': 'Invalid or expired token'}), 400
 
-    user = get_user_by_email(session, email)
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
-    new_password = request.json.get('new_password')
+    session, _ = connect()
     try:
+        user = get_user_by_email(session, email)
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+
+        new_password = request.json.get('new_password')
         user.set_password(new_password)  # Folosește metoda pentru a seta parola corect
         session.commit()
         return jsonify({'message': 'Password has been reset successfully'}), 200
@@ -65,10 +65,10 @@ def register():
     first_name = request.json.get('first_name', '')
     last_name = request.json.get('last_name', '')
 
-    existing_user = get_user_by_email(session, email)
-    if existing_user:
-        return jsonify({"message": "Email already in use"}), 409
     try:
+        existing_user = get_user_by_email(session, email)
+        if existing_user:
+            return jsonify({"message": "Email already in use"}), 409
         user = create_user(session, email, password, first_name, last_name)
         session.commit()
         try:
@@ -96,7 +96,10 @@ def login():
     email = request.json.get('email')
     password = request.json.get('password')
 
-    user = authenticate_user(session, email, password)
+    try:
+        user = authenticate_user(session, email, password)
+    finally:
+        session.close()
     if not user:
         return jsonify({"message": "Invalid email or password"}), 401
 
@@ -158,11 +161,12 @@ def get_users():
             "role": user.role
         } for user in users]
 
-        session.close()
         return jsonify(users_list), 200
 
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+    finally:
+        session.close()
 
 import uuid  # Importă biblioteca uuid pentru conversii
 
@@ -244,21 +248,21 @@ def update_user(user_id):
 def change_password():
     session, _ = connect()
     current_user_id = get_jwt_identity()  # Fetch the identity from JWT
-    user_details = session.query(User).filter_by(email=current_user_id).first()
+    try:
+        user_details = session.query(User).filter_by(email=current_user_id).first()
 
-    if not user_details:
-        return jsonify({"message": "User not found"}), 404
+        if not user_details:
+            return jsonify({"message": "User not found"}), 404
 
-    # Extract passwords from the request
-    current_password = request.json.get('currentPassword')
-    new_password = request.json.get('newPassword')
+        # Extract passwords from the request
+        current_password = request.json.get('currentPassword')
+        new_password = request.json.get('newPassword')
 
-    # Check the current password
-    if not check_password_hash(user_details.password_hash, current_password):
-        return jsonify({"error": "Current password is incorrect"}), 401
+        # Check the current password
+        if not check_password_hash(user_details.password_hash, current_password):
+            return jsonify({"error": "Current password is incorrect"}), 401
 
-    # Update to the new password
-    try:
+        # Update to the new password
         user_details.password_hash = generate_password_hash(new_password)
         session.commit()
         return jsonify({"message": "Password updated successfully"}), 200
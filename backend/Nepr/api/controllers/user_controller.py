@@ -7,11 +7,15 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium import webdriver
 from api.services.sparql_service import SPARQLService
 from api.services.user_service import UserService
-from databases.db_postgresql_conn import connect, close
+from api.services.profile_service import ProfileService
+from api.services.recommendation_service import RecommendationService, RECOMMENDATION_EXCLUDE_RECENT
+from databases.db_postgresql_conn import connect, close, pool_stats
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request, jwt_required
 user_blueprint = Blueprint('user', __name__)
 
 userService = UserService()
+profileService = ProfileService()
+recommendationService = RecommendationService()
 service = Service(ChromeDriverManager().install())
 options = webdriver.ChromeOptions()
 options.add_argument('--headless')
@@ -36,17 +40,32 @@ def add_user_history():
     session, engine = connect()
     try :
         result = userService.add_user_history(session, email, url)
+        if result is not None:
+            update_profile(session, email, url)
     finally:
         close(session, engine)
     if result is None:
         return jsonify({"message": "Failed to add history"}), 500
     return jsonify({"message": "Success"}), 200
 
+def update_profile(session, email, url):
+    """
+    Adds a viewed article to the user's profile. Failures are logged, the view stays recorded.
+    """
+    article = sparql_service.get_article_by_url(url)
+    if not article:
+        logging.error(f"Article {url} not found, profile of {email} not updated")
+        return
+    vector = sparql_service.vector_index.vectors([article])
+    if profileService.record_view(session, email, article, vector) is None:
+        logging.error(f"Failed to update the profile of {email}")
+
 @user_blueprint.route('/recommend', methods=['GET'])
 @jwt_required()
 def recommend():
     """
-    Recommends articles to the user based on their history.
+    Recommends articles to the user: the ones precomputed by the batch job while they are fresh,
+    otherwise the ones computed live from their stored profile, built from their history.
     """
     try:
         verify_jwt_in_request()
@@ -57,12 +76,23 @@ def recommend():
     logging.info(f"Getting recommendations for {email}")
     session, engine = connect()
     try:
-        user_history = userService.get_user_history(session, email)
+        profile = profileService.get_profile(session, email)
+        precomputed = recommendationService.get_fresh(session, email, profile.updated_at if profile else None)
+        if precomputed:
+            return jsonify({"message": "Success", "recommended_articles": precomputed}), 200
+        user_history = userService.get_user_top_history(session, email, limit=RECOMMENDATION_EXCLUDE_RECENT)
         if not user_history:
             return jsonify({"message": "No history found"}), 404
+        profile = profileService.load_profile(session, email, sparql_service, userService)
+        if profile is not None:
+            profile = {
+                "preferences": profileService.preferences(profile),
+                "centroid": profileService.centroid(profile, sparql_service.vector_index.n_features)
+            }
+        sparql_service.cooccurrence.refresh_if_stale(session)
     finally:
         close(session,engine)
-    recommended_articles = sparql_service.get_recommendations(user_history)
+    recommended_articles = sparql_service.get_recommendations(user_history, profile=profile)
     if not recommended_articles:
         return jsonify({"message": "No recommendations found"}), 404
     return jsonify({"message":"Success","recommended_articles": recommended_articles}), 200
@@ -166,4 +196,23 @@ def get_user_favorites():
     result = sparql_service.search_certain_articles(links)
     if result:
         return jsonify({"message": "Success", "data": result}), 200
-    return jsonify({"message": "No articles found", "data": []}), 200
\ No newline at end of file
+    return jsonify({"message": "No articles found", "data": []}), 200
+
+@user_blueprint.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """
+    Reports the runtime metrics of the user service.
+    Returns:
+        Database connection pool and co-occurrence index statistics.
+    """
+    try:
+        verify_jwt_in_request()
+    except Exception as e:
+        logging.error(f"JWT verification failed: {str(e)}")
+        return jsonify({"message": "Unauthorized"}), 401
+    return jsonify({
+        "message": "Success",
+        "db_pool": pool_stats(),
+        "cooccurrence_index": sparql_service.cooccurrence.stats()
+    }), 200
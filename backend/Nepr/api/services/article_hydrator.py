@@ -0,0 +1,159 @@
+import logging
+from collections import defaultdict
+
+SCHEMA = "http://schema.org/"
+
+
+def _dispatch(fields):
+    """
+    Builds a predicate -> (field, converter) table.
+    Args:
+        fields (dict): Field names mapped to a converter, or None to keep the raw value.
+    Returns:
+        dict: The dispatch table keyed by the schema.org predicate URI.
+    """
+    return {f"{SCHEMA}{field}": (field, converter) for field, converter in fields.items()}
+
+
+PERSON_FIELDS = dict.fromkeys(["name", "@type", "jobTitle", "address", "affiliation", "birthDate", "birthPlace",
+                               "deathDate", "deathPlace", "email", "familyName", "gender", "givenName",
+                               "nationality"])
+ORGANIZATION_FIELDS = dict.fromkeys(["name", "@type", "address", "affiliation", "email"])
+IMAGE_FIELDS = {"height": int, "width": int, "url": None, "@type": None}
+MEDIA_FIELDS = {"caption": None, "transcript": None, "@type": None, "contentUrl": None, "duration": None,
+                "embedUrl": None, "height": int, "uploadDate": None, "width": int}
+
+PERSON_DISPATCH = _dispatch(PERSON_FIELDS)
+ORGANIZATION_DISPATCH = _dispatch(ORGANIZATION_FIELDS)
+IMAGE_DISPATCH = _dispatch(IMAGE_FIELDS)
+MEDIA_DISPATCH = _dispatch(MEDIA_FIELDS)
+
+# Article predicates holding a single value (last one wins).
+SCALAR_DISPATCH = _dispatch({
+    "@type": None, "headline": None, "datePublished": None, "dateModified": None, "dateCreated": None,
+    "articleBody": None, "wordCount": int, "inLanguage": None, "thumbnailUrl": None, "articleSection": None,
+    "abstract": None, "url": None
+})
+# Article predicates pointing to entities typed as Person or Organization.
+AGENT_PREDICATES = {f"{SCHEMA}author": "author", f"{SCHEMA}publisher": "publisher"}
+AGENT_DISPATCH = {"Person": PERSON_DISPATCH, "Organization": ORGANIZATION_DISPATCH}
+# Article predicates pointing to nested objects appended to a list.
+NESTED_DISPATCH = {
+    f"{SCHEMA}image": ("image", IMAGE_DISPATCH),
+    f"{SCHEMA}audio": ("audio", MEDIA_DISPATCH),
+    f"{SCHEMA}video": ("video", MEDIA_DISPATCH),
+    f"{SCHEMA}editor": ("editor", PERSON_DISPATCH),
+}
+TYPE_PREDICATE = f"{SCHEMA}@type"
+
+
+def _value(result, name):
+    return result.get(name, {}).get('value')
+
+
+class ArticleHydrator:
+    """
+    Turns the (?p ?o ?subP ?subO) bindings of an article into its JSON structure.
+    The bindings are grouped by object node in a single pass, so each nested entity is built
+    from its own rows instead of rescanning the whole result set.
+    """
+
+    @staticmethod
+    def group_by_object(results):
+        """
+        Groups the (sub-predicate, sub-object) pairs of the bindings by their object node.
+        Args:
+            results (list): SPARQL bindings.
+        Returns:
+            dict: Object value mapped to its list of (sub-predicate, sub-object) pairs.
+        """
+        groups = defaultdict(list)
+        for result in results:
+            groups[_value(result, 'o')].append((_value(result, 'subP'), _value(result, 'subO')))
+        return groups
+
+    @staticmethod
+    def build(pairs, dispatch):
+        """
+        Builds a nested object from its (sub-predicate, sub-object) pairs.
+        Args:
+            pairs (list): The pairs of the object node.
+            dispatch (dict): The predicate -> (field, converter) table of the object kind.
+        Returns:
+            dict: The object with every field of the table, unset fields being None.
+        """
+        data = {field: None for field, _ in dispatch.values()}
+        for sub_predicate, sub_object in pairs:
+            target = dispatch.get(sub_predicate)
+            if target:
+                field, converter = target
+                data[field] = converter(sub_object) if converter else sub_object
+        return data
+
+    def hydrate(self, results, url):
+        """
+        Builds the article JSON from its SPARQL bindings.
+        Args:
+            results (list): Bindings of ?p ?o ?subP ?subO for the article.
+            url (str): URL of the article.
+        Returns:
+            dict: The article data.
+        """
+        article_data = {
+            "@context": "http://schema.org",
+            "@type": None,
+            "url": url,
+            "author": [],
+            "publisher": [],
+            "image": [],
+            "keywords": [],
+            "datePublished": None,
+            "headline": None,
+            "articleBody": None,
+            "wordCount": None,
+            "inLanguage": None,
+            "thumbnailUrl": None,
+            "thumbnail": [],
+            "articleSection": None,
+            "abstract": None,
+            "audio": [],
+            "video": [],
+            "editor": [],
+            "dateCreated": None,
+            "dateModified": None,
+        }
+        groups = self.group_by_object(results)
+        seen = set()
+        for result in results:
+            try:
+                predicate = result['p']['value']
+                object_value = result['o']['value']
+
+                scalar = SCALAR_DISPATCH.get(predicate)
+                if scalar:
+                    field, converter = scalar
+                    article_data[field] = converter(object_value) if converter else object_value
+                elif predicate == f"{SCHEMA}keywords":
+                    article_data["keywords"].append(object_value)
+                elif predicate in AGENT_PREDICATES:
+                    if _value(result, 'subP') != TYPE_PREDICATE:
+                        continue
+                    field = AGENT_PREDICATES[predicate]
+                    dispatch = AGENT_DISPATCH.get(_value(result, 'subO'))
+                    if dispatch and (field, object_value) not in seen:
+                        seen.add((field, object_value))
+                        entity = self.build(groups[object_value], dispatch)
+                        if entity not in article_data[field]:
+                            article_data[field].append(entity)
+                elif predicate in NESTED_DISPATCH:
+                    field, dispatch = NESTED_DISPATCH[predicate]
+                    if (field, object_value) not in seen:
+                        seen.add((field, object_value))
+                        entity = self.build(groups[object_value], dispatch)
+                        if entity not in article_data[field]:
+                            article_data[field].append(entity)
+                elif predicate == f"{SCHEMA}thumbnail":
+                    article_data["thumbnail"] = self.build(groups[object_value], IMAGE_DISPATCH)
+            except Exception as e:
+                logging.error(f"Error processing result: {e}")
+        return article_data
@@ -0,0 +1,311 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from dotenv import load_dotenv
+from scipy.sparse import csr_matrix
+from sqlalchemy.orm import Session
+
+from models.models import UserHistory, UserFavorites
+
+load_dotenv()
+
+# Articles whose neighbour lists are recomputed per sparse product
+BLOCK_SIZE = 1000
+
+
+def _sparse_rows(rows, width, positions=None):
+    """
+    Builds a CSR matrix from rows given as {column: value} dicts.
+    Args:
+        rows: The rows.
+        width (int): Number of columns.
+        positions (dict): Maps the keys of the rows to their column, the keys themselves by default.
+    """
+    indptr, indices, data = [0], [], []
+    for row in rows:
+        indices.extend(row if positions is None else (positions[key] for key in row))
+        data.extend(row.values())
+        indptr.append(len(indices))
+    matrix = csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64),
+                         np.asarray(indptr, dtype=np.int64)), shape=(len(rows), width))
+    matrix.sort_indices()
+    return matrix
+
+
+class CooccurrenceIndex:
+    """
+    Item-to-item collaborative filtering over the implicit feedback of user_history and
+    user_favorites. Interactions form a sparse user x article matrix R (log-damped view counts,
+    favorites weighing more); two articles are similar when the same users read them, measured
+    by the cosine of their columns in R. Only the top `neighbours` similar articles of each
+    article are kept, so scoring a history of H articles costs O(H x neighbours).
+    R is stored both by row and by column, so new history and favorite rows only update the
+    cells and norms of the columns they touch. The neighbour lists recomputed are the ones of
+    the articles sharing a reader with a touched column, whose similarities to it changed.
+    Removed favorites are only accounted for by the periodic full rebuild.
+    Refreshes and rebuilds run on a background thread and swap their results in, so lookups
+    only wait for the swap.
+    """
+
+    def __init__(self, neighbours=None, favorite_weight=None, refresh_seconds=None, rebuild_seconds=None):
+        """
+        Args:
+            neighbours (int): Number of similar articles kept per article.
+            favorite_weight (float): Weight of a favorite, a view weighing 1.
+            refresh_seconds (float): Minimum interval between incremental refreshes.
+            rebuild_seconds (float): Interval between full rebuilds.
+        """
+        self.neighbours = neighbours or int(os.getenv("COOCCURRENCE_NEIGHBOURS", 50))
+        self.favorite_weight = favorite_weight or float(os.getenv("COOCCURRENCE_FAVORITE_WEIGHT", 3))
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else \
+            float(os.getenv("COOCCURRENCE_REFRESH_SECONDS", 60))
+        self.rebuild_seconds = rebuild_seconds if rebuild_seconds is not None else \
+            float(os.getenv("COOCCURRENCE_REBUILD_SECONDS", 86400))
+        # _lock guards what lookups read; _update_lock serializes the refreshes
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._worker = None
+        self._reset()
+        self._refreshed_at = None
+        self._rebuilt_at = None
+
+    def _reset(self):
+        self._article_ids = {}
+        self._urls = []
+        self._lists = {}
+        self._user_ids = {}
+        # Summed interaction weights of each (user, article) cell, and the damped cells of R
+        self._counts = {}
+        self._user_rows = []
+        self._article_columns = []
+        self._norms = []
+        self._interactions = 0
+        self._watermarks = {'history': None, 'favorites': None}
+        self._seen = {'history': set(), 'favorites': set()}
+
+    def add_interactions(self, interactions):
+        """
+        Adds interactions and recomputes the neighbour lists they affect.
+        Args:
+            interactions: (user email, article URL, weight) tuples.
+        Returns:
+            int: Number of recomputed neighbour lists.
+        """
+        with self._update_lock:
+            return self._add(interactions)
+
+    def _add(self, interactions):
+        if not interactions:
+            return 0
+        changed = set()
+        with self._lock:
+            for email, url, weight in interactions:
+                if url not in self._article_ids:
+                    self._article_ids[url] = len(self._urls)
+                    self._urls.append(url)
+                    self._article_columns.append({})
+                    self._norms.append(0.0)
+                if email not in self._user_ids:
+                    self._user_ids[email] = len(self._user_ids)
+                    self._user_rows.append({})
+                user, article = self._user_ids[email], self._article_ids[url]
+                count = self._counts.get((user, article), 0.0) + weight
+                self._counts[(user, article)] = count
+                self._user_rows[user][article] = self._article_columns[article][user] = math.log1p(count)
+                changed.add(article)
+            self._interactions += len(interactions)
+            for article in changed:
+                self._norms[article] = math.sqrt(math.fsum(value * value
+                                                           for value in self._article_columns[article].values()))
+
+        affected = set()
+        for article in changed:
+            for user in self._article_columns[article]:
+                affected.update(self._user_rows[user])
+        lists = self._compute(sorted(affected))
+        with self._lock:
+            self._lists.update(lists)
+        return len(affected)
+
+    def _compute(self, articles):
+        lists = {}
+        norms = np.asarray(self._norms)
+        for start in range(0, len(articles), BLOCK_SIZE):
+            block = articles[start:start + BLOCK_SIZE]
+            columns = [self._article_columns[article] for article in block]
+            # Only the rows of the readers of the block take part in the product
+            users = sorted({user for column in columns for user in column})
+            positions = {user: position for position, user in enumerate(users)}
+            readers = _sparse_rows(columns, len(users), positions)
+            products = (readers @ _sparse_rows([self._user_rows[user] for user in users], len(self._urls))).tocsr()
+            products.sort_indices()
+            for offset, article in enumerate(block):
+                row = slice(products.indptr[offset], products.indptr[offset + 1])
+                neighbours, values = products.indices[row], products.data[row]
+                mask = neighbours != article
+                neighbours, values = neighbours[mask], values[mask]
+                similarities = values / (norms[article] * norms[neighbours])
+                if len(neighbours) > self.neighbours:
+                    best = np.argpartition(-similarities, self.neighbours - 1)[:self.neighbours]
+                    neighbours, similarities = neighbours[best], similarities[best]
+                order = np.argsort(-similarities, kind='stable')
+                lists[article] = (neighbours[order].astype(np.int64), similarities[order])
+        return lists
+
+    def neighbours_of(self, url, k=None):
+        """
+        Returns the articles most often read by the readers of an article.
+        Args:
+            url (str): URL of the article.
+            k (int): Maximum number of articles, defaults to all the kept ones.
+        Returns:
+            list: (URL, cosine similarity) pairs, most similar first.
+        """
+        with self._lock:
+            article = self._article_ids.get(url)
+            if article is None or article not in self._lists:
+                return []
+            neighbours, similarities = self._lists[article]
+            return [(self._urls[neighbour], float(similarity))
+                    for neighbour, similarity in zip(neighbours[:k], similarities[:k])]
+
+    def scores(self, history):
+        """
+        Scores the neighbours of a reading history: the mean similarity of each article to the
+        history articles, from the truncated neighbour lists only.
+        Args:
+            history (list): URLs of the articles read.
+        Returns:
+            dict: Article URL -> score in [0, 1], history articles excluded.
+        """
+        read = set(history)
+        scores = defaultdict(float)
+        with self._lock:
+            for url in read:
+                article = self._article_ids.get(url)
+                if article is None or article not in self._lists:
+                    continue
+                neighbours, similarities = self._lists[article]
+                for neighbour, similarity in zip(neighbours.tolist(), similarities.tolist()):
+                    scores[self._urls[neighbour]] += similarity
+        return {url: score / len(read) for url, score in scores.items() if url not in read}
+
+    def _new_rows(self, session, kind, model, date_column, weight):
+        query = session.query(model.id, model.user_email, model.article_url, date_column)
+        watermark = self._watermarks[kind]
+        if watermark is not None:
+            query = query.filter(date_column >= watermark)
+        query = query.order_by(date_column)
+        interactions = []
+        for row_id, email, url, date in query.all():
+            if row_id in self._seen[kind]:
+                continue
+            if watermark is None or date > watermark:
+                watermark, self._seen[kind] = date, set()
+            if date == watermark:
+                self._seen[kind].add(row_id)
+            interactions.append((email, url, weight))
+        self._watermarks[kind] = watermark
+        return interactions
+
+    def refresh(self, session: Session, rebuild=False):
+        """
+        Folds the history and favorite rows added since the last refresh into the index.
+        Args:
+            session: Session of the user database.
+            rebuild (bool): True to read every row again into a new index, swapped in once built.
+        Returns:
+            int: Number of new interactions.
+        """
+        with self._update_lock:
+            if rebuild:
+                fresh = CooccurrenceIndex(self.neighbours, self.favorite_weight, self.refresh_seconds,
+                                          self.rebuild_seconds)
+                count = fresh.refresh(session)
+                with self._lock:
+                    for name in ('_article_ids', '_urls', '_lists', '_user_ids', '_counts', '_user_rows',
+                                 '_article_columns', '_norms', '_interactions', '_watermarks', '_seen'):
+                        setattr(self, name, getattr(fresh, name))
+                self._refreshed_at = self._rebuilt_at = time.monotonic()
+                return count
+            interactions = self._new_rows(session, 'history', UserHistory, UserHistory.date_accessed, 1.0)
+            interactions += self._new_rows(session, 'favorites', UserFavorites, UserFavorites.date_favorited,
+                                           self.favorite_weight)
+            self._add(interactions)
+            self._refreshed_at = time.monotonic()
+            return len(interactions)
+
+    def refresh_if_stale(self, session: Session, wait=False):
+        """
+        Refreshes the index when the refresh interval has passed, rebuilding it when the
+        rebuild interval has. The refresh runs on a background thread with a session of its own,
+        unless `wait` is set; lookups meanwhile use the current neighbour lists.
+        Errors are logged; a failed rebuild is retried on the next call.
+        Args:
+            session: Session of the user database, only used for its engine when not waiting.
+            wait (bool): True to refresh in the calling thread, e.g. in the batch job.
+        Returns:
+            threading.Thread: The started background refresh, None if none was started.
+        """
+        now = time.monotonic()
+        if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_seconds:
+            rebuild = True
+        elif now - self._refreshed_at >= self.refresh_seconds:
+            rebuild = False
+        else:
+            return None
+        if wait:
+            self._refresh_logged(session, rebuild)
+            return None
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return None
+            self._worker = threading.Thread(target=self._refresh_in_background, args=(session.get_bind(), rebuild),
+                                            name="cooccurrence-refresh", daemon=True)
+            self._worker.start()
+            return self._worker
+
+    def _refresh_in_background(self, engine, rebuild):
+        session = Session(bind=engine)
+        try:
+            self._refresh_logged(session, rebuild)
+        finally:
+            session.close()
+
+    def _refresh_logged(self, session, rebuild):
+        try:
+            self.refresh(session, rebuild=rebuild)
+        except Exception as e:
+            logging.error(f"Error refreshing the co-occurrence index: {e}")
+
+    def stats(self):
+        """
+        Returns the index size.
+        Returns:
+            dict: The number of users, articles, interactions and neighbour lists.
+        """
+        with self._lock:
+            return {"users": len(self._user_ids), "articles": len(self._urls), "interactions": self._interactions,
+                    "lists": len(self._lists), "neighbours": self.neighbours}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_cooccurrence_index():
+    """
+    Returns the process-wide co-occurrence index, creating it on first use.
+    Returns:
+        CooccurrenceIndex: The shared index.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CooccurrenceIndex()
+        return _index
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from databases.db_postgresql_conn import get_engine, ensure_table
+from models.models import DatasetVersion
+
+
+class DatasetVersionCounter:
+    """
+    Counts the writes to the Fuseki dataset, so cached query results can be keyed on it.
+    With a user database configured the counter is shared: a write through one process or replica
+    invalidates the caches of all of them within SEARCH_CACHE_VERSION_CHECK seconds. Writes of
+    this process invalidate its own cache immediately, even while the database is unreachable.
+    """
+
+    def __init__(self, name="NEPR-2024", session_factory=None, check_seconds=None):
+        """
+        Args:
+            name: Name of the dataset.
+            session_factory: Returns a new session of the user database; defaults to the shared
+                engine when DATABASE_URI_POSTGRESQL is set, else the counter is local to the process.
+            check_seconds: Seconds between two reads of the shared counter.
+        """
+        self.name = name
+        if session_factory is None and os.getenv("DATABASE_URI_POSTGRESQL"):
+            session_factory = lambda: Session(bind=get_engine())
+        self.session_factory = session_factory
+        self.check_seconds = check_seconds if check_seconds is not None else \
+            float(os.getenv("SEARCH_CACHE_VERSION_CHECK", 1))
+        self.shared_version = 0
+        self.local_writes = 0
+        self._checked = None
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = self.session_factory()
+        ensure_table(session.get_bind(), DatasetVersion.__table__)
+        return session
+
+    def current(self):
+        """
+        Returns the version to key cached results on: the shared counter, read at most every
+        check_seconds, and the writes of this process.
+        """
+        if self.session_factory is not None:
+            now = time.monotonic()
+            if self._checked is None or now - self._checked >= self.check_seconds:
+                self._checked = now
+                session = None
+                try:
+                    session = self._session()
+                    row = session.get(DatasetVersion, self.name)
+                    self.shared_version = row.version if row else 0
+                except Exception as e:
+                    logging.error(f"Could not read the dataset version: {e}")
+                finally:
+                    if session is not None:
+                        session.close()
+        return self.shared_version, self.local_writes
+
+    def bump(self):
+        """Records a write to the dataset."""
+        with self._lock:
+            self.local_writes += 1
+        if self.session_factory is None:
+            return
+        session = None
+        try:
+            session = self._session()
+            updated = session.query(DatasetVersion).filter(DatasetVersion.name == self.name) \
+                .update({DatasetVersion.version: DatasetVersion.version + 1}, synchronize_session=False)
+            if not updated:
+                session.add(DatasetVersion(name=self.name, version=1))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another process created the row first
+                session.rollback()
+                session.query(DatasetVersion).filter(DatasetVersion.name == self.name) \
+                    .update({DatasetVersion.version: DatasetVersion.version + 1}, synchronize_session=False)
+                session.commit()
+            self._checked = None
+        except Exception as e:
+            logging.error(f"Could not record the dataset write: {e}")
+            if session is not None:
+                session.rollback()
+        finally:
+            if session is not None:
+                session.close()
+
+    def stats(self):
+        shared = self.session_factory is not None
+        return {"dataset_version": self.shared_version if shared else self.local_writes,
+                "local_writes": self.local_writes, "shared": shared}
@@ -0,0 +1,78 @@
+import json
+import zlib
+
+from rdflib import BNode, Literal
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+
+CHUNK_SIZE = 64 * 1024
+
+# Export format -> (media type requested from Fuseki, media type of the response)
+EXPORT_FORMATS = {
+    "ntriples": ("application/n-triples", "application/n-triples"),
+    "nquads": ("application/n-quads", "application/n-quads"),
+    "ndjson": ("application/n-triples", "application/x-ndjson"),
+}
+
+
+class _TripleSink:
+    def __init__(self):
+        self.last = None
+
+    def triple(self, s, p, o):
+        self.last = (s, p, o)
+
+
+def _term(term):
+    return term.n3() if isinstance(term, BNode) else str(term)
+
+
+def _term_type(term):
+    if isinstance(term, Literal):
+        return "literal"
+    return "bnode" if isinstance(term, BNode) else "uri"
+
+
+def ndjson_lines(lines):
+    """
+    Converts N-Triples lines into NDJSON, one {"s", "p", "o", "o_type"} object per triple.
+    Like in SPARQL JSON results, "o_type" is "uri", "bnode" or "literal"; blank nodes keep their
+    "_:" prefix, as subject or object. Literals also carry their "datatype" or "lang" when they have one.
+    Args:
+        lines: Iterable of N-Triples lines as bytes.
+    Yields:
+        bytes: One JSON document per line.
+    """
+    sink = _TripleSink()
+    parser = W3CNTriplesParser(sink)
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(b"#"):
+            continue
+        sink.last = None
+        parser.parsestring(line.decode("utf-8") + "\n")
+        if sink.last is None:
+            continue
+        s, p, o = sink.last
+        record = {"s": _term(s), "p": str(p), "o": _term(o), "o_type": _term_type(o)}
+        if isinstance(o, Literal):
+            if o.language:
+                record["lang"] = o.language
+            elif o.datatype:
+                record["datatype"] = str(o.datatype)
+        yield json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def gzip_chunks(chunks):
+    """
+    Gzips a stream of byte chunks without buffering it.
+    Args:
+        chunks: Iterable of bytes.
+    Yields:
+        bytes: The gzip stream.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from databases.db_postgresql_conn import get_engine, ensure_table
+from models.models import IngestJob
+
+
+class IngestJobService:
+    """
+    Runs article ingests (scrape, enrich, upload) on a bounded worker pool outside the request thread.
+    Job records live in the user database, so any replica can report a job accepted by another one.
+    """
+
+    def __init__(self, sparql_service, max_workers=None, max_queue=None, retention_days=None, session_factory=None):
+        """
+        Args:
+            sparql_service: The SPARQLService used to build and upload the article graphs.
+            max_workers: Number of ingests running at the same time.
+            max_queue: Maximum number of queued and running ingests before new ones are rejected.
+            retention_days: Days finished jobs are kept for status lookups.
+            session_factory: Returns a new session of the job database, defaults to the shared engine.
+        """
+        self.sparql_service = sparql_service
+        self.max_workers = max_workers or int(os.getenv("INGEST_WORKERS", 4))
+        self.max_queue = max_queue or int(os.getenv("INGEST_MAX_QUEUE", 20))
+        self.retention = timedelta(days=retention_days or float(os.getenv("INGEST_JOB_RETENTION_DAYS", 7)))
+        self.session_factory = session_factory or (lambda: Session(bind=get_engine()))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def _session(self):
+        session = self.session_factory()
+        ensure_table(session.get_bind(), IngestJob.__table__)
+        return session
+
+    @staticmethod
+    def _as_dict(job):
+        def timestamp(value):
+            return value.isoformat() if value else None
+
+        return {
+            "id": job.id,
+            "url": job.url,
+            "status": job.status,
+            "submitted_at": timestamp(job.submitted_at),
+            "started_at": timestamp(job.started_at),
+            "finished_at": timestamp(job.finished_at),
+            "timings": job.timings or {},
+            "extraction_tier": job.extraction_tier,
+            "message": job.message,
+            "result": job.result
+        }
+
+    def submit(self, url, owner=None):
+        """
+        Queues the ingest of an article.
+        Args:
+            url: URL of the article to ingest.
+            owner: Identity of the user submitting the job; only they can look it up.
+        Returns:
+            The queued job, or None if the queue is full or the job could not be stored.
+        """
+        with self._lock:
+            if self._active >= self.max_queue:
+                return None
+            self._active += 1
+        job = IngestJob(id=str(uuid.uuid4()), user_email=owner, url=url, status="queued",
+                        submitted_at=datetime.now(), timings={})
+        session = None
+        try:
+            session = self._session()
+            session.add(job)
+            self._evict_finished(session)
+            session.commit()
+            snapshot = self._as_dict(job)
+        except Exception as e:
+            logging.error(f"Could not store ingest job for {url}: {e}")
+            if session is not None:
+                session.rollback()
+            with self._lock:
+                self._active -= 1
+            return None
+        finally:
+            if session is not None:
+                session.close()
+        self.executor.submit(self._run, snapshot["id"], url)
+        return snapshot
+
+    def _evict_finished(self, session):
+        session.query(IngestJob).filter(IngestJob.status.in_(("succeeded", "failed")),
+                                        IngestJob.finished_at < datetime.now() - self.retention) \
+            .delete(synchronize_session=False)
+
+    def _update(self, job_id, **fields):
+        session = None
+        try:
+            session = self._session()
+            session.query(IngestJob).filter(IngestJob.id == job_id).update(fields, synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            logging.error(f"Could not update ingest job {job_id}: {e}")
+            if session is not None:
+                session.rollback()
+        finally:
+            if session is not None:
+                session.close()
+
+    def _run(self, job_id, url):
+        self._update(job_id, status="running", started_at=datetime.now())
+        report = {}
+        try:
+            success, message, data = self.sparql_service.create_and_insert_graph(url, report)
+            status = "succeeded" if success else "failed"
+        except Exception as e:
+            logging.error(f"Ingest job {job_id} failed: {e}")
+            status, message, data = "failed", f"Error: {str(e)}", None
+        finally:
+            with self._lock:
+                self._active -= 1
+        self._update(job_id, status=status, message=message, result=data,
+                     timings=report.get('timings', {}), extraction_tier=report.get('json_ld_tier'),
+                     finished_at=datetime.now())
+
+    def get(self, job_id, owner=None):
+        """
+        Returns a snapshot of a job.
+        Args:
+            job_id: Identifier returned by submit.
+            owner: Identity of the user asking; jobs submitted by someone else are not returned.
+        Returns:
+            The job status, stage timings and result, or None if the job is unknown.
+        """
+        session = None
+        try:
+            session = self._session()
+            job = session.get(IngestJob, job_id)
+            if job is None or job.user_email != owner:
+                return None
+            return self._as_dict(job)
+        except Exception as e:
+            logging.error(e)
+            return None
+        finally:
+            if session is not None:
+                session.close()
+
+    def stats(self):
+        """Returns the number of active ingests of this process against the pool capacity."""
+        with self._lock:
+            return {
+                "active": self._active,
+                "max_queue": self.max_queue,
+                "workers": self.max_workers
+            }
@@ -0,0 +1,281 @@
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+from dotenv import load_dotenv
+
+from utils.http_client import get_session
+
+load_dotenv()
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Splits a text into case- and accent-folded tokens.
+    Args:
+        text (str): The text to split.
+    Returns:
+        list: The folded tokens, e.g. "Économie Mondiale" -> ["economie", "mondiale"].
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return TOKEN_PATTERN.findall(folded)
+
+
+class KeywordIndex:
+    """
+    Inverted index from keyword tokens to article URLs, kept next to the Fuseki dataset.
+    It is updated when articles are ingested or deleted, so keyword searches resolve their
+    candidates with index range scans instead of CONTAINS filters over every keyword literal.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): SQLite file of the index, ':memory:' keeps it in process.
+        """
+        self.path = path or os.getenv("KEYWORD_INDEX_PATH", "keyword_index.sqlite3")
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS articles (article TEXT PRIMARY KEY, date_published TEXT NOT NULL DEFAULT '');"
+            "CREATE TABLE IF NOT EXISTS postings (token TEXT NOT NULL, article TEXT NOT NULL, "
+            "PRIMARY KEY (token, article)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_article ON postings (article);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(articles)")]
+        if "date_published" not in columns:
+            # Index created before dates were stored: searches order by URL until it is rebuilt
+            self._connection.execute("ALTER TABLE articles ADD COLUMN date_published TEXT NOT NULL DEFAULT ''")
+        self._connection.commit()
+
+    def add(self, url, keywords, date_published=None):
+        """
+        Indexes (or re-indexes) the keywords of an article.
+        Args:
+            url (str): URL of the article.
+            keywords (list): The keyword literals of the article.
+            date_published (str): The publication date as stored in Fuseki, used to order the results.
+        """
+        tokens = {token for keyword in keywords for token in tokenize(keyword)}
+        with self._lock:
+            try:
+                self._connection.execute("DELETE FROM postings WHERE article = ?", (url,))
+                self._connection.execute("INSERT OR REPLACE INTO articles (article, date_published) VALUES (?, ?)",
+                                         (url, date_published or ""))
+                self._connection.executemany("INSERT OR IGNORE INTO postings (token, article) VALUES (?, ?)",
+                                             [(token, url) for token in tokens])
+                self._connection.commit()
+            except sqlite3.Error as e:
+                self._connection.rollback()
+                logging.error(f"Error indexing keywords of {url}: {e}")
+
+    def remove(self, url):
+        """
+        Removes an article from the index.
+        Args:
+            url (str): URL of the article.
+        """
+        with self._lock:
+            try:
+                self._connection.execute("DELETE FROM postings WHERE article = ?", (url,))
+                self._connection.execute("DELETE FROM articles WHERE article = ?", (url,))
+                self._connection.commit()
+            except sqlite3.Error as e:
+                self._connection.rollback()
+                logging.error(f"Error removing {url} from the keyword index: {e}")
+
+    def clear(self):
+        """Drops every indexed article."""
+        with self._lock:
+            self._connection.execute("DELETE FROM postings")
+            self._connection.execute("DELETE FROM articles")
+            self._connection.commit()
+
+    def is_built(self):
+        """
+        Returns True once the index has been rebuilt from the dataset. Until then it only holds
+        the articles ingested since it was created and cannot answer searches on its own.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is not None
+
+    def mark_built(self):
+        """Records that the index covers the whole dataset."""
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', datetime('now'))")
+            self._connection.commit()
+
+    def search(self, words, match_all=True, limit=None, among=None):
+        """
+        Finds the articles whose keywords contain tokens starting with the searched words.
+        Args:
+            words (list): The searched words.
+            match_all (bool): True to require every word, False to accept any of them.
+            limit (int): Maximum number of URLs returned, all of them by default.
+            among (list): Only look at these URLs, e.g. a page of search results.
+        Returns:
+            list: The matching article URLs.
+        """
+        if among is not None and not among:
+            return []
+        word_queries = []
+        params = []
+        for word in words:
+            tokens = tokenize(word)
+            if not tokens:
+                continue
+            # A word folding into several tokens ("new-york") needs all of them.
+            token_query = " INTERSECT ".join(
+                "SELECT article FROM postings WHERE token >= ? AND token < ?" for _ in tokens
+            )
+            word_queries.append(f"SELECT article FROM ({token_query})")
+            for token in tokens:
+                params.extend([token, token + "\U0010ffff"])
+        if not word_queries:
+            return []
+        query = (" INTERSECT " if match_all else " UNION ").join(word_queries)
+        if among is not None:
+            query = f"SELECT article FROM ({query}) WHERE article IN ({', '.join('?' for _ in among)})"
+            params.extend(among)
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [row[0] for row in self._connection.execute(query, params)]
+
+    def search_ranked(self, words, limit=None, position=None):
+        """
+        Finds the articles matching any of the searched words, in search result order: the ones
+        matching most words first, then the newest, then by URL.
+        Args:
+            words (list): The searched words; duplicates count once.
+            limit (int): Maximum number of URLs returned, all of them by default.
+            position (dict): Keyset position to resume after: the number of matched words 'c', the
+                publication date 'd' and the URL 'u' of the last article already returned.
+        Returns:
+            list: (URL, number of matched words, publication date) tuples.
+        """
+        word_queries = []
+        params = []
+        for index, tokens in enumerate(dict.fromkeys(tuple(tokenize(word)) for word in words)):
+            if not tokens:
+                continue
+            token_query = " INTERSECT ".join(
+                "SELECT article FROM postings WHERE token >= ? AND token < ?" for _ in tokens
+            )
+            word_queries.append(f"SELECT article, {index} AS word FROM ({token_query})")
+            for token in tokens:
+                params.extend([token, token + "\U0010ffff"])
+        if not word_queries:
+            return []
+        query = (f"SELECT matched.article, COUNT(*) AS matches, MAX(articles.date_published) AS published "
+                 f"FROM ({' UNION '.join(word_queries)}) AS matched "
+                 "JOIN articles ON articles.article = matched.article "
+                 "GROUP BY matched.article")
+        if position:
+            count, date, url = int(position.get('c', 0)), position.get('d', ""), position.get('u', "")
+            query += (" HAVING matches < ? OR (matches = ? AND (published < ? OR (published = ? AND "
+                      "matched.article > ?)))")
+            params.extend([count, count, date, date, url])
+        query += " ORDER BY matches DESC, published DESC, matched.article"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [(row[0], row[1], row[2]) for row in self._connection.execute(query, params)]
+
+    def stats(self):
+        """
+        Returns the index size.
+        Returns:
+            dict: Whether the index is built, and the number of indexed articles and postings.
+        """
+        with self._lock:
+            articles = self._connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            postings = self._connection.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"built": self.is_built(), "articles": articles, "postings": postings}
+
+    def rebuild(self, fuseki_url, http=None, page_size=10000):
+        """
+        Rebuilds the index from the keywords stored in Fuseki.
+        Args:
+            fuseki_url (str): Base URL of the Fuseki server.
+            http: Session used for the queries.
+            page_size (int): Number of keyword rows fetched per query.
+        Returns:
+            int: Number of indexed articles.
+        """
+        http = http or get_session("fuseki")
+        keywords = {}
+        dates = {}
+        offset = 0
+        while True:
+            query = f"""
+            PREFIX schema: <http://schema.org/>
+            SELECT DISTINCT ?article ?keyword (STR(?published) AS ?date)
+            WHERE {{
+              ?article schema:headline ?headline .
+              OPTIONAL {{ ?article schema:keywords ?keyword }}
+              OPTIONAL {{ ?article schema:datePublished ?published }}
+            }}
+            ORDER BY ?article ?keyword ?date
+            LIMIT {page_size}
+            OFFSET {offset}
+            """
+            response = http.post(f"{fuseki_url}/NEPR-2024/query", data=query,
+                                 headers={'Content-Type': 'application/sparql-query'})
+            response.raise_for_status()
+            bindings = response.json().get('results', {}).get('bindings', [])
+            for result in bindings:
+                article_keywords = keywords.setdefault(result['article']['value'], [])
+                if 'keyword' in result:
+                    article_keywords.append(result['keyword']['value'])
+                if 'date' in result:
+                    dates[result['article']['value']] = max(dates.get(result['article']['value'], ""),
+                                                            result['date']['value'])
+            if len(bindings) < page_size:
+                break
+            offset += page_size
+
+        self.clear()
+        for url, article_keywords in keywords.items():
+            self.add(url, list(dict.fromkeys(article_keywords)), dates.get(url))
+        self.mark_built()
+        return len(keywords)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_keyword_index():
+    """
+    Returns the process-wide keyword index, creating it on first use.
+    Returns:
+        KeywordIndex: The shared index.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = KeywordIndex()
+        return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the keyword search index.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from the Fuseki dataset")
+    args = parser.parse_args()
+
+    index = get_keyword_index()
+    if args.rebuild:
+        count = index.rebuild(os.getenv("FUSEKI_URL"))
+        print(f"Indexed {count} articles.")
+    print(f"Keyword index stats: {index.stats()}")
@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+from scipy.sparse import csr_matrix
+
+load_dotenv()
+
+
+class RandomProjectionLSH:
+    """
+    Random-projection (SimHash) locality-sensitive hashing of sparse vectors.
+    Each of `tables` hash tables keys a vector by the signs of its projections on `bits`
+    random hyperplanes, so vectors with a small angle between them tend to share keys.
+    The hyperplanes are Gaussian over the features folded modulo `dimension`, which keeps them
+    small and dense, and are derived from a seed: every process hashes the same vector to the
+    same keys without storing them.
+    Keys are kept per row, aligned with the rows of the vector store, and each table is
+    searched through a sorted copy of its keys, so a lookup is a few binary searches.
+    """
+
+    def __init__(self, n_features, tables=None, bits=None, dimension=4096, seed=0):
+        """
+        Args:
+            n_features (int): Dimension of the hashed vectors.
+            tables (int): Number of hash tables.
+            bits (int): Number of hyperplanes per table, at most 32.
+            dimension (int): Number of distinct hyperplane coordinates.
+            seed (int): Seed of the hyperplanes.
+        """
+        self.n_features = n_features
+        self.tables = tables or int(os.getenv("LSH_TABLES", 48))
+        self.bits = bits or int(os.getenv("LSH_BITS", 8))
+        if not 0 < self.bits <= 32:
+            raise ValueError("bits must be between 1 and 32")
+        self.dimension = min(dimension, n_features)
+        self.planes = np.random.default_rng(seed).standard_normal(
+            (self.dimension, self.tables * self.bits), dtype=np.float32)
+        self.weights = (np.uint64(1) << np.arange(self.bits, dtype=np.uint64)).astype(np.uint32)
+        self.keys = np.zeros((0, self.tables), dtype=np.uint32)
+        self._sorted = []
+
+    def signatures(self, vectors):
+        """
+        Hashes vectors into one key per table.
+        Args:
+            vectors: Sparse matrix with one vector per row.
+        Returns:
+            numpy.ndarray: uint32 keys, shape (rows, tables).
+        """
+        vectors = csr_matrix(vectors)
+        folded = csr_matrix((vectors.data, vectors.indices % self.dimension, vectors.indptr),
+                            shape=(vectors.shape[0], self.dimension))
+        projected = (folded @ self.planes) > 0
+        signs = projected.reshape(-1, self.tables, self.bits)
+        return (signs * self.weights).sum(axis=2, dtype=np.uint64).astype(np.uint32)
+
+    def set_keys(self, keys):
+        """
+        Replaces the keys of the stored rows and re-sorts the tables.
+        Args:
+            keys (numpy.ndarray): One row of keys per stored vector, as returned by signatures.
+        """
+        self.keys = keys
+        self._sorted = []
+        for table in range(self.tables):
+            order = np.argsort(keys[:, table], kind='stable')
+            self._sorted.append((keys[order, table], order))
+
+    def lookup(self, keys, probe=False, limit=None):
+        """
+        Finds the stored rows sharing a key with a vector.
+        Args:
+            keys (numpy.ndarray): The keys of the vector, one per table.
+            probe (bool): True to also search the keys one bit away from the vector's.
+            limit (int): Maximum number of rows returned, None for all of them.
+        Returns:
+            numpy.ndarray: The matching row numbers, the ones sharing the most keys first.
+        """
+        found = []
+        for table, (sorted_keys, order) in enumerate(self._sorted):
+            probes = np.array([keys[table]], dtype=np.uint32)
+            if probe:
+                probes = np.concatenate([probes, keys[table] ^ self.weights])
+            starts = np.searchsorted(sorted_keys, probes, side='left')
+            ends = np.searchsorted(sorted_keys, probes, side='right')
+            found.extend(order[start:end] for start, end in zip(starts, ends) if end > start)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        counts = np.bincount(np.concatenate(found), minlength=len(self.keys))
+        rows = np.flatnonzero(counts)
+        collisions = counts[rows]
+        if limit is not None and len(rows) > limit:
+            best = np.argpartition(-collisions, limit - 1)[:limit]
+            rows, collisions = rows[best], collisions[best]
+        return rows[np.argsort(-collisions, kind='stable')]
@@ -0,0 +1,152 @@
+import argparse
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from utils.http_client import get_session
+
+load_dotenv()
+
+# Graphs of Jena: the stored default graph, and the union of the named graphs
+DEFAULT_GRAPH = "urn:x-arq:DefaultGraph"
+UNION_GRAPH = "urn:x-arq:UnionGraph"
+
+
+def article_graph(url):
+    """
+    Returns the name of the graph holding the triples of an article.
+    Args:
+        url (str): URL of the article.
+    Returns:
+        str: The graph IRI, the article URL with a '#graph' fragment.
+    """
+    return f"{url.split('#', 1)[0]}#graph"
+
+
+def default_graph_deletion(url):
+    """
+    Returns the update deleting an article still stored in the default graph, i.e. not moved by
+    migrate_default_graph yet. Authors, publishers and editors, shared by several articles, are kept.
+    Args:
+        url (str): URL of the article.
+    Returns:
+        str: The SPARQL update, a no-op for articles stored in their own graph.
+    """
+    return f"""
+        PREFIX schema: <http://schema.org/>
+
+        DELETE {{
+          GRAPH <{DEFAULT_GRAPH}> {{
+            <{url}> ?p ?o .
+            ?o ?subP ?subO
+          }}
+        }}
+        WHERE {{
+          GRAPH <{DEFAULT_GRAPH}> {{
+            <{url}> ?p ?o .
+
+            # Prevent deletion of triples where the predicate is author, publisher, or editor
+            FILTER NOT EXISTS {{
+              <{url}> ?p ?o .
+              FILTER (?p IN (schema:author, schema:publisher, schema:editor))
+            }}
+
+            OPTIONAL {{
+              FILTER (isIRI(?o))
+              ?o ?subP ?subO
+              # Prevent deletion of linked triples related to author, publisher, or editor
+              FILTER NOT EXISTS {{
+                ?o ?subP ?subO .
+                FILTER (?subP IN (schema:author, schema:publisher, schema:editor))
+              }}
+            }}
+          }}
+        }};
+
+        DELETE WHERE {{
+          GRAPH <{DEFAULT_GRAPH}> {{ <{url}> ?p ?o }}
+        }}
+        """
+
+
+def _update(http, fuseki_url, operations):
+    response = http.post(f"{fuseki_url}/NEPR-2024/update", data=" ;\n".join(operations),
+                         headers={'Content-Type': 'application/sparql-update'})
+    response.raise_for_status()
+
+
+def _select(http, fuseki_url, query):
+    response = http.post(f"{fuseki_url}/NEPR-2024/query", data=query,
+                         headers={'Content-Type': 'application/sparql-query'})
+    response.raise_for_status()
+    return response.json().get('results', {}).get('bindings', [])
+
+
+def _article_triples(url):
+    return (f"<{url}> ?p ?o . ?o ?subP ?subO",
+            f"GRAPH <{DEFAULT_GRAPH}> {{ <{url}> ?p ?o OPTIONAL {{ ?o ?subP ?subO }} }}")
+
+
+def migrate_default_graph(fuseki_url, http=None, batch_size=100, page_size=10000):
+    """
+    Moves the articles stored in the default graph of the dataset into their own named graphs.
+    Each article graph receives the triples of the article and of the resources it links to,
+    as stored by the ingest. Every article is copied before any triple is deleted, so resources
+    shared by several articles are copied into each of their graphs; running the migration again
+    only moves what is left.
+    Run it before enabling tdb2:unionDefaultGraph (databases/fuseki/NEPR-2024.ttl): once enabled,
+    queries no longer see the stored default graph, so the articles left there disappear from
+    search, recommendations and exports until they are moved.
+    Args:
+        fuseki_url (str): Base URL of the Fuseki server.
+        http: Session used for the requests.
+        batch_size (int): Number of articles moved per update request.
+        page_size (int): Number of articles listed per query.
+    Returns:
+        dict: The number of moved articles, and of the triples left in the default graph.
+    """
+    http = http or get_session("fuseki")
+    articles = []
+    while True:
+        bindings = _select(http, fuseki_url, f"""
+            PREFIX schema: <http://schema.org/>
+            SELECT DISTINCT ?article
+            WHERE {{ GRAPH <{DEFAULT_GRAPH}> {{ ?article schema:headline ?headline }} }}
+            ORDER BY ?article
+            LIMIT {page_size}
+            OFFSET {len(articles)}
+            """)
+        articles.extend(binding['article']['value'] for binding in bindings)
+        if len(bindings) < page_size:
+            break
+    logging.info(f"Moving {len(articles)} articles into named graphs")
+
+    batches = [articles[start:start + batch_size] for start in range(0, len(articles), batch_size)]
+    for batch in batches:
+        copies = []
+        for url in batch:
+            template, pattern = _article_triples(url)
+            copies.append(f"INSERT {{ GRAPH <{article_graph(url)}> {{ {template} }} }} WHERE {{ {pattern} }}")
+        _update(http, fuseki_url, copies)
+    for batch in batches:
+        deletions = []
+        for url in batch:
+            template, pattern = _article_triples(url)
+            deletions.append(f"DELETE {{ {template} }} WHERE {{ {pattern} }}")
+        _update(http, fuseki_url, deletions)
+
+    remaining = _select(http, fuseki_url,
+                        f"SELECT (COUNT(*) AS ?triples) WHERE {{ GRAPH <{DEFAULT_GRAPH}> {{ ?s ?p ?o }} }}")
+    return {"articles": len(articles),
+            "remaining_default_triples": int(remaining[0]['triples']['value']) if remaining else 0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move the articles of the default graph into per-article graphs.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Articles moved per update request")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(migrate_default_graph(os.getenv("FUSEKI_URL"), batch_size=args.batch_size), indent=2))
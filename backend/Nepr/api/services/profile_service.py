@@ -0,0 +1,270 @@
+import logging
+import math
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+from dotenv import load_dotenv
+from scipy.sparse import csr_matrix
+from sqlalchemy.orm import Session
+
+from databases.db_postgresql_conn import ensure_table
+from models.models import UserProfile
+
+load_dotenv()
+
+# Word counts are sketched in logarithmic buckets, four per doubling.
+WORDCOUNT_BUCKETS_PER_DOUBLING = 4
+
+
+def _names(value):
+    if isinstance(value, list):
+        return [item['name'] for item in value if isinstance(item, dict) and item.get('name')]
+    if isinstance(value, dict) and value.get('name'):
+        return [value['name']]
+    return []
+
+
+def _keywords(value):
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return value.split()
+    return []
+
+
+def _published(value):
+    try:
+        date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        logging.error(f"Invalid date format: {value}")
+        return None
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+class ProfileService:
+    """
+    Maintains the stored reading profile of each user: decayed keyword, author and publisher
+    counters, a word-count sketch, the published date range and the centroid of the vectors
+    of the articles read. A view updates the profile in constant time, so recommendations
+    read it instead of replaying the whole history.
+    """
+
+    def __init__(self, half_life_days=None, max_terms=None, centroid_features=None):
+        """
+        Args:
+            half_life_days (float): Days after which the weight of a view is halved.
+            max_terms (int): Number of keywords, authors and publishers kept per profile.
+            centroid_features (int): Number of largest centroid coordinates kept per profile.
+        """
+        self.half_life_days = half_life_days or float(os.getenv("PROFILE_HALF_LIFE_DAYS", 30))
+        self.max_terms = max_terms or int(os.getenv("PROFILE_MAX_TERMS", 200))
+        self.centroid_features = centroid_features or int(os.getenv("PROFILE_CENTROID_FEATURES", 4096))
+
+    def ensure_tables(self, engine):
+        """
+        Creates the user_profiles table if it does not exist yet.
+        Args:
+            engine: Engine of the user database.
+        """
+        ensure_table(engine, UserProfile.__table__)
+
+    def get_profile(self, session: Session, email: str):
+        """
+        Returns the stored profile of a user, None if there is none yet.
+        """
+        try:
+            self.ensure_tables(session.get_bind())
+            return session.get(UserProfile, email)
+        except Exception as e:
+            logging.error(e)
+            return None
+
+    def record_view(self, session: Session, email: str, article, vector, viewed_at=None):
+        """
+        Adds an article read by a user to their profile.
+        Args:
+            session: Session of the user database.
+            email: Email of the user.
+            article (dict): The article, as returned by SPARQLService.get_article_by_url.
+            vector: The 1 x n_features vector of the article.
+            viewed_at (datetime): Time of the view, defaults to now.
+        Returns:
+            True on success, None on error.
+        """
+        try:
+            self.ensure_tables(session.get_bind())
+            profile = session.get(UserProfile, email, with_for_update=True)
+            if profile is None:
+                profile = self.new_profile(email)
+                session.add(profile)
+            self.apply_view(profile, article, vector, viewed_at or datetime.now())
+            session.commit()
+            return True
+        except Exception as e:
+            logging.error(e)
+            session.rollback()
+            return None
+
+    def build_profile(self, session: Session, email: str, views):
+        """
+        Replaces the profile of a user with one built from their past views, e.g. for users
+        whose history predates the profiles.
+        Args:
+            session: Session of the user database.
+            email: Email of the user.
+            views: (article, vector, viewed_at) tuples in chronological order.
+        Returns:
+            The stored profile, None on error.
+        """
+        try:
+            self.ensure_tables(session.get_bind())
+            existing = session.get(UserProfile, email, with_for_update=True)
+            if existing is not None:
+                session.delete(existing)
+                session.flush()
+            profile = self.new_profile(email)
+            for article, vector, viewed_at in views:
+                self.apply_view(profile, article, vector, viewed_at)
+            session.add(profile)
+            session.commit()
+            return profile
+        except Exception as e:
+            logging.error(e)
+            session.rollback()
+            return None
+
+    def load_profile(self, session: Session, email: str, sparql_service, user_service):
+        """
+        Returns the profile of a user, building it from their whole history the first time.
+        Args:
+            session: Session of the user database.
+            email: Email of the user.
+            sparql_service: The SPARQLService the viewed articles and their vectors are read from.
+            user_service: The UserService the history is read from.
+        Returns:
+            The profile, None if the user has no readable history or on error.
+        """
+        profile = self.get_profile(session, email)
+        if profile is not None:
+            return profile
+        entries = user_service.get_user_history_entries(session, email)
+        if not entries:
+            return None
+        articles = {article['url']: article for article in
+                    sparql_service.get_articles_by_urls(list(dict.fromkeys(url for url, _ in entries)))}
+        views = [(articles[url], sparql_service.vector_index.vectors([articles[url]]), date_accessed)
+                 for url, date_accessed in entries if url in articles]
+        if not views:
+            return None
+        return self.build_profile(session, email, views)
+
+    @staticmethod
+    def new_profile(email):
+        return UserProfile(user_email=email, keyword_counts={}, author_counts={}, publisher_counts={},
+                           wordcount_sketch={}, centroid={}, weight=0.0, updated_at=None)
+
+    def apply_view(self, profile, article, vector, viewed_at):
+        """
+        Decays the profile to the time of a view, then adds the view with weight 1.
+        Args:
+            profile (UserProfile): The profile, updated in place.
+            article (dict): The article read.
+            vector: The 1 x n_features vector of the article.
+            viewed_at (datetime): Time of the view.
+        """
+        decay = 1.0
+        if profile.updated_at is not None:
+            elapsed_days = max((viewed_at - profile.updated_at).total_seconds(), 0) / 86400
+            decay = 0.5 ** (elapsed_days / self.half_life_days)
+        profile.updated_at = max(viewed_at, profile.updated_at or viewed_at)
+
+        profile.keyword_counts = self._count(profile.keyword_counts, decay, _keywords(article.get('keywords')))
+        profile.author_counts = self._count(profile.author_counts, decay, _names(article.get('author')))
+        profile.publisher_counts = self._count(profile.publisher_counts, decay, _names(article.get('publisher')))
+
+        buckets = []
+        if article.get('wordCount'):
+            word_count = max(int(article['wordCount']), 1)
+            buckets.append(str(int(math.log2(word_count) * WORDCOUNT_BUCKETS_PER_DOUBLING)))
+        profile.wordcount_sketch = self._count(profile.wordcount_sketch, decay, buckets)
+
+        if article.get('datePublished'):
+            published = _published(article['datePublished'])
+            if published is not None:
+                profile.date_published_min = min(published, profile.date_published_min or published)
+                profile.date_published_max = max(published, profile.date_published_max or published)
+
+        profile.centroid = self._add_vector(profile.centroid, decay, vector)
+        profile.weight = (profile.weight or 0.0) * decay + 1.0
+
+    def _count(self, counts, decay, items):
+        updated = {key: value * decay for key, value in (counts or {}).items() if value * decay >= 0.01}
+        for item in items:
+            updated[item] = updated.get(item, 0.0) + 1.0
+        if len(updated) > self.max_terms:
+            updated = dict(sorted(updated.items(), key=lambda entry: entry[1], reverse=True)[:self.max_terms])
+        return updated
+
+    def _add_vector(self, centroid, decay, vector):
+        indices = np.asarray((centroid or {}).get('indices', []), dtype=np.int64)
+        values = np.asarray((centroid or {}).get('values', []), dtype=np.float64) * decay
+        if vector is not None and vector.nnz:
+            vector = csr_matrix(vector)
+            indices = np.concatenate([indices, vector.indices.astype(np.int64)])
+            values = np.concatenate([values, vector.data.astype(np.float64)])
+        indices, positions = np.unique(indices, return_inverse=True)
+        values = np.bincount(positions, weights=values, minlength=len(indices))
+        if len(indices) > self.centroid_features:
+            keep = np.sort(np.argpartition(-np.abs(values), self.centroid_features - 1)[:self.centroid_features])
+            indices, values = indices[keep], values[keep]
+        return {'indices': indices.tolist(), 'values': values.tolist()}
+
+    @staticmethod
+    def _top(counts, count):
+        return [key for key, _ in sorted(counts.items(), key=lambda entry: entry[1], reverse=True)[:count]]
+
+    @staticmethod
+    def _percentile(sketch, fraction):
+        buckets = sorted((int(bucket), weight) for bucket, weight in sketch.items())
+        total = sum(weight for _, weight in buckets)
+        cumulative = 0.0
+        for bucket, weight in buckets:
+            cumulative += weight
+            if cumulative >= fraction * total:
+                return int(round(2 ** ((bucket + 0.5) / WORDCOUNT_BUCKETS_PER_DOUBLING)))
+        return None
+
+    def preferences(self, profile):
+        """
+        Returns the preferences of a profile, in the shape of SPARQLService._extract_user_preferences.
+        """
+        keywords = self._top(profile.keyword_counts or {}, 10)
+        authors = self._top(profile.author_counts or {}, 1)
+        publishers = self._top(profile.publisher_counts or {}, 1)
+        sketch = profile.wordcount_sketch or {}
+        return {
+            'keywords': ' '.join(keywords) if keywords else [],
+            'wordcount_min': self._percentile(sketch, 0.25) if sketch else None,
+            'wordcount_max': self._percentile(sketch, 0.75) if sketch else None,
+            'author_name': authors[0] if authors else None,
+            'publisher': publishers[0] if publishers else None,
+            'datePublished_min': profile.date_published_min,
+            'datePublished_max': profile.date_published_max
+        }
+
+    def centroid(self, profile, n_features):
+        """
+        Returns the weighted mean of the vectors of the articles of a profile.
+        Args:
+            profile (UserProfile): The profile.
+            n_features (int): Dimension of the article vectors.
+        Returns:
+            csr_matrix: A 1 x n_features vector.
+        """
+        centroid = profile.centroid or {}
+        indices = np.asarray(centroid.get('indices', []), dtype=np.int32)
+        values = np.asarray(centroid.get('values', []), dtype=np.float32) / max(profile.weight or 0.0, 1e-9)
+        return csr_matrix((values, indices, [0, len(indices)]), shape=(1, n_features))
@@ -0,0 +1,235 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from api.services.cooccurrence_service import get_cooccurrence_index
+from api.services.profile_service import ProfileService
+from api.services.user_service import UserService
+from databases.db_postgresql_conn import connect, close, ensure_table
+from models.models import UserHistory, UserProfile, UserRecommendations
+
+load_dotenv()
+
+# Most recent history entries excluded from the recommendations of a user
+RECOMMENDATION_EXCLUDE_RECENT = int(os.getenv("RECOMMENDATION_EXCLUDE_RECENT", 500))
+
+
+class RecommendationService:
+    """
+    Stores the recommendations precomputed by the batch job and serves them while they are fresh.
+    """
+
+    def __init__(self, max_age_minutes=None):
+        """
+        Args:
+            max_age_minutes (float): Age after which precomputed recommendations are recomputed live.
+        """
+        self.max_age = timedelta(minutes=max_age_minutes or float(os.getenv("RECOMMENDATION_MAX_AGE_MINUTES", 360)))
+
+    def get_fresh(self, session: Session, email: str, profile_updated_at=None):
+        """
+        Returns the precomputed recommendations of a user if they are fresh: younger than the
+        maximum age and generated after the last change of the user's profile.
+        """
+        try:
+            ensure_table(session.get_bind(), UserRecommendations.__table__)
+            stored = session.get(UserRecommendations, email)
+        except Exception as e:
+            logging.error(e)
+            return None
+        if stored is None or stored.generated_at < datetime.now() - self.max_age:
+            return None
+        if profile_updated_at is not None and stored.generated_at < profile_updated_at:
+            return None
+        return stored.recommendations
+
+    def save(self, session: Session, email: str, recommendations, generated_at=None):
+        """
+        Stores (or replaces) the precomputed recommendations of a user.
+        Returns:
+            True on success, None on error.
+        """
+        try:
+            ensure_table(session.get_bind(), UserRecommendations.__table__)
+            session.merge(UserRecommendations(user_email=email, recommendations=recommendations,
+                                              generated_at=generated_at or datetime.now()))
+            session.commit()
+            return True
+        except Exception as e:
+            logging.error(e)
+            session.rollback()
+            return None
+
+
+def active_users(session: Session, active_days=None):
+    """
+    Returns the emails of the users with a history, optionally only the ones active in the last days.
+    """
+    query = session.query(UserHistory.user_email).distinct()
+    if active_days:
+        query = query.filter(UserHistory.date_accessed >= datetime.now() - timedelta(days=active_days))
+    return sorted(email for email, in query.all())
+
+
+def recent_histories(session: Session, emails, limit=RECOMMENDATION_EXCLUDE_RECENT):
+    """
+    Returns the most recent history URLs of several users, in one query capped per user.
+    """
+    histories = {email: [] for email in emails}
+    recent = session.query(
+        UserHistory.user_email, UserHistory.article_url,
+        func.row_number().over(partition_by=UserHistory.user_email,
+                               order_by=UserHistory.date_accessed.desc()).label('position')
+    ).filter(UserHistory.user_email.in_(emails)).subquery()
+    rows = session.query(recent.c.user_email, recent.c.article_url).filter(recent.c.position <= limit) \
+        .order_by(recent.c.user_email, recent.c.position).all()
+    for email, url in rows:
+        histories[email].append(url)
+    return histories
+
+
+def recommend_chunk(session: Session, sparql_service, emails, max_recommendations=10,
+                    profile_service=None, recommendation_service=None, user_service=None):
+    """
+    Precomputes and stores the recommendations of a chunk of users. Profiles and histories are
+    read, and candidate articles fetched, in bulk for the whole chunk; users without a stored
+    profile yet get one built from their history.
+    Returns:
+        dict: The seconds spent per user under 'users', the candidate fetch seconds under 'fetch',
+        and the emails of the users 'skipped' for lack of a readable history or 'failed'.
+    """
+    profile_service = profile_service or ProfileService()
+    recommendation_service = recommendation_service or RecommendationService()
+    user_service = user_service or UserService()
+    ensure_table(session.get_bind(), UserProfile.__table__)
+    profiles = {profile.user_email: profile for profile in
+                session.query(UserProfile).filter(UserProfile.user_email.in_(emails)).all()}
+    for email in emails:
+        if email not in profiles:
+            profile = profile_service.load_profile(session, email, sparql_service, user_service)
+            if profile is not None:
+                profiles[email] = profile
+    histories = recent_histories(session, emails)
+    sparql_service.cooccurrence.refresh_if_stale(session, wait=True)
+    user_requests = {
+        email: (histories[email], {
+            'preferences': profile_service.preferences(profiles[email]),
+            'centroid': profile_service.centroid(profiles[email], sparql_service.vector_index.n_features)
+        })
+        for email in emails if email in profiles
+    }
+    report = {'skipped': [email for email in emails if email not in profiles], 'failed': []}
+    generated_at = datetime.now()
+    recommendations = sparql_service.get_recommendations_batch(user_requests, max_recommendations, report)
+    for email, articles in recommendations.items():
+        started = time.perf_counter()
+        if recommendation_service.save(session, email, articles, generated_at) is None:
+            report['failed'].append(email)
+        report['users'][email] += time.perf_counter() - started
+    return report
+
+
+_worker_sparql_service = None
+
+
+def _init_worker():
+    global _worker_sparql_service
+    from api.services.sparql_service import SPARQLService
+    _worker_sparql_service = SPARQLService(None, None)
+
+
+def _run_chunk(emails, max_recommendations):
+    session, engine = connect()
+    try:
+        return recommend_chunk(session, _worker_sparql_service, emails, max_recommendations)
+    except Exception as e:
+        logging.error(f"Error precomputing recommendations: {e}")
+        return {'users': {}, 'fetch': 0.0, 'skipped': [], 'failed': list(emails)}
+    finally:
+        close(session, engine)
+
+
+def precompute_recommendations(emails=None, workers=None, chunk_size=None, max_recommendations=10,
+                               active_days=None):
+    """
+    Precomputes the recommendations of the active users on a pool of processes.
+    Each process handles chunks of users with its own Fuseki and database connections.
+    Args:
+        emails (list): Users to handle, defaults to every user with a history.
+        workers (int): Number of processes.
+        chunk_size (int): Number of users per chunk.
+        max_recommendations (int): Number of recommendations stored per user.
+        active_days (int): Only handle the users with a history entry in the last days.
+    Returns:
+        dict: Throughput and per-user timing report.
+    """
+    workers = workers or int(os.getenv("RECOMMENDATION_JOB_WORKERS", os.cpu_count() or 1))
+    chunk_size = chunk_size or int(os.getenv("RECOMMENDATION_JOB_CHUNK", 50))
+    started = time.perf_counter()
+    session, engine = connect()
+    try:
+        if emails is None:
+            emails = active_users(session, active_days)
+        # Built once here: the worker processes forked below inherit it instead of each rebuilding it
+        get_cooccurrence_index().refresh_if_stale(session, wait=True)
+    finally:
+        close(session, engine)
+    chunks = [emails[start:start + chunk_size] for start in range(0, len(emails), chunk_size)]
+
+    if workers == 1:
+        _init_worker()
+        reports = [_run_chunk(chunk, max_recommendations) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            reports = list(pool.map(_run_chunk, chunks, [max_recommendations] * len(chunks)))
+
+    return summarize(reports, len(emails), time.perf_counter() - started)
+
+
+def summarize(reports, user_count, seconds):
+    """
+    Aggregates the chunk reports of a run.
+    """
+    failed = [email for report in reports for email in report['failed']]
+    user_seconds = {email: spent for report in reports for email, spent in report['users'].items()
+                    if email not in failed}
+    timings = np.array(list(user_seconds.values())) if user_seconds else np.zeros(1)
+    slowest = sorted(user_seconds.items(), key=lambda entry: entry[1], reverse=True)[:5]
+    return {
+        "users": user_count,
+        "recommended": len(user_seconds),
+        "skipped": sum(len(report['skipped']) for report in reports),
+        "failed": len(failed),
+        "seconds": round(seconds, 3),
+        "users_per_second": round(len(user_seconds) / seconds, 2) if seconds else None,
+        "fetch_seconds": round(sum(report.get('fetch', 0.0) for report in reports), 3),
+        "user_seconds": {
+            "p50": round(float(np.percentile(timings, 50)), 4),
+            "p95": round(float(np.percentile(timings, 95)), 4),
+            "max": round(float(timings.max()), 4)
+        },
+        "slowest": [{"user": email, "seconds": round(spent, 4)} for email, spent in slowest]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the recommendations of the active users.")
+    parser.add_argument("--workers", type=int, help="Number of processes")
+    parser.add_argument("--chunk-size", type=int, help="Number of users per chunk")
+    parser.add_argument("--limit", type=int, default=10, help="Recommendations per user")
+    parser.add_argument("--active-days", type=int, help="Only users active in the last days")
+    parser.add_argument("--user", action="append", dest="emails", help="Only this user (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(precompute_recommendations(args.emails, args.workers, args.chunk_size, args.limit,
+                                                args.active_days), indent=2))
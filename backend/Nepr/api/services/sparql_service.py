@@ -1,5 +1,6 @@
 import logging
 import os
+import time
 from collections import Counter
 from datetime import datetime
 
@@ -11,58 +12,140 @@ from datetime import datetime, timedelta
 import logging
 from typing import List, Dict, Any, Tuple
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from models.graph_builder import GraphBuilder
+from api.services.keyword_index import get_keyword_index
+from api.services.vector_index import get_vector_index
+from api.services.cooccurrence_service import get_cooccurrence_index
+from api.services.dataset_version import DatasetVersionCounter
+from api.services.graph_export import EXPORT_FORMATS, CHUNK_SIZE, ndjson_lines
+from api.services.named_graphs import article_graph, default_graph_deletion, UNION_GRAPH
+from api.services.article_hydrator import (ArticleHydrator, PERSON_DISPATCH, ORGANIZATION_DISPATCH,
+                                           IMAGE_DISPATCH, MEDIA_DISPATCH)
+from utils.http_client import get_session
+from utils.pagination import DEFAULT_LIMIT, encode_cursor, decode_cursor
+from utils.ttl_cache import TTLCache, MISSING
 load_dotenv()
 
 
 class SPARQLService:
-    def __init__(self,service,options):
+    def __init__(self, service, options, http=None, keyword_index=None, vector_index=None, cooccurrence=None,
+                 dataset_version=None):
         self.fuseki_url = os.getenv("FUSEKI_URL")
         self.service = service
         self.options = options
-
-    def get_recommendations(self, user_history: List[str], max_recommendations: int = 10) -> List[Dict[str, Any]]:
+        self.http = http or get_session("fuseki")
+        self.hydrator = ArticleHydrator()
+        self.keyword_index = keyword_index or get_keyword_index()
+        self.vector_index = vector_index or get_vector_index()
+        self.cooccurrence = cooccurrence or get_cooccurrence_index()
+        self.cf_weight = float(os.getenv("RECOMMENDATION_CF_WEIGHT", 0.2))
+        self.recommendation_candidates = int(os.getenv("RECOMMENDATION_CANDIDATES", 100))
+        self.recommendation_fetch_batch = int(os.getenv("RECOMMENDATION_FETCH_BATCH", 500))
+        self.keyword_batch = int(os.getenv("KEYWORD_SEARCH_BATCH", 500))
+        self.search_cache = TTLCache(int(os.getenv("SEARCH_CACHE_SIZE", 512)),
+                                     float(os.getenv("SEARCH_CACHE_TTL", 60)))
+        self.dataset_version = dataset_version or DatasetVersionCounter()
+
+    def get_recommendations(self, user_history: List[str], max_recommendations: int = 10,
+                            profile: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
         Generates personalized article recommendations based on user's reading history.
         Supports articles in any language.
 
         Args:
-            user_history: List of article URLs from user's history
+            user_history: List of article URLs from user's history, never recommended
             max_recommendations: Maximum number of recommendations to return
+            profile: Stored profile of the user, with its 'preferences' and vector 'centroid'
+                (see ProfileService); when given, the history articles are not fetched
 
         Returns:
             List of recommended articles with similarity scores
         """
         logging.info(f"Generating recommendations for user history: {user_history}")
 
-        # Get viewed articles details
-        viewed_articles = []
-        for url in user_history:
-            results = self.get_article_by_url(url)
-            if results:
-                viewed_articles.append(results)
+        if profile is None:
+            # Get viewed articles details
+            viewed_articles = self.get_articles_by_urls(user_history)
 
-        if not viewed_articles:
-            return []
+            if not viewed_articles:
+                return []
 
-        # Extract user preferences
-        preferences = self._extract_user_preferences(viewed_articles)
+            # Extract user preferences
+            profile = {
+                'preferences': self._extract_user_preferences(viewed_articles),
+                'centroid': self.vector_index.centroid(viewed_articles)
+            }
 
-        # Get candidate articles using advanced search
-        recommended_articles = self._get_candidate_articles(preferences)
+        return self.get_recommendations_batch({None: (user_history, profile)}, max_recommendations)[None]
 
-        # Rank and filter recommendations
-        final_recommendations = self._rank_articles(
-            viewed_articles,
-            recommended_articles,
-            preferences,
-            user_history,
-            max_recommendations
-        )
+    def get_recommendations_batch(
+            self,
+            user_requests: Dict[Any, Tuple[List[str], Dict[str, Any]]],
+            max_recommendations: int = 10,
+            report: Dict[str, Any] = None
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Generates recommendations for several users, fetching the candidate articles of all
+        of them in bulk.
+
+        Args:
+            user_requests: Maps each user to their (history URLs never recommended, profile) pair,
+                the profile holding 'preferences' and a vector 'centroid'
+            max_recommendations: Maximum number of recommendations per user
+            report: Optional dict filled with the seconds spent fetching the candidates under
+                'fetch' and the seconds spent on each user under 'users'
 
-        return final_recommendations
+        Returns:
+            The recommended articles of each user
+        """
+        if report is None:
+            report = {}
+        user_seconds = report.setdefault('users', {})
+
+        # Get the articles nearest to each reading history, and the ones read along with it
+        candidates, cf_scores = {}, {}
+        for key, (user_history, profile) in user_requests.items():
+            started = time.perf_counter()
+            nearest = self.vector_index.nearest(
+                profile['centroid'],
+                k=self.recommendation_candidates,
+                exclude=user_history
+            )
+            cf_scores[key] = self.cooccurrence.scores(user_history)
+            read_along = sorted(cf_scores[key], key=cf_scores[key].get, reverse=True)
+            candidates[key] = list(dict.fromkeys(
+                [url for url, _ in nearest] + read_along[:self.recommendation_candidates]
+            ))
+            user_seconds[key] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        urls = list(dict.fromkeys(url for found in candidates.values() for url in found))
+        articles = {}
+        for start in range(0, len(urls), self.recommendation_fetch_batch):
+            for article in self.get_articles_by_urls(urls[start:start + self.recommendation_fetch_batch]):
+                articles[article['url']] = article
+        report['fetch'] = time.perf_counter() - started
+
+        recommendations = {}
+        for key, (user_history, profile) in user_requests.items():
+            started = time.perf_counter()
+            # Fall back to advanced search when the vector index has no candidate
+            recommended_articles = [articles[url] for url in candidates[key] if url in articles]
+            if not recommended_articles:
+                recommended_articles = self._get_candidate_articles(profile['preferences'])
+
+            # Rank and filter recommendations
+            recommendations[key] = self._rank_articles(
+                profile['centroid'],
+                recommended_articles,
+                profile['preferences'],
+                user_history,
+                max_recommendations,
+                cf_scores[key]
+            )
+            user_seconds[key] += time.perf_counter() - started
+
+        return recommendations
 
     def _extract_user_preferences(self, viewed_articles: List[Dict]) -> Dict[str, Any]:
         """
@@ -151,7 +234,7 @@ class SPARQLService:
         No language restriction applied.
         """
         # Try exact matches first
-        articles, match_type = self.advanced_search(
+        articles, match_type, _ = self.advanced_search(
             keywords=preferences['keywords'],
             wordcount_min=preferences['wordcount_min'],
             wordcount_max=preferences['wordcount_max'],
@@ -169,7 +252,7 @@ class SPARQLService:
             relaxed_preferences['author_name'] = None
             relaxed_preferences['publisher'] = None
 
-            articles, match_type = self.advanced_search(
+            articles, match_type, _ = self.advanced_search(
                 keywords=relaxed_preferences['keywords'],
                 wordcount_min=relaxed_preferences['wordcount_min'],
                 wordcount_max=relaxed_preferences['wordcount_max'],
@@ -182,64 +265,27 @@ class SPARQLService:
 
     def _rank_articles(
             self,
-            viewed_articles: List[Dict],
+            centroid,
             candidate_articles: List[Dict],
             preferences: Dict[str, Any],
             user_history: List[str],
-            max_recommendations: int
+            max_recommendations: int,
+            cf_scores: Dict[str, float] = None
     ) -> List[Dict]:
         """
         Ranks and filters candidate articles.
-        Uses character-level TF-IDF for language-agnostic similarity.
+        Uses the character n-gram vectors of the vector index for language-agnostic similarity:
+        the content score is the similarity to the centroid of the viewed articles.
+        The co-occurrence scores of the articles read along with the history are blended in
+        with weight RECOMMENDATION_CF_WEIGHT.
         """
+        cf_scores = cf_scores or {}
         if not candidate_articles:
             return []
 
-        # Calculate content similarity using character-level n-grams
-        vectorizer = TfidfVectorizer(
-            analyzer='char',
-            ngram_range=(3, 5),  # Use character trigrams to pentagrams
-            stop_words=None  # Don't use stop words to keep language-agnostic
-        )
-
-        # Prepare text content
-        viewed_texts = []
-        candidate_texts = []
-
-        for article in viewed_articles:
-            text = []
-            if article.get('headline'):
-                text.append(article['headline'])
-            if article.get('abstract'):
-                text.append(article['abstract'])
-            if article.get('keywords'):
-                if isinstance(article['keywords'], list):
-                    text.extend(article['keywords'])
-                elif isinstance(article['keywords'], str):
-                    text.extend(article['keywords'].split())
-            viewed_texts.append(' '.join(text))
-
-        for article in candidate_articles:
-            text = []
-            if article.get('headline'):
-                text.append(article['headline'])
-            if article.get('abstract'):
-                text.append(article['abstract'])
-            if article.get('keywords'):
-                if isinstance(article['keywords'], list):
-                    text.extend(article['keywords'])
-                elif isinstance(article['keywords'], str):
-                    text.extend(article['keywords'].split())
-            candidate_texts.append(' '.join(text))
-
         try:
-            # Calculate TF-IDF and similarity
-            tfidf_matrix = vectorizer.fit_transform(viewed_texts + candidate_texts)
-            similarity_matrix = cosine_similarity(tfidf_matrix)
-
-            # Calculate average similarity to viewed articles
-            num_viewed = len(viewed_texts)
-            similarity_scores = similarity_matrix[num_viewed:, :num_viewed].mean(axis=1)
+            # Average cosine similarity of each candidate to the viewed articles
+            similarity_scores = self.vector_index.centroid_similarity(centroid, candidate_articles)
 
             # Combine with metadata similarity
             scored_articles = []
@@ -251,10 +297,14 @@ class SPARQLService:
                     # Add metadata matching score
                     metadata_score = self._calculate_metadata_similarity(article, preferences)
 
-                    # Combine scores (70% content, 30% metadata)
+                    # Combine scores (70% content, 30% metadata), then blend in co-occurrence
+                    article_copy['cf_score'] = cf_scores.get(article.get('url'), 0.0)
                     article_copy['final_score'] = (
-                            0.7 * article_copy['similarity_score'] +
-                            0.3 * metadata_score
+                            (1 - self.cf_weight) * (
+                                0.7 * article_copy['similarity_score'] +
+                                0.3 * metadata_score
+                            ) +
+                            self.cf_weight * article_copy['cf_score']
                     )
 
                     scored_articles.append(article_copy)
@@ -322,6 +372,7 @@ class SPARQLService:
                        'keywords', 'thumbnailUrl', 'thumbnail']
 
         if graph_builder.json_ld_data is not None:
+            graph_builder.prefetch_entities(graph_builder.json_ld_data)
             graph_builder.insert_json_ld_to_graph(url, graph_builder.json_ld_data, key_article)
         if graph_builder.rdfa_data is not None:
             graph_builder.insert_rdfa_to_graph(url, graph_builder.rdfa_data)
@@ -334,21 +385,22 @@ class SPARQLService:
         graph_json = rdf_graph.serialize(format="json-ld")
         return graph_turtle, graph_json
 
-    def insert_graph(self, graph_data):
+    def insert_graph(self, graph_data, url):
         """
-        Inserts an RDF graph into the Fuseki dataset.
+        Inserts an RDF graph into the Fuseki dataset, replacing the named graph of its article.
+        The stored default graph is never written: queries read the union of the named graphs.
         Args:
             graph_data: RDF graph data in Turtle format.
+            url: URL of the article described by the graph.
         Returns:
             Response from the Fuseki server.
         """
         logging.info("Inserting RDF graph into Fuseki dataset")
-        sparql_endpoint = f"{self.fuseki_url}/NEPR-2024/data"
-        headers = {'Content-Type': 'text/turtle'}
 
         try:
-            response = requests.post(sparql_endpoint, data=graph_data, headers=headers)
-            if response.status_code == 200:
+            response = self._put_article_graph(url, graph_data)
+            if response.status_code in (200, 201, 204):
+                self._bump_dataset_version()
                 print("RDF Graph uploaded successfully!")
             else:
                 print(f"Failed to upload RDF Graph. Status code: {response.status_code}")
@@ -356,23 +408,57 @@ class SPARQLService:
         except requests.exceptions.RequestException as e:
             print(f"Error connecting to SPARQL endpoint: {e}")
 
-    def create_and_insert_graph(self, url):
+    def _put_article_graph(self, url, turtle_data, timeout=None):
+        """
+        Replaces the named graph of an article with the given triples, in one Graph Store
+        Protocol PUT: re-ingesting an article swaps its triples atomically instead of appending.
+        Without a timeout the session's default one applies.
+        Returns:
+            Response from the Fuseki server.
+        """
+        options = {} if timeout is None else {'timeout': timeout}
+        return self.http.put(
+            f"{self.fuseki_url}/NEPR-2024/data",
+            params={'graph': article_graph(url)},
+            data=turtle_data,
+            headers={'Content-Type': 'text/turtle'},
+            **options
+        )
+
+    def create_and_insert_graph(self, url, report=None):
         """
         Builds an RDF graph for the given URL using GraphBuilder and inserts it into the Fuseki dataset.
         Args:
             url: URL of the article to create the graph for.
+            report: Optional dict filled with details about the ingest: the JSON-LD extraction
+                tier ('static' or 'rendered') and the seconds spent in each stage under 'timings'.
         Returns:
             Success flag, message, and RDF graph data in JSON-LD format.
         """
         logging.info(f"Creating and inserting RDF graph for URL: {url}")
+        if report is None:
+            report = {}
+        timings = report.setdefault('timings', {})
+        stage_started = time.perf_counter()
+
+        def end_stage(name):
+            nonlocal stage_started
+            now = time.perf_counter()
+            timings[name] = round(now - stage_started, 3)
+            stage_started = now
+
         try:
             graph_builder = GraphBuilder(url, self.service, self.options)
+            report['json_ld_tier'] = graph_builder.json_ld_tier
+            end_stage('scrape')
             key_article = ['articleBody', 'articleSection', 'wordCount', 'abstract', 'audio', 'author', 'editor',
                            'publisher', 'image','@type',
                                         'dateCreated', 'datePublished', 'dateModified', 'headline', 'inLanguage',
                            'keywords', 'thumbnailUrl', 'thumbnail']
 
             if graph_builder.json_ld_data is not None:
+                graph_builder.prefetch_entities(graph_builder.json_ld_data)
+                end_stage('enrich')
                 graph_builder.insert_json_ld_to_graph(url, graph_builder.json_ld_data, key_article)
             logging.info("Rdfa data", graph_builder.rdfa_data)
             if graph_builder.rdfa_data:
@@ -384,47 +470,81 @@ class SPARQLService:
             graph_builder.add_inLanguage_to_graph(url)
 
             turtle_data = graph_builder.graph.serialize(format="turtle")
+            end_stage('build')
             if turtle_data is None:
                 return False, "Graph creation failed", None
             if turtle_data == "\n":
                 return False, "Graph creation failed", None
-            response = requests.post(
-                f"{self.fuseki_url}/NEPR-2024/data",
-                data=turtle_data,
-                headers={'Content-Type': 'text/turtle'},
-                timeout=10
-            )
+            response = self._put_article_graph(url, turtle_data, timeout=10)
+            end_stage('upload')
 
-            if response.status_code != 200:
+            if response.status_code not in (200, 201, 204):
                 return False, f"Upload failed: {response.text}", None
+            self._bump_dataset_version()
             results = self.get_article_by_url(url)
+            end_stage('fetch')
             if results:
+                self.keyword_index.add(url, results.get('keywords', []), results.get('datePublished'))
+                self.vector_index.add(url, results)
                 return True, "Graph created successfully", results
             return False, "Graph created successfully, but article not found", None
         except Exception as e:
             return False, f"Error: {str(e)}", None
 
-    def search_articles_by_keywords(self, keywords):
+    def _bump_dataset_version(self):
+        """Invalidates the cached search results, of every process, after a write to the dataset."""
+        self.dataset_version.bump()
+
+    def _cached_search(self, name, params, compute):
+        """
+        Returns a search result from the cache, computing and storing it on a miss.
+        Entries are keyed on the dataset version, so results cached before a write are not served after it
+        (see DatasetVersionCounter for writes through other processes).
+        Args:
+            name: Name of the search.
+            params: Normalized, hashable search parameters.
+            compute: Callable running the search.
+        Returns:
+            The search result.
+        """
+        key = (self.dataset_version.current(), name, params)
+        result = self.search_cache.get(key)
+        if result is not MISSING:
+            return result
+        result = compute()
+        articles = result[0] if isinstance(result, tuple) else result
+        # Empty results are not cached: Fuseki errors are reported as empty results too.
+        if articles:
+            self.search_cache.set(key, result)
+        return result
+
+    def search_cache_stats(self):
+        """
+        Returns the search cache counters.
+        Returns:
+            dict: Cache size, hits, misses, evictions and the current dataset version.
+        """
+        return {**self.search_cache.stats(), **self.dataset_version.stats()}
+
+    def search_articles_by_keywords(self, keywords, limit=DEFAULT_LIMIT, cursor=None):
         """
-        Searches for articles based on keywords.
+        Searches for articles based on keywords, ranking the articles matching every keyword first.
         Args:
             keywords: Keywords to search for.
+            limit: Maximum number of articles returned.
+            cursor: Cursor of the next page, as returned by a previous search.
         Returns:
-            List of articles matching the keywords.
+            List of articles labelled with their 'matchType', the overall match type and the cursor of the next page.
         """
         logging.info(f"Searching for articles with keywords: {keywords}")
-        keywords_list = keywords.split()
-
-        exact_articles = self.search_exact_match(keywords_list)
-        if exact_articles:
-            return exact_articles, "Exact matches"
-
-        partial_articles = self.search_partial_match(keywords_list)
-        return partial_articles, "Partial matches"
+        position = decode_cursor(cursor)
+        normalized = " ".join(keywords.split()).casefold()
+        return self._cached_search("keywords", (normalized, limit, cursor), lambda: self._page(
+            self.search_ranked_match(keywords.split(), limit, position), limit, ranked=True))
 
-    def advanced_search(self, keywords=None, wordcount=None, inLanguage=None, author_name=None, author_nationality=None, publisher=None, datePublished=None, wordcount_min=None, wordcount_max=None, datePublished_min=None, datePublished_max=None):
+    def advanced_search(self, keywords=None, wordcount=None, inLanguage=None, author_name=None, author_nationality=None, publisher=None, datePublished=None, wordcount_min=None, wordcount_max=None, datePublished_min=None, datePublished_max=None, limit=DEFAULT_LIMIT, cursor=None):
         """
-        Searches for articles based on advanced search criteria.
+        Searches for articles based on advanced search criteria, ranking the articles matching every criterion first.
         Args:
             keywords: Keywords to search for.
             wordcount: Number of words in the article.
@@ -433,258 +553,291 @@ class SPARQLService:
             author_nationality: Nationality of the author.
             publisher: Name of the publisher.
             datePublished: Date the article was published.
+            limit: Maximum number of articles returned.
+            cursor: Cursor of the next page, as returned by a previous search.
         Returns:
-            List of articles matching the search criteria.
+            List of articles labelled with their 'matchType', the overall match type and the cursor of the next page.
         """
         logging.info(f"Advanced search with keywords: {keywords}, wordcount: {wordcount}, inLanguage: {inLanguage}, author_name: {author_name}, author_nationality: {author_nationality}, publisher: {publisher}, datePublished: {datePublished}")
-
-        exact_matches = self.search_advanced_exact_match(keywords, wordcount, inLanguage, author_name,
-                                                         author_nationality, publisher, datePublished, wordcount_min,
-                                                         wordcount_max, datePublished_min, datePublished_max)
-        if exact_matches:
-            return exact_matches, "Exact matches"
-
-        partial_matches = self.search_advanced_partial_match(keywords, wordcount, inLanguage, author_name,
-                                                             author_nationality, publisher, datePublished,
-                                                             wordcount_min, wordcount_max, datePublished_min,
-                                                             datePublished_max)
-        return partial_matches, "Partial matches"
-
-    def get_all_articles(self):
+        position = decode_cursor(cursor)
+        params = (" ".join(keywords.split()).casefold() if keywords else None, wordcount, inLanguage, author_name,
+                  author_nationality, publisher, str(datePublished) if datePublished else None, wordcount_min,
+                  wordcount_max, str(datePublished_min) if datePublished_min else None,
+                  str(datePublished_max) if datePublished_max else None, limit, cursor)
+        return self._cached_search("advanced", params, lambda: self._page(self.search_advanced_ranked_match(
+            keywords, wordcount, inLanguage, author_name, author_nationality, publisher, datePublished,
+            wordcount_min, wordcount_max, datePublished_min, datePublished_max, limit, position), limit, ranked=True))
+
+    def get_all_articles(self, limit=DEFAULT_LIMIT, cursor=None):
+        """
+        Lists the articles, newest first.
+        Args:
+            limit: Maximum number of articles returned.
+            cursor: Cursor of the next page, as returned by a previous call.
+        Returns:
+            List of articles and the cursor of the next page.
+        """
         logging.info("Retrieving all articles from the Fuseki dataset")
-        results = self.search_all_articles()
-        return results
+        position = decode_cursor(cursor)
+        articles, _, next_cursor = self._cached_search(
+            "all", (limit, cursor), lambda: self._page(self.search_all_articles(limit, position), limit))
+        return articles, next_cursor
 
-    def search_exact_match(self, keywords_list):
+    @staticmethod
+    def _page(articles, limit, ranked=False):
         """
-        Searches for articles that match all keywords with additional metadata.
+        Cuts a page out of the limit + 1 rows of a summary query.
         Args:
-            keywords_list: List of keywords to search for.
+            articles: The rows returned by the query, in sort order.
+            limit: Page size.
+            ranked: True for ranked searches, whose rows carry 'matches' and 'matchType'.
         Returns:
-            List of articles with detailed metadata matching all keywords.
+            The articles of the page, the overall match type (None when not ranked) and the cursor of the next page.
         """
-        logging.info(f"Searching for articles with exact match keywords: {keywords_list}")
-        exact_match_query = f"""
-            PREFIX schema: <http://schema.org/>
-            SELECT DISTINCT ?article ?headline ?abstract ?author ?publisher ?datePublished ?thumbnailUrl
-            WHERE {{
-                ?article schema:headline ?headline .
-                OPTIONAL {{ ?article schema:abstract ?abstract }}
-                OPTIONAL {{ 
-                    ?article schema:author ?authorObj .
-                    ?authorObj schema:name ?author 
-                }}
-                OPTIONAL {{ 
-                    ?article schema:publisher ?publisherObj .
-                    ?publisherObj schema:name ?publisher 
-                }}
-                OPTIONAL {{ ?article schema:datePublished ?datePublished }}
-                OPTIONAL {{ ?article schema:thumbnailUrl ?thumbnailUrl }}
-                FILTER(
-                    {" && ".join([
-            f'EXISTS {{ ?article schema:keywords ?keyword{index} . '
-            f'FILTER(CONTAINS(LCASE(STR(?keyword{index})), "{keyword.lower()}")) }}'
-            for index, keyword in enumerate(keywords_list)
-        ])}
-                )
-            }}
-            LIMIT 10
-        """
-        logging.info(exact_match_query)
-
-        # Execute the query and process results
-        raw_results = self.execute_search_sparql_query(exact_match_query)
-
-        # Transform raw results into a more structured format
-        processed_results = []
-        print(raw_results)
-        for result in raw_results:
-            processed_result = {
-                'url': result.get('url', ''),
-                'headline': result.get('headline', ''),
-                'abstract': result.get('abstract', ''),
-                'author': result.get('author', ''),
-                'datePublished': result.get('datePublished', ''),
-                'thumbnailUrl': result.get('thumbnailUrl', ''),
-                'keywords': keywords_list  # Include the original search keywords
-            }
-            processed_results.append(processed_result)
+        page = articles[:limit]
+        label = None
+        if ranked:
+            match_types = {article['matchType'] for article in page}
+            label = {frozenset({'Exact'}): "Exact matches",
+                     frozenset({'Partial'}): "Partial matches"}.get(frozenset(match_types), "Mixed matches")
+        if len(articles) <= limit:
+            return page, label, None
+        position = {'d': page[-1].get('datePublished') or "", 'u': page[-1].get('url')}
+        if ranked:
+            position['c'] = page[-1]['matches']
+        return page, label, encode_cursor(position)
 
-        return processed_results
+    @staticmethod
+    def _literal(value):
+        return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
 
-    def search_advanced_exact_match(self, keywords=None, wordcount=None, inLanguage=None, author_name=None,
-                                    author_nationality=None, publisher=None, datePublished=None, wordcount_min=None,
-                                    wordcount_max=None, datePublished_min=None, datePublished_max=None):
+    def _summary_query(self, restriction, limit, position, ranked=False):
         """
-        Searches for articles that match all keywords with additional metadata.
+        Builds the query listing one summary row per article, newest first then by URL.
+        Ranked queries sort by their number of matched criteria first.
         Args:
-            keywords: Keywords to search for.
-            wordcount: Number of words in the article.
-            inLanguage: Language of the article.
-            author_name: Name of the author.
-            author_nationality: Nationality of the author.
-            publisher: Name of the publisher.
-            datePublished: Date the article was published.
+            restriction: Graph patterns and filters restricting ?article; ranked ones bind ?matchCount.
+            limit: Page size; one extra row is fetched to know whether a next page exists.
+            position: Keyset position of the last row of the previous page, or None.
+            ranked: True if the restriction binds ?matchCount.
         Returns:
-            List of articles with detailed metadata matching all search criteria.
+            The SPARQL query.
         """
-        logging.info(
-            f"Advanced search with keywords: {keywords}, wordcount: {wordcount}, inLanguage: {inLanguage}, author_name: {author_name}, author_nationality: {author_nationality}, publisher: {publisher}, datePublished: {datePublished}")
-        filters = []
-        keywords_list = []
-        if keywords:
-            keywords_list = keywords.split()
-            filters = [
-                f'EXISTS {{ ?article schema:keywords ?keyword{index} . FILTER(CONTAINS(LCASE(STR(?keyword{index})), "{keyword.lower()}")) }}'
-                for index, keyword in enumerate(keywords_list)
-            ]
-
-        if wordcount:
-            filters.append(
-                f'EXISTS {{ ?article <http://schema.org/wordCount> "{wordcount}"^^<http://www.w3.org/2001/XMLSchema#integer> }}')
-
-        if inLanguage:
-            filters.append(f'EXISTS {{ ?article schema:inLanguage "{inLanguage}" }}')
-
-        if author_name:
-            filters.append(f'EXISTS {{ ?authorObj schema:name "{author_name}" }}')
-
-        if author_nationality:
-            filters.append(f'EXISTS {{ ?authorObj schema:nationality "{author_nationality}" }}')
-
-        if publisher:
-            filters.append(f'EXISTS {{ ?publisherObj schema:name "{publisher}" }}')
-
-        if datePublished:
-            if isinstance(datePublished, str):
-                datePublished = datetime.fromisoformat(datePublished)
-            datePublished = datePublished.isoformat(timespec='seconds')+ "+00:00"
-            filters.append(
-                f'EXISTS {{ ?article schema:datePublished "{datePublished}"^^<http://www.w3.org/2001/XMLSchema#dateTime> }}')
-
-        if wordcount_min and wordcount_max:
-            filters.append(
-                f'EXISTS {{ ?article schema:wordCount ?wordCount . FILTER(?wordCount >= {wordcount_min} && ?wordCount <= {wordcount_max}) }}')
-
-        if datePublished_min and datePublished_max:
-            if isinstance(datePublished_min, str):
-                datePublished_min = datetime.fromisoformat(datePublished_min)
-            if isinstance(datePublished_max, str):
-                datePublished_max = datetime.fromisoformat(datePublished_max)
-            datePublished_min = datePublished_min.isoformat(timespec='seconds')+ "+00:00"
-            datePublished_max = datePublished_max.isoformat(timespec='seconds') + "+00:00"
-            filters.append(
-                f'EXISTS {{ ?article schema:datePublished ?datePublished . FILTER(?datePublished >= "{datePublished_min}"^^<http://www.w3.org/2001/XMLSchema#dateTime> && ?datePublished <= "{datePublished_max}"^^<http://www.w3.org/2001/XMLSchema#dateTime>) }}')
-
-        exact_match_query = f"""
+        sort_date = 'COALESCE(MAX(STR(?published)), "")'
+        having = ""
+        if position:
+            date = self._literal(position.get('d', ""))
+            url = self._literal(position.get('u', ""))
+            keyset = f"{sort_date} < {date} || ({sort_date} = {date} && STR(?article) > {url})"
+            if ranked:
+                count = int(position.get('c', 0))
+                keyset = f"MAX(?matchCount) < {count} || (MAX(?matchCount) = {count} && ({keyset}))"
+            having = f"HAVING ({keyset})"
+        return f"""
             PREFIX schema: <http://schema.org/>
-            SELECT DISTINCT ?article ?headline ?abstract ?author ?publisher ?datePublished ?thumbnailUrl
+            SELECT ?article (SAMPLE(?title) AS ?headline) (SAMPLE(?summary) AS ?abstract)
+                   (GROUP_CONCAT(DISTINCT ?authorName; separator=", ") AS ?author)
+                   (GROUP_CONCAT(DISTINCT ?publisherName; separator=", ") AS ?publisher)
+                   (MAX(STR(?published)) AS ?datePublished) (SAMPLE(?thumbnail) AS ?thumbnailUrl)
+                   ({sort_date} AS ?sortDate){" (MAX(?matchCount) AS ?matches)" if ranked else ""}
             WHERE {{
-                ?article schema:headline ?headline .
-                OPTIONAL {{ ?article schema:abstract ?abstract }}
+                ?article schema:headline ?title .
+                OPTIONAL {{ ?article schema:abstract ?summary }}
                 OPTIONAL {{
                     ?article schema:author ?authorObj .
-                    ?authorObj schema:name ?author
+                    ?authorObj schema:name ?authorName
                 }}
                 OPTIONAL {{
                     ?article schema:publisher ?publisherObj .
-                    ?publisherObj schema:name ?publisher
+                    ?publisherObj schema:name ?publisherName
                 }}
-                OPTIONAL {{ ?article schema:datePublished ?datePublished }}
-                OPTIONAL {{ ?article schema:thumbnailUrl ?thumbnailUrl }}
-                FILTER(
-                    {" && ".join(filters)}
-                )
+                OPTIONAL {{ ?article schema:datePublished ?published }}
+                OPTIONAL {{ ?article schema:thumbnailUrl ?thumbnail }}
+                {restriction}
             }}
-            LIMIT 10
+            GROUP BY ?article
+            {having}
+            ORDER BY {"DESC(?matches) " if ranked else ""}DESC(?sortDate) STR(?article)
+            LIMIT {limit + 1}
         """
-        logging.info(exact_match_query)
 
-        # Execute the query and process results
-        raw_results = self.execute_search_sparql_query(exact_match_query)
-
-        # Transform raw results into a more structured format
+    @staticmethod
+    def _summaries(raw_results, keywords_list, criteria_count):
+        """
+        Shapes ranked summary rows for the search responses.
+        Args:
+            raw_results: Rows of a ranked summary query.
+            keywords_list: The searched keywords, echoed in every row.
+            criteria_count: Number of keywords and criteria an article must match to be an exact match.
+        Returns:
+            List of articles labelled 'Exact' or 'Partial'.
+        """
         processed_results = []
         for result in raw_results:
-            processed_result = {
+            matches = result.get('matches', 0)
+            processed_results.append({
                 'url': result.get('url', ''),
                 'headline': result.get('headline', ''),
                 'abstract': result.get('abstract', ''),
                 'author': result.get('author', ''),
                 'datePublished': result.get('datePublished', ''),
                 'thumbnailUrl': result.get('thumbnailUrl', ''),
-                'keywords': keywords_list  # Include the original search keywords
-            }
-            processed_results.append(processed_result)
-
+                'keywords': keywords_list,  # Include the original search keywords
+                'matches': matches,
+                'matchType': 'Exact' if matches >= criteria_count else 'Partial'
+            })
         return processed_results
 
+    @staticmethod
+    def _keyword_exists_filters(keywords_list):
+        return [
+            f'EXISTS {{ ?article schema:keywords ?keyword{index} . '
+            f'FILTER(CONTAINS(LCASE(STR(?keyword{index})), "{keyword.lower()}")) }}'
+            for index, keyword in enumerate(keywords_list)
+        ]
 
-    def search_partial_match(self, keywords_list):
+    def _keyword_score(self, terms, candidates=None):
         """
-        Searches for articles that match at least one keyword.
+        Builds the graph pattern binding ?keywordScore, the number of search terms an article matches.
+        The counts come from the keyword index once it is built, from CONTAINS filters before that.
         Args:
-            keywords_list: List of keywords to search for.
+            terms: The distinct search terms.
+            candidates: (URL, count, date) rows of the keyword index to restrict ?article to, once
+                the index is built.
         Returns:
-            List of articles matching at least one keyword.
+            The graph pattern.
         """
-        logging.info(f"Searching for articles with partial match keywords: {keywords_list}")
-        partial_match_query = f"""
-            PREFIX schema: <http://schema.org/>
-            SELECT DISTINCT ?article ?headline ?abstract ?author ?publisher ?datePublished ?thumbnailUrl
-            WHERE {{
-                ?article schema:headline ?headline .
-                OPTIONAL {{ ?article schema:abstract ?abstract }}
-                OPTIONAL {{ 
-                    ?article schema:author ?authorObj .
-                    ?authorObj schema:name ?author 
-                }}
-                OPTIONAL {{ 
-                    ?article schema:publisher ?publisherObj .
-                    ?publisherObj schema:name ?publisher 
-                }}
-                OPTIONAL {{ ?article schema:datePublished ?datePublished }}
-                OPTIONAL {{ ?article schema:thumbnailUrl ?thumbnailUrl }}
-                FILTER(
-                    {" || ".join([
-            f'EXISTS {{ ?article schema:keywords ?keyword{index} . '
-            f'FILTER(CONTAINS(LCASE(STR(?keyword{index})), "{keyword.lower()}")) }}'
-            for index, keyword in enumerate(keywords_list)
-        ])}
-                )
-            }}
-            LIMIT 10
+        if not self.keyword_index.is_built():
+            scores = " + ".join(f"IF({exists}, 1, 0)" for exists in self._keyword_exists_filters(terms))
+            return f"BIND(({scores}) AS ?keywordScore)"
+        values = " ".join(f"(<{url}> {count})" for url, count, _ in candidates)
+        return f"VALUES (?article ?keywordScore) {{ {values} }}"
+
+    def _keyword_page(self, terms, limit, position, run):
+        """
+        Runs a keyword-only ranked search over the keyword index, which orders the matching articles
+        like the summary query and resumes after the keyset position itself. The candidates are
+        fetched batch by batch until the page is full, since candidates without a headline are not
+        listed by the summary query.
+        Args:
+            terms: The distinct search terms.
+            limit: Page size.
+            position: Keyset position of the previous page, or None for the first page.
+            run: Runs the summary query restricted by a keyword score pattern and returns its rows.
+        Returns:
+            Up to limit + 1 rows, in search result order.
+        """
+        if not self.keyword_index.is_built():
+            return run(self._keyword_score(terms))
+        rows = []
+        after = position
+        while len(rows) <= limit:
+            wanted = limit + 1 - len(rows)
+            candidates = self.keyword_index.search_ranked(terms, limit=wanted, position=after)
+            if not candidates:
+                break
+            rows.extend(run(self._keyword_score(terms, candidates)))
+            if len(candidates) < wanted:
+                break
+            url, count, date = candidates[-1]
+            after = {'c': count, 'd': date, 'u': url}
+        return rows[:limit + 1]
+
+    def _advanced_page(self, terms, criteria, limit, position):
         """
-        return self.execute_search_sparql_query(partial_match_query)
+        Runs an advanced ranked search with keywords, scoring each article by its matched terms
+        plus its matched criteria. Articles matching a term are scored batch by batch from the
+        keyword index, the others by a query on the criteria alone that skips the term matches;
+        no query lists more than keyword_batch candidates, and the batches stop once no later
+        one can reach the page.
+        Args:
+            terms: The distinct search terms.
+            criteria: Filter expressions of the other criteria.
+            limit: Page size.
+            position: Keyset position of the previous page, or None for the first page.
+        Returns:
+            Up to limit + 1 rows, in search result order.
+        """
+        scores = [f"IF({criterion}, 1, 0)" for criterion in criteria]
+
+        def run(patterns, row_scores, after=position):
+            query = self._summary_query(self._ranking(patterns, row_scores), limit, after, ranked=True)
+            logging.info(query)
+            return self.execute_search_sparql_query(query)
+
+        if not self.keyword_index.is_built():
+            return run([self._keyword_score(terms)], ["?keywordScore"] + scores)
+
+        def beating(bound):
+            return sum(1 for row in rows if row.get('matches', 0) > bound)
+
+        rows = []
+        after = None
+        while True:
+            candidates = self.keyword_index.search_ranked(terms, limit=self.keyword_batch, position=after)
+            if not candidates:
+                break
+            rows.extend(run([self._keyword_score(terms, candidates)], ["?keywordScore"] + scores))
+            url, count, date = candidates[-1]
+            # The later candidates match at most `count` terms
+            if len(candidates) < self.keyword_batch or beating(count + len(criteria)) > limit:
+                break
+            after = {'c': count, 'd': date, 'u': url}
+
+        # Articles matching no term rank on the criteria alone
+        after = position
+        unmatched = 0
+        while beating(len(criteria)) <= limit and unmatched <= limit:
+            page = run([], scores, after)
+            matched = set(self.keyword_index.search(terms, match_all=False, among=[row['url'] for row in page]))
+            for row in page:
+                if row['url'] not in matched:
+                    rows.append(row)
+                    unmatched += 1
+            if len(page) <= limit:
+                break
+            last = page[-1]
+            after = {'c': last.get('matches', 0), 'd': last.get('datePublished', ""), 'u': last['url']}
+
+        rows.sort(key=lambda row: row['url'])
+        rows.sort(key=lambda row: row.get('datePublished', ""), reverse=True)
+        rows.sort(key=lambda row: row.get('matches', 0), reverse=True)
+        return rows[:limit + 1]
+
+    @staticmethod
+    def _ranking(patterns, scores):
+        return "\n                ".join(patterns + [f"BIND(({' + '.join(scores)}) AS ?matchCount)",
+                                                   "FILTER(?matchCount > 0)"])
 
-    def search_advanced_partial_match(self, keywords, wordcount=None, inLanguage=None, author_name=None,
-                                      author_nationality=None, publisher=None, datePublished=None,
-                                      wordcount_min=None, wordcount_max=None, datePublished_min=None,
-                                      datePublished_max=None):
+    def search_ranked_match(self, keywords_list, limit=DEFAULT_LIMIT, position=None):
         """
-        Searches for articles that match at least one keyword with additional metadata.
+        Searches for articles matching at least one keyword, the ones matching most keywords first.
         Args:
-            keywords: Keywords to search for.
-            wordcount: Number of words in the article.
-            inLanguage: Language of the article.
-            author_name: Name of the author.
-            author_nationality: Nationality of the author.
-            publisher: Name of the publisher.
-            datePublished: Date the article was published.
+            keywords_list: List of keywords to search for.
+            limit: Page size.
+            position: Keyset position of the previous page, or None for the first page.
         Returns:
-            List of articles with detailed metadata matching at least one search criteria.
+            Up to limit + 1 articles with detailed metadata, labelled 'Exact' when they match every keyword.
         """
-        logging.info(
-            f"Advanced partial search with keywords: {keywords}, wordcount: {wordcount}, inLanguage: {inLanguage}, author_name: {author_name}, author_nationality: {author_nationality}, publisher: {publisher}, datePublished: {datePublished}")
-        keywords_list = []
-        filters = []
-        if keywords:
-            keywords_list = keywords.split()
-            filters = [
-                f'EXISTS {{ ?article schema:keywords ?keyword{index} . FILTER(CONTAINS(LCASE(STR(?keyword{index})), "{keyword.lower()}")) }}'
-                for index, keyword in enumerate(keywords_list)
-            ]
+        logging.info(f"Searching for articles with keywords: {keywords_list}")
+        terms = list(dict.fromkeys(keyword.lower() for keyword in keywords_list))
+        if not terms:
+            return []
+
+        def run(keyword_score):
+            query = self._summary_query(self._ranking([keyword_score], ["?keywordScore"]), limit, position,
+                                        ranked=True)
+            logging.info(query)
+            return self.execute_search_sparql_query(query)
+
+        return self._summaries(self._keyword_page(terms, limit, position, run), keywords_list, len(terms))
 
+    @staticmethod
+    def _advanced_filters(wordcount=None, inLanguage=None, author_name=None, author_nationality=None,
+                          publisher=None, datePublished=None, wordcount_min=None, wordcount_max=None,
+                          datePublished_min=None, datePublished_max=None):
+        """Builds the filter expressions of the advanced search criteria other than keywords."""
+        filters = []
         if wordcount:
             filters.append(
                 f'EXISTS {{ ?article <http://schema.org/wordCount> "{wordcount}"^^<http://www.w3.org/2001/XMLSchema#integer> }}')
@@ -721,74 +874,61 @@ class SPARQLService:
             datePublished_max = datePublished_max.isoformat(timespec='seconds') + "+00:00"
             filters.append(
                 f'EXISTS {{ ?article schema:datePublished ?datePublished . FILTER(?datePublished >= "{datePublished_min}"^^<http://www.w3.org/2001/XMLSchema#dateTime> && ?datePublished <= "{datePublished_max}"^^<http://www.w3.org/2001/XMLSchema#dateTime>) }}')
+        return filters
 
-        partial_match_query = f"""
-            PREFIX schema: <http://schema.org/>
-            SELECT DISTINCT ?article ?headline ?abstract ?author ?publisher ?datePublished ?thumbnailUrl
-            WHERE {{
-                ?article schema:headline ?headline .
-                OPTIONAL {{ ?article schema:abstract ?abstract }}
-                OPTIONAL {{
-                    ?article schema:author ?authorObj .
-                    ?authorObj schema:name ?author
-                }}
-                OPTIONAL {{
-                    ?article schema:publisher ?publisherObj .
-                    ?publisherObj schema:name ?publisher
-                }}
-                OPTIONAL {{ ?article schema:datePublished ?datePublished }}
-                OPTIONAL {{ ?article schema:thumbnailUrl ?thumbnailUrl }}
-                FILTER(
-                    {" || ".join(filters)}
-                )
-            }}
-            LIMIT 10
+    def search_advanced_ranked_match(self, keywords=None, wordcount=None, inLanguage=None, author_name=None,
+                                     author_nationality=None, publisher=None, datePublished=None,
+                                     wordcount_min=None, wordcount_max=None, datePublished_min=None,
+                                     datePublished_max=None, limit=DEFAULT_LIMIT, position=None):
         """
-        logging.info(partial_match_query)
-
-        # Execute the query and process results
-        raw_results = self.execute_search_sparql_query(partial_match_query)
-
-        # Transform raw results into a more structured format
-        processed_results = []
-        for result in raw_results:
-            processed_result = {
-                'url': result.get('url', ''),
-                'headline': result.get('headline', ''),
-                'abstract': result.get('abstract', ''),
-                'author': result.get('author', ''),
-                'datePublished': result.get('datePublished', ''),
-                'thumbnailUrl': result.get('thumbnailUrl', ''),
-                'keywords': keywords_list  # Include the original search keywords
-            }
-            processed_results.append(processed_result)
-
-        return processed_results
+        Searches for articles matching at least one keyword or criterion, the ones matching most of them first.
+        Args:
+            keywords: Keywords to search for.
+            wordcount: Number of words in the article.
+            inLanguage: Language of the article.
+            author_name: Name of the author.
+            author_nationality: Nationality of the author.
+            publisher: Name of the publisher.
+            datePublished: Date the article was published.
+            limit: Page size.
+            position: Keyset position of the previous page, or None for the first page.
+        Returns:
+            Up to limit + 1 articles with detailed metadata, labelled 'Exact' when they match every keyword
+            and criterion.
+        """
+        logging.info(
+            f"Advanced search with keywords: {keywords}, wordcount: {wordcount}, inLanguage: {inLanguage}, author_name: {author_name}, author_nationality: {author_nationality}, publisher: {publisher}, datePublished: {datePublished}")
+        keywords_list = keywords.split() if keywords else []
+        terms = list(dict.fromkeys(keyword.lower() for keyword in keywords_list))
+        criteria = self._advanced_filters(wordcount, inLanguage, author_name, author_nationality, publisher,
+                                          datePublished, wordcount_min, wordcount_max, datePublished_min,
+                                          datePublished_max)
+        if terms and not criteria:
+            return self.search_ranked_match(keywords_list, limit, position)
+        if terms:
+            rows = self._advanced_page(terms, criteria, limit, position)
+        elif criteria:
+            query = self._summary_query(self._ranking([], [f"IF({criterion}, 1, 0)" for criterion in criteria]),
+                                        limit, position, ranked=True)
+            logging.info(query)
+            rows = self.execute_search_sparql_query(query)
+        else:
+            return []
+        return self._summaries(rows, keywords_list, len(terms) + len(criteria))
 
-    def search_all_articles(self):
-        search_query = f"""
-            PREFIX schema: <http://schema.org/>
-            SELECT DISTINCT ?article ?headline ?abstract ?author ?publisher ?datePublished ?thumbnailUrl
-            WHERE {{
-                ?article schema:headline ?headline .
-                OPTIONAL {{ ?article schema:abstract ?abstract }}
-                OPTIONAL {{ 
-                    ?article schema:author ?authorObj .
-                    ?authorObj schema:name ?author 
-                }}
-                OPTIONAL {{ 
-                    ?article schema:publisher ?publisherObj .
-                    ?publisherObj schema:name ?publisher 
-                }}
-                OPTIONAL {{ ?article schema:datePublished ?datePublished }}
-                OPTIONAL {{ ?article schema:thumbnailUrl ?thumbnailUrl }}
-            }}
-            LIMIT 10
+    def search_all_articles(self, limit=DEFAULT_LIMIT, position=None):
         """
+        Lists article summaries, newest first.
+        Args:
+            limit: Page size.
+            position: Keyset position of the previous page, or None for the first page.
+        Returns:
+            Up to limit + 1 article summaries.
+        """
+        search_query = self._summary_query("", limit, position)
         logging.info(search_query)
         return self.execute_search_sparql_query(search_query)
 
-
     def search_certain_articles(self, links):
         """
         Searches for articles that match the given URLs.
@@ -798,12 +938,7 @@ class SPARQLService:
             List of articles matching the URLs.
         """
         logging.info(f"Searching for articles with URLs: {links}")
-        articles = []
-        for link in links:
-            article = self.get_article_by_url(link)
-            if article:
-                articles.append(article)
-        return articles
+        return self.get_articles_by_urls(links)
 
     def execute_search_sparql_query(self, query):
         """
@@ -816,7 +951,7 @@ class SPARQLService:
         logging.info(f"Executing SPARQL query: {query}")
         sparql_endpoint = f"{self.fuseki_url}/NEPR-2024/query"
         headers = {'Content-Type': 'application/sparql-query'}
-        response = requests.post(sparql_endpoint, data=query, headers=headers)
+        response = self.http.post(sparql_endpoint, data=query, headers=headers)
         articles = []
         if response.status_code == 200:
             results = response.json()
@@ -836,6 +971,8 @@ class SPARQLService:
                     article['thumbnailUrl'] = result['thumbnailUrl']['value']
                 if 'publisher' in result:
                     article['publisher'] = result['publisher']['value']
+                if 'matches' in result:
+                    article['matches'] = int(result['matches']['value'])
                 articles.append(article)
         return articles
 
@@ -850,7 +987,7 @@ class SPARQLService:
         sparql_endpoint = f"{self.fuseki_url}/NEPR-2024/query"
         headers = {'Content-Type': 'application/sparql-query'}
         try:
-            response = requests.post(sparql_endpoint, data=query, headers=headers)
+            response = self.http.post(sparql_endpoint, data=query, headers=headers)
             response.raise_for_status()
             return response.json().get('results', {}).get('bindings', [])
         except requests.exceptions.RequestException as e:
@@ -858,316 +995,42 @@ class SPARQLService:
             return []
 
     @staticmethod
-    def populate_person(result, results):
-        person_data = {
-            "name": None,
-            "@type": None,
-            "jobTitle": None,
-            "address": None,
-            "affiliation": None,
-            "birthDate": None,
-            "birthPlace": None,
-            "deathDate": None,
-            "deathPlace": None,
-            "email": None,
-            "familyName": None,
-            "gender": None,
-            "givenName": None,
-            "nationality": None
-        }
+    def _populate_nested(result, results, dispatch):
         subject = result.get('o', {}).get('value')
-        sub_predicates = [result.get('subP', {}).get('value') for result in results if
-                          result.get('o', {}).get('value') == subject]
-        sub_objects = [result.get('subO', {}).get('value') for result in results if
-                       result.get('o', {}).get('value') == subject]
-        for sub_predicate, sub_object_value in zip(sub_predicates, sub_objects):
-            if sub_predicate == "http://schema.org/name":
-                person_data["name"] = sub_object_value
-            elif sub_predicate == "http://schema.org/@type":
-                person_data["@type"] = sub_object_value
-            elif sub_predicate == "http://schema.org/jobTitle":
-                person_data["jobTitle"] = sub_object_value
-            elif sub_predicate == "http://schema.org/address":
-                person_data["address"] = sub_object_value
-            elif sub_predicate == "http://schema.org/affiliation":
-                person_data["affiliation"] = sub_object_value
-            elif sub_predicate == "http://schema.org/birthDate":
-                person_data["birthDate"] = sub_object_value
-            elif sub_predicate == "http://schema.org/birthPlace":
-                person_data["birthPlace"] = sub_object_value
-            elif sub_predicate == "http://schema.org/deathDate":
-                person_data["deathDate"] = sub_object_value
-            elif sub_predicate == "http://schema.org/deathPlace":
-                person_data["deathPlace"] = sub_object_value
-            elif sub_predicate == "http://schema.org/email":
-                person_data["email"] = sub_object_value
-            elif sub_predicate == "http://schema.org/familyName":
-                person_data["familyName"] = sub_object_value
-            elif sub_predicate == "http://schema.org/gender":
-                person_data["gender"] = sub_object_value
-            elif sub_predicate == "http://schema.org/givenName":
-                person_data["givenName"] = sub_object_value
-            elif sub_predicate == "http://schema.org/nationality":
-                person_data["nationality"] = sub_object_value
-        return person_data
+        pairs = [(row.get('subP', {}).get('value'), row.get('subO', {}).get('value'))
+                 for row in results if row.get('o', {}).get('value') == subject]
+        return ArticleHydrator.build(pairs, dispatch)
+
+    @staticmethod
+    def populate_person(result, results):
+        return SPARQLService._populate_nested(result, results, PERSON_DISPATCH)
 
     @staticmethod
     def populate_image_data(result, results):
-        image_data = {
-            "height": None,
-            "width": None,
-            "url": None,
-            "@type": None
-        }
-        subject = result.get('o', {}).get('value')
-        #get the sub-predicate and sub-object from results that gave o = subject
-        sub_predicates = [result.get('subP', {}).get('value') for result in results if result.get('o', {}).get('value') == subject]
-        sub_objects = [result.get('subO', {}).get('value') for result in results if result.get('o', {}).get('value') == subject]
-        for sub_predicate, sub_object_value in zip(sub_predicates, sub_objects):
-            if sub_predicate == "http://schema.org/height":
-                image_data["height"] = int(sub_object_value)
-            elif sub_predicate == "http://schema.org/width":
-                image_data["width"] = int(sub_object_value)
-            elif sub_predicate == "http://schema.org/@type":
-                image_data["@type"] = sub_object_value
-            elif sub_predicate == "http://schema.org/url":
-                image_data["url"] = sub_object_value
-        return image_data
+        return SPARQLService._populate_nested(result, results, IMAGE_DISPATCH)
 
     @staticmethod
     def populate_organization(result, results):
-        organization_data = {
-            "name": None,
-            "@type": None,
-            "address": None,
-            "affiliation": None,
-            "email": None
-        }
-        subject = result.get('o', {}).get('value')
-        logging.info(f"Subject: {subject}")
-        # get the sub-predicate and sub-object from results that gave o = subject
-        sub_predicates = [result.get('subP', {}).get('value') for result in results if
-                          result.get('o', {}).get('value') == subject]
-        sub_objects = [result.get('subO', {}).get('value') for result in results if
-                       result.get('o', {}).get('value') == subject]
-        for sub_predicate, sub_object_value in zip(sub_predicates, sub_objects):
-            logging.info(f"Sub-predicate: {sub_predicate}, Sub-object: {sub_object_value}")
-            if sub_predicate == "http://schema.org/name":
-                organization_data["name"] = sub_object_value
-            elif sub_predicate == "http://schema.org/@type":
-                organization_data["@type"] = sub_object_value
-            elif sub_predicate == "http://schema.org/address":
-                organization_data["address"] = sub_object_value
-            elif sub_predicate == "http://schema.org/affiliation":
-                organization_data["affiliation"] = sub_object_value
-            elif sub_predicate == "http://schema.org/email":
-                organization_data["email"] = sub_object_value
-        return organization_data
+        return SPARQLService._populate_nested(result, results, ORGANIZATION_DISPATCH)
 
     @staticmethod
     def populate_audio_data(result, results):
-        audio_data = {
-            "caption": None,
-            "transcript": None,
-            "@type": None,
-            "contentUrl": None,
-            "duration": None,
-            "embedUrl": None,
-            "height": None,
-            "uploadDate": None,
-            "width": None
-        }
-        subject = result.get('o', {}).get('value')
-        sub_predicates = [result.get('subP', {}).get('value') for result in results if
-                          result.get('o', {}).get('value') == subject]
-        sub_objects = [result.get('subO', {}).get('value') for result in results if
-                       result.get('o', {}).get('value') == subject]
-        for sub_predicate, sub_object_value in zip(sub_predicates, sub_objects):
-            if sub_predicate == "http://schema.org/caption":
-                audio_data["caption"] = sub_object_value
-            elif sub_predicate == "http://schema.org/transcript":
-                audio_data["transcript"] = sub_object_value
-            elif sub_predicate == "http://schema.org/@type":
-                audio_data["@type"] = sub_object_value
-            elif sub_predicate == "http://schema.org/contentUrl":
-                audio_data["contentUrl"] = sub_object_value
-            elif sub_predicate == "http://schema.org/duration":
-                audio_data["duration"] = sub_object_value
-            elif sub_predicate == "http://schema.org/embedUrl":
-                audio_data["embedUrl"] = sub_object_value
-            elif sub_predicate == "http://schema.org/height":
-                audio_data["height"] = int(sub_object_value)
-            elif sub_predicate == "http://schema.org/uploadDate":
-                audio_data["uploadDate"] = sub_object_value
-            elif sub_predicate == "http://schema.org/width":
-                audio_data["width"] = int(sub_object_value)
-        return audio_data
+        return SPARQLService._populate_nested(result, results, MEDIA_DISPATCH)
 
     @staticmethod
     def populate_video_data(result, results):
-        video_data = {
-            "caption": None,
-            "transcript": None,
-            "@type": None,
-            "contentUrl": None,
-            "duration": None,
-            "embedUrl": None,
-            "height": None,
-            "uploadDate": None,
-            "width": None
-        }
-        subject = result.get('o', {}).get('value')
-        sub_predicates = [result.get('subP', {}).get('value') for result in results if
-                          result.get('o', {}).get('value') == subject]
-        sub_objects = [result.get('subO', {}).get('value') for result in results if
-                       result.get('o', {}).get('value') == subject]
-        for sub_predicate, sub_object_value in zip(sub_predicates, sub_objects):
-            if sub_predicate == "http://schema.org/caption":
-                video_data["caption"] = sub_object_value
-            elif sub_predicate == "http://schema.org/transcript":
-                video_data["transcript"] = sub_object_value
-            elif sub_predicate == "http://schema.org/@type":
-                video_data["@type"] = sub_object_value
-            elif sub_predicate == "http://schema.org/contentUrl":
-                video_data["contentUrl"] = sub_object_value
-            elif sub_predicate == "http://schema.org/duration":
-                video_data["duration"] = sub_object_value
-            elif sub_predicate == "http://schema.org/embedUrl":
-                video_data["embedUrl"] = sub_object_value
-            elif sub_predicate == "http://schema.org/height":
-                video_data["height"] = int(sub_object_value)
-            elif sub_predicate == "http://schema.org/uploadDate":
-                video_data["uploadDate"] = sub_object_value
-            elif sub_predicate == "http://schema.org/width":
-                video_data["width"] = int(sub_object_value)
-        return video_data
+        return SPARQLService._populate_nested(result, results, MEDIA_DISPATCH)
 
     def populate_article_data(self, results, url):
-        article_data = {
-            "@context": "http://schema.org",
-            "@type": None,
-            "url": url,
-            "author": [],
-            "publisher": [],
-            "image": [],
-            "keywords": [],
-            "datePublished": None,
-            "headline": None,
-            "articleBody": None,
-            "wordCount": None,
-            "inLanguage": None,
-            "thumbnailUrl": None,
-            "thumbnail": [],
-            "articleSection": None,
-            "abstract": None,
-            "audio": [],
-            "video": [],
-            "editor": {},
-            "dateCreated": None,
-            "dateModified": None,
-        }
-        # Process query results and populate article_data
-        for result in results:
-            try:
-                logging.info(f"Processing result: {result}")
-                predicate = result['p']['value']
-                object_value = result['o']['value']
-                if 'subP' in result:
-                    sub_predicate = result['subP']['value']
-                else:
-                    sub_predicate = None
-                if 'subO' in result:
-                    sub_object = result['subO']['value']
-                else:
-                    sub_object = None
-                logging.info(f"Predicate: {predicate}, Object Value: {object_value}")
-
-                # Map predicates to JSON structure
-                if predicate == "http://schema.org/@type":
-                    article_data["@type"] = object_value
-                elif predicate == "http://schema.org/headline":
-                    article_data["headline"] = object_value
-                elif predicate == "http://schema.org/datePublished":
-                    article_data["datePublished"] = object_value
-                elif predicate == "http://schema.org/dateModified":
-                    article_data["dateModified"] = object_value
-                elif predicate == "http://schema.org/articleBody":
-                    article_data["articleBody"] = object_value
-                elif predicate == "http://schema.org/wordCount":
-                    article_data["wordCount"] = int(object_value)
-                elif predicate == "http://schema.org/inLanguage":
-                    article_data["inLanguage"] = object_value
-                elif predicate == "http://schema.org/thumbnailUrl":
-                    article_data["thumbnailUrl"] = object_value
-                elif predicate == "http://schema.org/articleSection":
-                    article_data["articleSection"] = object_value
-                elif predicate == "http://schema.org/abstract":
-                    article_data["abstract"] = object_value
-                elif predicate == "http://schema.org/keywords":
-                    logging.info(f"Appending keyword: {object_value}")
-                    article_data["keywords"].append(object_value)
-                elif predicate == "http://schema.org/url":
-                    article_data["url"] = object_value
-                elif predicate == "http://schema.org/author":
-                    if "author" not in article_data:
-                        article_data["author"] = []
-                    author_data = {}
-                    if sub_predicate == "http://schema.org/@type":
-                        if sub_object == "Person":
-                            author_data = self.populate_person(result, results)
-                        elif sub_object == "Organization":
-                            author_data = self.populate_organization(result, results)
-                        if author_data not in article_data["author"]:
-                            article_data["author"].append(author_data)
-                elif predicate == "http://schema.org/publisher":
-                    if "publisher" not in article_data:
-                        article_data["publisher"] = []
-                    publisher_data = {}
-                    if sub_predicate == "http://schema.org/@type":
-                        if sub_object == "Person":
-                            publisher_data = self.populate_person(result, results)
-                        elif sub_object == "Organization":
-                            publisher_data = self.populate_organization(result, results)
-                        if publisher_data not in article_data["publisher"] and publisher_data:
-                            article_data["publisher"].append(publisher_data)
-                elif predicate == "http://schema.org/image":
-                    if "image" not in article_data:
-                        article_data["image"] = []
-                    image_data = self.populate_image_data(result, results)
-                    if image_data not in article_data["image"]:
-                        logging.info(f"Image data: {image_data}")
-                        article_data["image"].append(image_data)
-                elif predicate == "http://schema.org/thumbnail":
-                    if "thumbnail" not in article_data:
-                        article_data["thumbnail"] = {}
-                    thumbnail_data = self.populate_image_data(result, results)
-                    if thumbnail_data:
-                        article_data["thumbnail"] = thumbnail_data
-                elif predicate == "http://schema.org/audio":
-                    if "audio" not in article_data:
-                        article_data["audio"] = []
-                    audio_data = self.populate_audio_data(results, result)
-                    if audio_data:
-                        article_data["audio"].append(audio_data)
-
-                elif predicate == "http://schema.org/video":
-                    if "video" not in article_data:
-                        article_data["video"] = []
-                    video_data = self.populate_video_data(results, result)
-                    if video_data:
-                        article_data["video"].append(video_data)
-
-                elif predicate == "http://schema.org/editor":
-                    if "editor" not in article_data:
-                        article_data["editor"] = []
-                    editor_data = self.populate_person(result, results)
-                    if editor_data not in article_data["editor"]:
-                        article_data["editor"].append(editor_data)
-                elif predicate == "http://schema.org/dateCreated":
-                    article_data["dateCreated"] = object_value
-            except Exception as e:
-                logging.error(f"Error processing result: {e}")
-        return article_data
+        """
+        Builds the article JSON from its SPARQL bindings.
+        Args:
+            results: Bindings of ?p ?o ?subP ?subO for the article.
+            url: URL of the article.
+        Returns:
+            Article data in structured JSON format.
+        """
+        return self.hydrator.hydrate(results, url)
 
     def get_article_by_url(self, url):
         """
@@ -1206,9 +1069,52 @@ class SPARQLService:
             logging.error(f"Error retrieving article by URL: {e}")
             return None
 
+    def get_articles_by_urls(self, urls):
+        """
+        Retrieves several articles from the Fuseki dataset with a single query.
+
+        Args:
+            urls: URLs of the articles to retrieve.
+        Returns:
+            Articles in structured JSON format, in the order of the given URLs.
+            URLs with no stored triples are skipped.
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        if not unique_urls:
+            return []
+        values = " ".join(f"<{url}>" for url in unique_urls)
+        query = f"""
+        SELECT ?article ?p ?o ?subP ?subO
+        WHERE {{
+          VALUES ?article {{ {values} }}
+          ?article ?p ?o .
+
+          OPTIONAL {{
+            FILTER (isIRI(?o))
+            ?o ?subP ?subO
+          }}
+        }}
+        """
+        grouped = {url: [] for url in unique_urls}
+        for result in self.execute_sparql_query(query):
+            subject = result.get('article', {}).get('value')
+            if subject in grouped:
+                grouped[subject].append(result)
+
+        articles = {}
+        for url, results in grouped.items():
+            if not results:
+                continue
+            try:
+                articles[url] = self.populate_article_data(results, url)
+            except Exception as e:
+                logging.error(f"Error processing results for {url}: {e}")
+        return [articles[url] for url in urls if url in articles]
+
     def delete_article_by_url(self, url):
         """
-            Deletes an article from the Fuseki dataset by its URL.
+            Deletes an article from the Fuseki dataset by its URL, dropping its named graph.
+            Articles still in the default graph, not migrated yet, are deleted from there instead.
             Args:
                 url: URL of the article to delete.
             Returns:
@@ -1216,50 +1122,20 @@ class SPARQLService:
             """
         logging.info(f"Deleting article with URL: {url}")
         try:
-            query = f"""
-                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                PREFIX schema: <http://schema.org/>
-
-                DELETE {{
-                  <{url}> ?p ?o .
-                  ?o ?subP ?subO
-                }}
-                WHERE {{
-                  <{url}> ?p ?o .
-
-                  # Prevent deletion of triples where the predicate is author, publisher, or editor
-                  FILTER NOT EXISTS {{
-                    <{url}> ?p ?o .
-                    FILTER (?p IN (schema:author, schema:publisher, schema:editor))
-                  }}
-
-                  OPTIONAL {{
-                    FILTER (isIRI(?o))
-                    ?o ?subP ?subO
-                    # Prevent deletion of linked triples related to author, publisher, or editor
-                    FILTER NOT EXISTS {{
-                      ?o ?subP ?subO .
-                      FILTER (?subP IN (schema:author, schema:publisher, schema:editor))
-                    }}
-                  }}
-                }};
-
-                DELETE {{
-                  <{url}> ?p ?o .
-                }}
-                WHERE {{
-                  <{url}> ?p ?o .
-                }}
-                """
+            # The default-graph deletion only matches when there was no graph to drop
+            query = f"DROP SILENT GRAPH <{article_graph(url)}> ;\n{default_graph_deletion(url)}"
             logging.info(query)
-            response = requests.post(
+            response = self.http.post(
                 f"{self.fuseki_url}/NEPR-2024/update",
                 data=query,
                 headers={'Content-Type': 'application/sparql-update'},
                 timeout=10
             )
             logging.info(response)
-            if response.status_code == 204:
+            if response.status_code in (200, 204):
+                self.keyword_index.remove(url)
+                self.vector_index.remove(url)
+                self._bump_dataset_version()
                 return True, "Article deleted successfully"
             else:
                 return False, f"Failed to delete article: {response.text}"
@@ -1267,21 +1143,80 @@ class SPARQLService:
             logging.error(f"Error deleting article by URL: {e}")
             return False, f"Error: {str(e)}"
 
-    def get_all_data(self):
+    def get_all_data(self, limit=1000, cursor=None):
         """
-        Retrieves all data from the Fuseki dataset.
+        Retrieves a page of the triples of the Fuseki dataset, one article graph after another in
+        graph order. A page holds whole graphs only, so blank nodes, which have no order of their
+        own, are never split across pages; a graph larger than the limit is returned on its own page.
+        Args:
+            limit: Maximum number of triples returned, unless a single graph is larger.
+            cursor: Cursor of the next page, as returned by a previous call.
         Returns:
-            All data from the dataset.
+            The triples of the page and the cursor of the next page, or None on error.
+        Raises:
+            ValueError: If the cursor is malformed.
         """
+        position = decode_cursor(cursor)
+        if position is not None and not isinstance(position.get('g'), str):
+            raise ValueError("Invalid cursor")
         try:
-            query = """
-            SELECT ?s ?p ?o
-            WHERE {
-              ?s ?p ?o
-            }
-            """
-            results = self.execute_sparql_query(query)
-            return results
+            after = f"FILTER(STR(?g) > {self._literal(position['g'])})" if position else ""
+            results = self.execute_sparql_query(f"""
+            SELECT ?g ?s ?p ?o
+            WHERE {{
+              {{
+                SELECT ?g WHERE {{ GRAPH ?g {{ }} {after} }}
+                ORDER BY ?g
+                LIMIT {limit + 1}
+              }}
+              GRAPH ?g {{ ?s ?p ?o }}
+            }}
+            ORDER BY ?g
+            LIMIT {limit + 1}
+            """)
+            if len(results) <= limit:
+                return results, None
+            last_graph = results[limit]['g']['value']
+            complete = [triple for triple in results[:limit] if triple['g']['value'] != last_graph]
+            if not complete:
+                # A single graph fills the page: return all of it
+                complete = self.execute_sparql_query(
+                    f"SELECT ?g ?s ?p ?o WHERE {{ VALUES ?g {{ <{last_graph}> }} GRAPH ?g {{ ?s ?p ?o }} }}")
+            return complete, encode_cursor({'g': complete[-1]['g']['value']})
         except Exception as e:
             logging.error(f"Error retrieving all data: {e}")
             return None
+
+    def export_data(self, fmt="ntriples"):
+        """
+        Streams the whole dataset from Fuseki without loading it in memory.
+        Args:
+            fmt: 'ntriples', 'nquads' (with graph names) or 'ndjson' (one triple object per line).
+        Returns:
+            The media type of the export and an iterator over its byte chunks.
+        Raises:
+            ValueError: If the format is not supported.
+            requests.exceptions.RequestException: If Fuseki cannot be reached or rejects the request.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        accept, media_type = EXPORT_FORMATS[fmt]
+        if fmt == "nquads":
+            endpoint = f"{self.fuseki_url}/NEPR-2024"
+        else:
+            # The articles are stored in named graphs, exported as triples through their union
+            endpoint = f"{self.fuseki_url}/NEPR-2024/data?graph={UNION_GRAPH}"
+        logging.info(f"Exporting dataset as {fmt} from {endpoint}")
+        response = self.http.get(endpoint, headers={'Accept': accept}, stream=True)
+        response.raise_for_status()
+
+        def chunks():
+            try:
+                if fmt == "ndjson":
+                    yield from ndjson_lines(response.iter_lines())
+                else:
+                    yield from response.iter_content(CHUNK_SIZE)
+            finally:
+                response.close()
+
+        return media_type, chunks()
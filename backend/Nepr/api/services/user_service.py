@@ -30,6 +30,18 @@ class UserService:
             logging.error(e)
             return None
 
+    def get_user_history_entries(self, session: Session, email: str):
+        """
+        Returns the (article URL, access date) entries of the user's history, oldest first.
+        """
+        try:
+            user_history = session.query(UserHistory).filter_by(user_email=email).order_by(
+                UserHistory.date_accessed.asc()).all()
+            return [(history.article_url, history.date_accessed) for history in user_history]
+        except Exception as e:
+            logging.error(e)
+            return None
+
     def get_user_top_history(self, session: Session, email: str, limit: int = 10):
         """
         Returns the top article URLs from the user's history.
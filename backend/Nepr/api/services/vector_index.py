@@ -0,0 +1,551 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from api.services.lsh_index import RandomProjectionLSH
+from utils.http_client import get_session
+
+load_dotenv()
+
+FILES = ("urls.json", "indptr.npy", "indices.npy", "data.npy")
+SIGNATURE_CHUNK = 10000
+
+
+def article_text(article):
+    """
+    Builds the text an article is vectorized from: its headline, abstract and keywords.
+    Args:
+        article (dict): The article, with optional 'headline', 'abstract' and 'keywords'.
+    Returns:
+        str: The article text.
+    """
+    text = []
+    if article.get('headline'):
+        text.append(article['headline'])
+    if article.get('abstract'):
+        text.append(article['abstract'])
+    if article.get('keywords'):
+        if isinstance(article['keywords'], list):
+            text.extend(article['keywords'])
+        elif isinstance(article['keywords'], str):
+            text.extend(article['keywords'].split())
+    return ' '.join(text)
+
+
+class ArticleVectorIndex:
+    """
+    Character n-gram vectors of the articles, keyed by URL.
+    Vectors come from a stateless hashing vectorizer, so they are computed once at ingest and
+    never refitted; they are L2-normalized, so a dot product is a cosine similarity.
+    The saved vectors are memory-mapped CSR arrays. Every change is first appended to a SQLite
+    journal next to them, so it survives restarts and is picked up by the other processes using
+    the same directory; the journal is merged into the arrays every `flush_every` changes, under
+    the journal's write lock so that concurrent merges do not drop each other's changes.
+    Saved vectors are also hashed into a random-projection LSH index for nearest-neighbour lookups.
+    """
+
+    def __init__(self, path=None, n_features=None, flush_every=None):
+        """
+        Args:
+            path (str): Directory of the saved vectors, ':memory:' keeps them in process.
+            n_features (int): Dimension of the hashed vectors.
+            flush_every (int): Number of added or removed articles after which the vectors are saved.
+        """
+        self.path = path or os.getenv("VECTOR_INDEX_PATH", "vector_index")
+        self.n_features = n_features or int(os.getenv("VECTOR_INDEX_FEATURES", 2 ** 18))
+        self.flush_every = flush_every or int(os.getenv("VECTOR_INDEX_FLUSH", 256))
+        self.vectorizer = HashingVectorizer(analyzer='char', ngram_range=(3, 5), n_features=self.n_features,
+                                            alternate_sign=False, norm='l2', dtype=np.float32)
+        self._lock = threading.Lock()
+        self._urls = []
+        self._rows = {}
+        self._base = csr_matrix((0, self.n_features), dtype=np.float32)
+        self._pending = {}
+        self.lsh = RandomProjectionLSH(self.n_features)
+        self.exact_limit = int(os.getenv("VECTOR_INDEX_EXACT_LIMIT", 10000))
+        self.max_candidates = int(os.getenv("VECTOR_INDEX_MAX_CANDIDATES", 10000))
+        self.sync_seconds = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", 1))
+        self._journal = None
+        self._generation = 0
+        self._seq = 0
+        self._synced = 0.0
+        if self._persistent():
+            os.makedirs(self.path, exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            self._journal = sqlite3.connect(os.path.join(self.path, "journal.sqlite3"), timeout=30,
+                                            check_same_thread=False, isolation_level=None)
+            self._journal.executescript(
+                "CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, "
+                "indices BLOB, data BLOB);"
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);"
+            )
+        with self._lock:
+            self._reload()
+
+    def _persistent(self):
+        return self.path != ':memory:'
+
+    def _saved_generation(self):
+        """Number of merges into the saved arrays, by any process."""
+        row = self._journal.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _reload(self):
+        """Loads the saved arrays and replays the whole journal over them."""
+        if self._journal is None:
+            return
+        # Merges write the arrays under the write lock, so holding it here never loads half-written arrays
+        lock = not self._journal.in_transaction
+        if lock:
+            self._journal.execute("BEGIN IMMEDIATE")
+        try:
+            self._generation = self._saved_generation()
+            self._load()
+            self._pending = {}
+            self._seq = 0
+            self._replay()
+        finally:
+            if lock:
+                self._journal.execute("COMMIT")
+
+    def _replay(self):
+        """Applies the journaled changes not seen yet, including the ones of other processes."""
+        for seq, url, indices, data in self._journal.execute(
+                "SELECT seq, url, indices, data FROM changes WHERE seq > ? ORDER BY seq", (self._seq,)):
+            if indices is None:
+                self._pending[url] = None
+            else:
+                indices = np.frombuffer(indices, dtype=np.int32)
+                vector = csr_matrix((np.frombuffer(data, dtype=np.float32), indices, [0, len(indices)]),
+                                    shape=(1, self.n_features))
+                self._pending[url] = vector
+            self._seq = seq
+
+    def _sync(self, force=False):
+        """Catches up with the merges and journaled changes of other processes, at most every sync_seconds."""
+        if self._journal is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._synced < self.sync_seconds:
+            return
+        self._synced = now
+        try:
+            if self._saved_generation() != self._generation:
+                self._reload()
+            else:
+                self._replay()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading the vector index journal: {e}")
+
+    def _log(self, url, vector):
+        """Appends a change to the journal; None removes the article."""
+        if self._journal is None:
+            return
+        try:
+            if vector is None:
+                self._journal.execute("INSERT INTO changes (url) VALUES (?)", (url,))
+            else:
+                self._journal.execute("INSERT INTO changes (url, indices, data) VALUES (?, ?, ?)",
+                                      (url, vector.indices.astype(np.int32).tobytes(),
+                                       vector.data.astype(np.float32).tobytes()))
+        except sqlite3.Error as e:
+            logging.error(f"Error journaling the vector of {url}: {e}")
+
+    def _load(self):
+        if not self._persistent() or not os.path.exists(os.path.join(self.path, FILES[0])):
+            return
+        try:
+            with open(os.path.join(self.path, "urls.json"), encoding="utf-8") as f:
+                urls = json.load(f)
+            arrays = [np.load(os.path.join(self.path, name), mmap_mode='r') for name in FILES[1:]]
+            indptr, indices, data = arrays
+            base = csr_matrix((data, indices, indptr), shape=(len(urls), self.n_features), copy=False)
+            signatures = os.path.join(self.path, "signatures.npy")
+            keys = np.load(signatures) if os.path.exists(signatures) else None
+            if keys is None or keys.shape != (len(urls), self.lsh.tables):
+                keys = self._signatures(base)
+            self._base = base
+            self._urls = urls
+            self._rows = {url: row for row, url in enumerate(urls)}
+            self.lsh.set_keys(keys)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading the vector index from {self.path}: {e}")
+
+    def _signatures(self, vectors):
+        if vectors.shape[0] == 0:
+            return np.zeros((0, self.lsh.tables), dtype=np.uint32)
+        return np.concatenate([self.lsh.signatures(vectors[start:start + SIGNATURE_CHUNK])
+                               for start in range(0, vectors.shape[0], SIGNATURE_CHUNK)])
+
+    def vectorize(self, articles):
+        """
+        Computes the vectors of articles without storing them.
+        Args:
+            articles (list): The articles.
+        Returns:
+            csr_matrix: One L2-normalized row per article.
+        """
+        return self.vectorizer.transform([article_text(article) for article in articles])
+
+    def add(self, url, article):
+        """
+        Stores (or replaces) the vector of an article.
+        Args:
+            url (str): URL of the article.
+            article (dict): The article.
+        """
+        vector = self.vectorize([article])
+        with self._lock:
+            self._log(url, vector)
+            self._pending[url] = vector
+            self._sync(force=True)
+            flush = len(self._pending) >= self.flush_every
+        if flush:
+            self.save()
+
+    def remove(self, url):
+        """
+        Removes the vector of an article.
+        Args:
+            url (str): URL of the article.
+        """
+        with self._lock:
+            self._sync()
+            if url not in self._rows and url not in self._pending:
+                return
+            self._log(url, None)
+            self._pending[url] = None
+            self._sync(force=True)
+            flush = len(self._pending) >= self.flush_every
+        if flush:
+            self.save()
+
+    def vectors(self, articles):
+        """
+        Returns the vectors of articles, computing the ones that are not stored.
+        Args:
+            articles (list): The articles, identified by their 'url'.
+        Returns:
+            csr_matrix: One row per article, in input order.
+        """
+        if not articles:
+            return csr_matrix((0, self.n_features), dtype=np.float32)
+        stored, pending, missing = [], [], []
+        with self._lock:
+            self._sync()
+            for position, article in enumerate(articles):
+                url = article.get('url')
+                if self._pending.get(url) is not None:
+                    pending.append((position, self._pending[url]))
+                elif url in self._rows and url not in self._pending:
+                    stored.append((position, self._rows[url]))
+                else:
+                    missing.append(position)
+            blocks = [self._base[[row for _, row in stored]]] if stored else []
+        blocks.extend(vector for _, vector in pending)
+        if missing:
+            blocks.append(self.vectorize([articles[position] for position in missing]))
+        order = [position for position, _ in stored] + [position for position, _ in pending] + missing
+        return vstack(blocks, format='csr')[np.argsort(order)]
+
+    def similarity(self, viewed_articles, candidate_articles):
+        """
+        Computes the mean cosine similarity of each candidate to the viewed articles.
+        Only the candidate x viewed block of the similarity matrix is computed.
+        Args:
+            viewed_articles (list): The articles the user read.
+            candidate_articles (list): The articles to score.
+        Returns:
+            numpy.ndarray: One score per candidate.
+        """
+        if not viewed_articles or not candidate_articles:
+            return np.zeros(len(candidate_articles))
+        return self.centroid_similarity(self.centroid(viewed_articles), candidate_articles)
+
+    def centroid_similarity(self, centroid, candidate_articles):
+        """
+        Scores candidates against the mean of normalized vectors: the dot product with that mean
+        is the mean cosine similarity to the vectors averaged.
+        Args:
+            centroid: The 1 x n_features mean vector.
+            candidate_articles (list): The articles to score.
+        Returns:
+            numpy.ndarray: One score per candidate.
+        """
+        if not candidate_articles:
+            return np.zeros(0)
+        return np.asarray((self.vectors(candidate_articles) @ centroid.T).todense()).ravel()
+
+    def nearest(self, vector, k=10, exclude=()):
+        """
+        Finds the stored articles most similar to a vector.
+        Saved articles are looked up in the LSH index, and at most `max_candidates` of them, the ones
+        sharing the most LSH keys with the vector, are re-ranked by exact cosine similarity.
+        Small indexes and pending articles are scanned exhaustively.
+        Args:
+            vector: Sparse 1 x n_features query vector, e.g. the centroid of the articles a user read.
+            k (int): Number of articles returned.
+            exclude: URLs never returned.
+        Returns:
+            list: (URL, similarity) pairs, most similar first.
+        """
+        exclude = set(exclude)
+        with self._lock:
+            self._sync()
+            hidden = [self._rows[url] for url in exclude.union(self._pending) if url in self._rows]
+            if len(self._urls) <= self.exact_limit:
+                rows = np.setdiff1d(np.arange(len(self._urls)), hidden)
+            else:
+                keys = self.lsh.signatures(vector)[0]
+                rows = self.lsh.lookup(keys, limit=self.max_candidates + len(hidden))
+                rows = rows[~np.isin(rows, hidden)]
+                if len(rows) < k:
+                    rows = self.lsh.lookup(keys, probe=True, limit=self.max_candidates + len(hidden))
+                    rows = rows[~np.isin(rows, hidden)]
+            urls = [self._urls[row] for row in rows.tolist()]
+            blocks = [self._base[rows]] if len(rows) else []
+            for url, pending in self._pending.items():
+                if pending is not None and url not in exclude:
+                    urls.append(url)
+                    blocks.append(pending)
+        if not urls:
+            return []
+        scores = np.asarray((vstack(blocks, format='csr') @ vector.T).todense()).ravel()
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [(urls[position], float(scores[position])) for position in top]
+
+    def centroid(self, articles):
+        """
+        Returns the mean of the vectors of articles, e.g. of the reading history of a user.
+        Args:
+            articles (list): The articles.
+        Returns:
+            csr_matrix: A 1 x n_features vector.
+        """
+        return csr_matrix(self.vectors(articles).mean(axis=0))
+
+    def similar_articles(self, articles, k=10, exclude=()):
+        """
+        Finds the stored articles most similar to the centroid of a set of articles.
+        Args:
+            articles (list): The articles, e.g. the reading history of a user.
+            k (int): Number of articles returned.
+            exclude: URLs never returned.
+        Returns:
+            list: (URL, similarity) pairs, most similar first.
+        """
+        if not articles:
+            return []
+        return self.nearest(self.centroid(articles), k, exclude)
+
+    def save(self):
+        """
+        Merges the pending changes into the saved vectors. The saved arrays and the journal are
+        re-read under the journal's write lock first, so changes merged or journaled by other
+        processes are kept.
+        """
+        with self._lock:
+            if self._journal is None:
+                self._merge()
+                return
+            try:
+                self._journal.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error as e:
+                logging.error(f"Error locking the vector index journal: {e}")
+                return
+            try:
+                self._sync(force=True)
+                if self._pending and self._merge():
+                    self._journal.execute("DELETE FROM changes WHERE seq <= ?", (self._seq,))
+                    self._bump_generation()
+                self._journal.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._journal.execute("ROLLBACK")
+                logging.error(f"Error merging the vector index journal: {e}")
+                self._reload()
+
+    def _merge(self):
+        if not self._pending:
+            return False
+        keep = [row for row, url in enumerate(self._urls) if url not in self._pending]
+        added = [(url, vector) for url, vector in self._pending.items() if vector is not None]
+        urls = [self._urls[row] for row in keep] + [url for url, _ in added]
+        added_vectors = [vector for _, vector in added]
+        base = vstack([self._base[keep]] + added_vectors, format='csr')
+        keys = self.lsh.keys[keep]
+        if added_vectors:
+            keys = np.concatenate([keys, self._signatures(vstack(added_vectors, format='csr'))])
+        return self._commit(urls, base, keys)
+
+    def _bump_generation(self):
+        self._generation = self._saved_generation() + 1
+        self._journal.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)",
+                              (self._generation,))
+
+    def journal_position(self):
+        """Returns the position of the last journaled change, to pass to replace."""
+        with self._lock:
+            return self._journal_position()
+
+    def _journal_position(self):
+        if self._journal is None:
+            return 0
+        return self._journal.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def replace(self, urls, vectors, journal_position=None):
+        """
+        Replaces every stored vector, e.g. after vectorizing the whole dataset in bulk.
+        Args:
+            urls (list): URLs of the articles.
+            vectors: Sparse matrix with the vector of each article, in the same order.
+            journal_position (int): Journal position the vectors were computed at; later changes
+                are replayed over them. Defaults to the current position.
+        """
+        vectors = csr_matrix(vectors)
+        with self._lock:
+            if self._journal is None:
+                self._commit(list(urls), vectors, self._signatures(vectors))
+                return
+            try:
+                self._journal.execute("BEGIN IMMEDIATE")
+                if journal_position is None:
+                    journal_position = self._journal_position()
+                if self._commit(list(urls), vectors, self._signatures(vectors)):
+                    self._journal.execute("DELETE FROM changes WHERE seq <= ?", (journal_position,))
+                    self._bump_generation()
+                self._journal.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._journal.execute("ROLLBACK")
+                logging.error(f"Error replacing the vector index: {e}")
+            self._reload()
+
+    def _commit(self, urls, base, keys):
+        index_dtype = np.int32 if base.nnz < 2 ** 31 else np.int64
+        base = csr_matrix((base.data.astype(np.float32), base.indices.astype(index_dtype),
+                           base.indptr.astype(index_dtype)), shape=(len(urls), self.n_features), copy=False)
+        if self._persistent():
+            try:
+                self._write(urls, base, keys)
+            except OSError as e:
+                logging.error(f"Error saving the vector index to {self.path}: {e}")
+                return False
+        self._urls = urls
+        self._rows = {url: row for row, url in enumerate(urls)}
+        self._base = base
+        self._pending = {}
+        self.lsh.set_keys(keys)
+        self._load()
+        return True
+
+    def _write(self, urls, base, keys):
+        os.makedirs(self.path, exist_ok=True)
+        arrays = {"indptr.npy": base.indptr, "indices.npy": base.indices, "data.npy": base.data,
+                  "signatures.npy": keys}
+        for name, array in arrays.items():
+            temporary = os.path.join(self.path, f"{name}.tmp")
+            with open(temporary, "wb") as f:
+                np.save(f, array)
+            os.replace(temporary, os.path.join(self.path, name))
+        temporary = os.path.join(self.path, "urls.json.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(urls, f)
+        # The URL list is replaced last: it is the file _load looks for.
+        os.replace(temporary, os.path.join(self.path, "urls.json"))
+
+    def stats(self):
+        """
+        Returns the index size.
+        Returns:
+            dict: The number of saved and pending vectors, their dimension and the LSH parameters.
+        """
+        with self._lock:
+            self._sync()
+            return {"articles": len(self._urls), "pending": len(self._pending), "features": self.n_features,
+                    "lsh_tables": self.lsh.tables, "lsh_bits": self.lsh.bits}
+
+    def rebuild(self, fuseki_url, http=None, page_size=10000):
+        """
+        Recomputes the vectors of every article stored in Fuseki.
+        Args:
+            fuseki_url (str): Base URL of the Fuseki server.
+            http: Session used for the queries.
+            page_size (int): Number of rows fetched per query.
+        Returns:
+            int: Number of vectorized articles.
+        """
+        http = http or get_session("fuseki")
+        journal_position = self.journal_position()
+        articles = {}
+        offset = 0
+        while True:
+            query = f"""
+            PREFIX schema: <http://schema.org/>
+            SELECT DISTINCT ?article ?headline ?abstract ?keyword
+            WHERE {{
+              ?article schema:headline ?headline .
+              OPTIONAL {{ ?article schema:abstract ?abstract }}
+              OPTIONAL {{ ?article schema:keywords ?keyword }}
+            }}
+            ORDER BY ?article ?keyword
+            LIMIT {page_size}
+            OFFSET {offset}
+            """
+            response = http.post(f"{fuseki_url}/NEPR-2024/query", data=query,
+                                 headers={'Content-Type': 'application/sparql-query'})
+            response.raise_for_status()
+            bindings = response.json().get('results', {}).get('bindings', [])
+            for result in bindings:
+                article = articles.setdefault(result['article']['value'], {
+                    'headline': result['headline']['value'],
+                    'abstract': result.get('abstract', {}).get('value'),
+                    'keywords': []
+                })
+                keyword = result.get('keyword', {}).get('value')
+                if keyword and keyword not in article['keywords']:
+                    article['keywords'].append(keyword)
+            if len(bindings) < page_size:
+                break
+            offset += page_size
+
+        self.replace(list(articles), self.vectorize(list(articles.values())), journal_position)
+        return len(articles)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    """
+    Returns the process-wide article vector index, creating it on first use.
+    Returns:
+        ArticleVectorIndex: The shared index.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ArticleVectorIndex()
+            atexit.register(_index.save)
+        return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the article vector index.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from the Fuseki dataset")
+    args = parser.parse_args()
+
+    index = get_vector_index()
+    if args.rebuild:
+        count = index.rebuild(os.getenv("FUSEKI_URL"))
+        print(f"Vectorized {count} articles.")
+    print(f"Vector index stats: {index.stats()}")
@@ -1,23 +1,92 @@
 import logging
+import os
+import time
+
 import coloredlogs
 import requests
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 
+from utils.gateway import SERVICES, SERVICE_TIMEOUTS, TIMEOUT, CONNECT_TIMEOUT, service_timeout, upstream_url, \
+    request_headers, stream_response
+from utils.http_client import get_session
+from utils.rate_limit import RateLimiter
+from utils.upstreams import RETRY_STATUSES, HEALTH_PATH, HealthChecker, create_pools, max_attempts
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                     filename='app.log')
 coloredlogs.install(level='INFO', fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 app = Flask(__name__)
 CORS(app)
-SERVICES = {
-    "user": "http://127.0.0.1:5002",
-    "article": "http://127.0.0.1:5001",
-    "auth": "http://127.0.0.1:5002",
-    "email": "http://127.0.0.1:5002"
-}
 
-TIMEOUT = 60
+# 'stream' forwards upstream responses unchanged; 'buffered' re-encodes them as JSON
+PROXY_MODE = os.getenv("GATEWAY_PROXY_MODE", "stream")
+
+
+def upstream_session(service):
+    """
+    Returns the pooled keep-alive session of a service. The gateway forwards status codes
+    verbatim, so it never retries on its own.
+    """
+    return get_session(f"gateway_{service}", retries=0)
+
+
+def probe(url):
+    """Returns the status of the health probe of a replica, None if it cannot be reached."""
+    try:
+        response = get_session("gateway_health", retries=0).get(f"{url}{HEALTH_PATH}", timeout=CONNECT_TIMEOUT)
+        response.close()
+        return response.status_code
+    except requests.exceptions.RequestException:
+        return None
+
+
+pools = create_pools(SERVICES)
+health = HealthChecker(pools, probe)
+rate_limiter = RateLimiter()
+
+
+def forward(service, path, send):
+    """
+    Sends a request to a replica of a service, retrying idempotent requests on another replica
+    after a connection error, a timeout or a 502, 503 or 504 response.
+    Args:
+        service: Name of the service.
+        path: Path of the request within the service.
+        send: Function of the upstream URL sending the request and returning the response.
+    Returns:
+        The response of the last replica tried.
+    Raises:
+        requests.exceptions.RequestException: If the last replica tried could not answer.
+    """
+    pool = pools[service]
+    attempts = max_attempts(request.method, pool)
+    tried = []
+    while True:
+        upstream = pool.acquire(tried)
+        tried.append(upstream)
+        started = time.perf_counter()
+        try:
+            response = send(upstream_url(upstream.url, service, path, request.query_string))
+        except requests.exceptions.RequestException:
+            pool.release(upstream, time.perf_counter() - started, True)
+            if len(tried) >= attempts:
+                raise
+            continue
+        pool.release(upstream, time.perf_counter() - started, response.status_code >= 500)
+        if response.status_code in RETRY_STATUSES and len(tried) < attempts:
+            response.close()
+            continue
+        return response
+
+
+@app.route('/_gateway/upstreams', methods=['GET'])
+def upstream_stats():
+    """
+    Reports the replicas of every service with their health, load, errors and latency.
+    """
+    return jsonify({service: pool.stats() for service, pool in pools.items()}), 200
 
 
 @app.route('/<service>', methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
@@ -26,28 +95,37 @@ def proxy(service, path=""):
     if service not in SERVICES:
         return jsonify({"error": f"Service '{service}' not found"}), 404
     logging.info(f"Proxying request to {service} service {path}")
-    service_url = SERVICES[service]
-    if path:
-        full_url = f"{service_url}/{service}/{path}"
-    else:
-        full_url = f"{service_url}/{service}"
-    if request.args:
-        full_url += '?' + request.query_string.decode('utf-8')
-
-    print("full_url: " + full_url)  # Log the full URL for debugging
+    health.start()
+    timeout = (CONNECT_TIMEOUT, service_timeout(service, SERVICE_TIMEOUTS, TIMEOUT))
 
     try:
         if request.method == 'OPTIONS':
             return jsonify({"message": "Preflight request successful"}), 200
 
-        response = requests.request(
+        retry_after = rate_limiter.check(service, path, request.headers.get("Authorization"), request.remote_addr)
+        if retry_after:
+            return jsonify({"error": "Too many requests", "details": f"Retry in {retry_after} seconds"}), 429, \
+                {"Retry-After": str(retry_after)}
+
+        if PROXY_MODE == "stream":
+            upstream = forward(service, path, lambda full_url: upstream_session(service).request(
+                method=request.method,
+                url=full_url,
+                headers=request_headers(request.headers),
+                data=request.get_data(),
+                stream=True,
+                allow_redirects=False,
+                timeout=timeout
+            ))
+            return stream_response(upstream)
+
+        response = forward(service, path, lambda full_url: upstream_session(service).request(
             method=request.method,
             url=full_url,
             headers={key: value for key, value in request.headers if key != "Host"},
-            params=request.args,  # Forward the query parameters
             json=request.get_json(silent=True),  # Forward the JSON body if present
-            timeout=TIMEOUT
-        )
+            timeout=timeout
+        ))
 
         if response.content:
             return jsonify(response.json()), response.status_code
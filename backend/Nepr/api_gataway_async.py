@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+import coloredlogs
+from aiohttp import web
+
+from utils.gateway import SERVICES, SERVICE_TIMEOUTS, TIMEOUT, CONNECT_TIMEOUT, CHUNK_SIZE, service_timeout, \
+    upstream_url, request_headers, response_headers, route_of, RouteLimiter, RouteBusy
+from utils.upstreams import RETRY_STATUSES, HEALTH_PATH, HEALTH_INTERVAL, create_pools, max_attempts, replica_urls, \
+    record_probes
+from utils.rate_limit import RateLimiter
+
+# Maximum open upstream connections; each in-flight request holds one
+MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", 4096))
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+client_key = web.AppKey("client", aiohttp.ClientSession)
+limiter_key = web.AppKey("limiter", RouteLimiter)
+pools_key = web.AppKey("pools", dict)
+rate_limiter_key = web.AppKey("rate_limiter", RateLimiter)
+
+
+def error(message, details, status, headers=None):
+    return web.json_response({"error": message, "details": details}, status=status,
+                             headers={**CORS_HEADERS, **(headers or {})})
+
+
+def preflight(request):
+    headers = dict(CORS_HEADERS)
+    headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
+    if "Access-Control-Request-Headers" in request.headers:
+        headers["Access-Control-Allow-Headers"] = request.headers["Access-Control-Request-Headers"]
+    return web.json_response({"message": "Preflight request successful"}, headers=headers)
+
+
+async def proxy(request):
+    """
+    Forwards a request to its service with the routing and URL rewriting of api_gataway.py,
+    streaming the upstream response back without buffering or decoding it.
+    """
+    service, path = request.match_info["service"], request.match_info.get("path", "")
+    if service not in SERVICES:
+        return web.json_response({"error": f"Service '{service}' not found"}, status=404, headers=CORS_HEADERS)
+    if request.method == "OPTIONS":
+        return preflight(request)
+    rate_limiter = request.app[rate_limiter_key]
+    check = (service, path, request.headers.get("Authorization"), request.remote)
+    if rate_limiter.store.blocking:
+        retry_after = await asyncio.get_running_loop().run_in_executor(None, rate_limiter.check, *check)
+    else:
+        retry_after = rate_limiter.check(*check)
+    if retry_after:
+        return error("Too many requests", f"Retry in {retry_after} seconds", 429, {"Retry-After": str(retry_after)})
+    logging.info(f"Proxying request to {service} service {path}")
+    timeout = aiohttp.ClientTimeout(total=None, connect=CONNECT_TIMEOUT,
+                                    sock_read=service_timeout(service, SERVICE_TIMEOUTS, TIMEOUT))
+    pool = request.app[pools_key][service]
+    attempts = max_attempts(request.method, pool)
+    tried = []
+
+    response = None
+    try:
+        async with request.app[limiter_key].slot(route_of(service, path)):
+            body = await request.read()
+            while True:
+                replica = pool.acquire(tried)
+                tried.append(replica)
+                started = time.perf_counter()
+                try:
+                    upstream = await request.app[client_key].request(
+                        request.method,
+                        upstream_url(replica.url, service, path, request.query_string),
+                        headers=request_headers(request.headers.items()),
+                        data=body,
+                        allow_redirects=False,
+                        timeout=timeout
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pool.release(replica, time.perf_counter() - started, True)
+                    if len(tried) >= attempts:
+                        raise
+                    continue
+                pool.release(replica, time.perf_counter() - started, upstream.status >= 500)
+                if upstream.status in RETRY_STATUSES and len(tried) < attempts:
+                    upstream.release()
+                    continue
+                break
+
+            async with upstream:
+                response = web.StreamResponse(status=upstream.status, reason=upstream.reason,
+                                              headers=response_headers(upstream.headers))
+                response.headers.update(CORS_HEADERS)
+                await response.prepare(request)
+                async for chunk in upstream.content.iter_chunked(CHUNK_SIZE):
+                    await response.write(chunk)
+                await response.write_eof()
+                return response
+
+    except RouteBusy:
+        return error(f"{service} service is busy", "Too many concurrent requests", 503)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if response is not None and response.prepared:
+            # The status is already sent: drop the connection so the client sees a truncated body
+            logging.error(f"{service} service failed while streaming: {e!r}")
+            raise
+        if isinstance(e, aiohttp.ClientConnectorError):
+            return error(f"{service} service is unavailable", "Connection refused", 503)
+        if isinstance(e, (asyncio.TimeoutError, aiohttp.ServerTimeoutError)):
+            return error(f"{service} service timeout", "The request took too long", 504)
+        return error(f"{service} service error", str(e), 500)
+
+
+async def limits(request):
+    return web.json_response(request.app[limiter_key].stats(), headers=CORS_HEADERS)
+
+
+async def upstream_stats(request):
+    return web.json_response({service: pool.stats() for service, pool in request.app[pools_key].items()},
+                             headers=CORS_HEADERS)
+
+
+async def probe(client, url):
+    try:
+        async with client.get(f"{url}{HEALTH_PATH}", timeout=aiohttp.ClientTimeout(total=CONNECT_TIMEOUT)) as response:
+            return response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+
+async def health_checks(app):
+    """Probes every replica concurrently, every HEALTH_INTERVAL seconds."""
+    while True:
+        urls = replica_urls(app[pools_key])
+        statuses = await asyncio.gather(*(probe(app[client_key], url) for url in urls))
+        record_probes(app[pools_key], dict(zip(urls, statuses)))
+        await asyncio.sleep(HEALTH_INTERVAL)
+
+
+async def client_context(app):
+    # Bodies are forwarded compressed as received, hence no automatic decompression
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=0)
+    async with aiohttp.ClientSession(connector=connector, auto_decompress=False) as client:
+        app[client_key] = client
+        checks = asyncio.ensure_future(health_checks(app))
+        yield
+        checks.cancel()
+
+
+def create_app(limiter=None, pools=None, rate_limiter=None):
+    """
+    Creates the async gateway: every in-flight request is a task on one event loop instead of
+    a thread, so slow upstreams such as article creation do not exhaust the workers.
+    Args:
+        limiter (RouteLimiter): Per-route concurrency limits, defaults to ROUTE_LIMITS.
+        pools (dict): Replicas of each service, defaults to the SERVICES routing table.
+        rate_limiter (RateLimiter): Per-client token buckets, defaults to the BUDGETS of utils.rate_limit.
+    Returns:
+        web.Application: The gateway application.
+    """
+    app = web.Application()
+    app[limiter_key] = limiter or RouteLimiter()
+    app[pools_key] = pools if pools is not None else create_pools(SERVICES)
+    app[rate_limiter_key] = rate_limiter or RateLimiter()
+    app.cleanup_ctx.append(client_context)
+    app.router.add_get("/_gateway/limits", limits)
+    app.router.add_get("/_gateway/upstreams", upstream_stats)
+    app.router.add_route("*", "/{service}", proxy)
+    app.router.add_route("*", "/{service}/{path:.*}", proxy)
+    return app
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        filename='app.log')
+    coloredlogs.install(level='INFO', fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    web.run_app(create_app(), port=int(os.getenv("GATEWAY_PORT", 5000)))
@@ -7,6 +7,7 @@ from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 
 from api.routes.routes import register_routes
+from databases.db_postgresql_conn import init_app
 from datetime import timedelta
 import coloredlogs
 
@@ -29,6 +30,7 @@ app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 mail = Mail(app)
 
 register_routes(app)
+init_app(app)
 
 
 if __name__ == '__main__':
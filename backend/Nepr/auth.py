@@ -5,6 +5,7 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 from api.routes.routes import register_routes_auth
+from databases.db_postgresql_conn import init_app
 from datetime import timedelta
 import coloredlogs
 
@@ -27,6 +28,7 @@ app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 mail = Mail(app)
 
 register_routes_auth(app)
+init_app(app)
 
 
 if __name__ == '__main__':
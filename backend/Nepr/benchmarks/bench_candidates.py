@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of recommendation candidate lookup in the article vector index.
+
+Builds synthetic clustered sparse vectors (articles about the same topic share most of their
+n-grams), then compares the LSH lookup of the nearest articles to a history centroid with an
+exhaustive scan, reporting the lookup time and the recall of the LSH top-k.
+
+Usage (from backend/Nepr):
+    python -m benchmarks.bench_candidates [--articles 200000] [--nnz 64] [--k 100] [--queries 20]
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from api.services.vector_index import ArticleVectorIndex
+
+TOPICS = 2000
+TOPIC_FEATURES = 64
+
+
+def make_vectors(count, nnz, n_features, rng):
+    """Builds L2-normalized sparse rows drawn mostly from the feature pool of a random topic."""
+    pools = rng.integers(0, n_features, size=(TOPICS, TOPIC_FEATURES))
+    topics = rng.integers(0, TOPICS, size=count)
+    topical = nnz * 7 // 8
+    columns = np.concatenate([
+        np.take_along_axis(pools[topics], rng.integers(0, TOPIC_FEATURES, size=(count, topical)), axis=1),
+        rng.integers(0, n_features, size=(count, nnz - topical))
+    ], axis=1).ravel()
+    values = rng.random(count * nnz, dtype=np.float32)
+    matrix = csr_matrix((values, columns, np.arange(0, count * nnz + 1, nnz)), shape=(count, n_features))
+    matrix.sum_duplicates()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return csr_matrix(matrix.multiply(1 / norms[:, None])), topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nearest-neighbour candidate lookup.")
+    parser.add_argument("--articles", type=int, default=200000)
+    parser.add_argument("--nnz", type=int, default=64)
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = ArticleVectorIndex(':memory:')
+    vectors, topics = make_vectors(args.articles, args.nnz, index.n_features, rng)
+    started = time.perf_counter()
+    index.replace([f"http://example.com/{row}" for row in range(args.articles)], vectors)
+    print(f"articles={args.articles} tables={index.lsh.tables} bits={index.lsh.bits} "
+          f"build={time.perf_counter() - started:.1f} s")
+
+    lookup_times, recalls = [], []
+    for _ in range(args.queries):
+        # History centroid: five articles of one topic
+        history = np.flatnonzero(topics == topics[rng.integers(0, args.articles)])[:5]
+        centroid = csr_matrix(vectors[history].mean(axis=0))
+
+        started = time.perf_counter()
+        found = index.nearest(centroid, k=args.k)
+        lookup_times.append(time.perf_counter() - started)
+
+        scores = np.asarray((vectors @ centroid.T).todense()).ravel()
+        exact = {f"http://example.com/{row}" for row in np.argsort(-scores)[:args.k]}
+        recalls.append(len(exact & {url for url, _ in found}) / args.k)
+
+    print(f"lookup: median {np.median(lookup_times) * 1000:.1f} ms, max {max(lookup_times) * 1000:.1f} ms")
+    print(f"recall@{args.k}: {np.mean(recalls):.2f}")
+
+
+if __name__ == "__main__":
+    main()
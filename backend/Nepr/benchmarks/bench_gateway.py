@@ -0,0 +1,70 @@
+"""
+Load test of the async gateway against a slow upstream.
+
+Starts an upstream that answers after a fixed delay (like article creation waiting on the
+scraper) and the async gateway in front of it, then sends many concurrent requests through the
+gateway, reporting the wall time, the share of requests served and the peak resident memory.
+
+Usage (from backend/Nepr):
+    python -m benchmarks.bench_gateway [--requests 2000] [--delay 1.0]
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_gataway_async import create_app
+from utils.gateway import SERVICES, RouteLimiter
+
+
+async def run(requests, delay):
+    async def slow(request):
+        await asyncio.sleep(delay)
+        return web.json_response({"url": request.query.get("url")})
+
+    upstream = web.Application()
+    upstream.router.add_get("/article/search", slow)
+    upstream_server = TestServer(upstream)
+    await upstream_server.start_server()
+    SERVICES["article"] = str(upstream_server.make_url("")).rstrip("/")
+    gateway_server = TestServer(create_app(RouteLimiter({})))
+    await gateway_server.start_server()
+
+    url = gateway_server.make_url("/article/search")
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as client:
+        async def call(index):
+            async with client.get(url, params={"url": f"http://{index}.com"}) as response:
+                await response.read()
+                return response.status
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(call(index) for index in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    await gateway_server.close()
+    await upstream_server.close()
+    return statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent requests through the async gateway.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--delay", type=float, default=1.0, help="Upstream response delay in seconds")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    statuses, elapsed = asyncio.run(run(args.requests, args.delay))
+    served = sum(status == 200 for status in statuses)
+    print(f"{args.requests} requests with a {args.delay}s upstream: {elapsed:.2f}s wall time, "
+          f"{served / len(statuses):.1%} served, "
+          f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark of article hydration on a synthetic 1,000-row article.
+
+Compares ArticleHydrator with the previous approach, which rescanned every result row
+to collect the sub-predicates of each nested author, image, audio or video row.
+
+Usage (from backend/Nepr):
+    python -m benchmarks.bench_hydration [--rows 1000] [--repeat 5]
+"""
+import argparse
+import timeit
+
+from api.services.article_hydrator import (ArticleHydrator, AGENT_DISPATCH, AGENT_PREDICATES, NESTED_DISPATCH,
+                                           SCHEMA)
+
+
+def make_rows(count):
+    """Builds article bindings: keywords plus authors, images and videos with several sub-predicates each."""
+    rows = []
+
+    def row(p, o, sub_p=None, sub_o=None):
+        result = {'p': {'value': f"{SCHEMA}{p}"}, 'o': {'value': o}}
+        if sub_p:
+            result['subP'] = {'value': f"{SCHEMA}{sub_p}"}
+            result['subO'] = {'value': sub_o}
+        rows.append(result)
+
+    row("headline", "Benchmark article")
+    index = 0
+    while len(rows) < count:
+        author = f"http://example.com/author/{index}"
+        row("author", author, "@type", "Person")
+        row("author", author, "name", f"Author {index}")
+        row("author", author, "jobTitle", "Journalist")
+        image = f"http://example.com/image/{index}"
+        row("image", image, "url", f"http://example.com/{index}.jpg")
+        row("image", image, "width", "640")
+        row("image", image, "height", "480")
+        video = f"http://example.com/video/{index}"
+        row("video", video, "contentUrl", f"http://example.com/{index}.mp4")
+        row("video", video, "duration", "PT1M")
+        row("keywords", f"keyword {index}")
+        index += 1
+    return rows[:count]
+
+
+def rescanning_hydrate(results, url):
+    """The previous strategy: every nested row rescans all rows for its sub-predicates."""
+    def populate(result, dispatch):
+        subject = result['o']['value']
+        pairs = [(r.get('subP', {}).get('value'), r.get('subO', {}).get('value'))
+                 for r in results if r['o']['value'] == subject]
+        return ArticleHydrator.build(pairs, dispatch)
+
+    article = {"url": url, "author": [], "publisher": [], "image": [], "audio": [], "video": [], "editor": []}
+    for result in results:
+        predicate = result['p']['value']
+        if predicate in AGENT_PREDICATES and result.get('subP', {}).get('value') == f"{SCHEMA}@type":
+            entity = populate(result, AGENT_DISPATCH[result['subO']['value']])
+            field = AGENT_PREDICATES[predicate]
+        elif predicate in NESTED_DISPATCH:
+            field, dispatch = NESTED_DISPATCH[predicate]
+            entity = populate(result, dispatch)
+        else:
+            continue
+        if entity not in article[field]:
+            article[field].append(entity)
+    return article
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark article hydration.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    url = "http://example.com/article"
+    hydrator = ArticleHydrator()
+
+    hydrated = hydrator.hydrate(rows, url)
+    rescanned = rescanning_hydrate(rows, url)
+    for field in ("author", "image", "video"):
+        assert hydrated[field] == rescanned[field], f"{field} differs"
+
+    rescan_time = min(timeit.repeat(lambda: rescanning_hydrate(rows, url), number=1, repeat=args.repeat))
+    grouped_time = min(timeit.repeat(lambda: hydrator.hydrate(rows, url), number=1, repeat=args.repeat))
+    print(f"rows={len(rows)} authors={len(hydrated['author'])} images={len(hydrated['image'])}")
+    print(f"rescanning: {rescan_time * 1000:.1f} ms")
+    print(f"grouped:    {grouped_time * 1000:.1f} ms")
+    print(f"speed-up:   {rescan_time / grouped_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
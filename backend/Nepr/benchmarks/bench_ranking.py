@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of the content similarity step of recommendation ranking.
+
+Compares the article vector index, which reuses precomputed vectors and only computes the
+candidate x viewed block, with the previous approach, which fitted a character TF-IDF
+vectorizer on every call and computed the full similarity matrix.
+
+Usage (from backend/Nepr):
+    python -m benchmarks.bench_ranking [--viewed 20] [--candidates 200] [--repeat 5]
+"""
+import argparse
+import random
+import timeit
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from api.services.vector_index import ArticleVectorIndex, article_text
+
+WORDS = ("climate", "election", "economy", "football", "summit", "market", "health", "science",
+         "energy", "policy", "research", "festival", "transport", "housing", "education", "budget")
+
+
+def make_articles(count, seed):
+    """Builds articles with random headlines, abstracts and keywords."""
+    rng = random.Random(seed)
+    return [{
+        'url': f"http://example.com/{seed}/{index}",
+        'headline': " ".join(rng.choices(WORDS, k=8)),
+        'abstract': " ".join(rng.choices(WORDS, k=40)),
+        'keywords': rng.sample(WORDS, 4)
+    } for index in range(count)]
+
+
+def refitting_similarity(viewed_articles, candidate_articles):
+    """The previous strategy: fit TF-IDF on every call and compute the full similarity matrix."""
+    vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(3, 5))
+    texts = [article_text(article) for article in viewed_articles + candidate_articles]
+    similarity_matrix = cosine_similarity(vectorizer.fit_transform(texts))
+    return similarity_matrix[len(viewed_articles):, :len(viewed_articles)].mean(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation similarity.")
+    parser.add_argument("--viewed", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    viewed = make_articles(args.viewed, 1)
+    candidates = make_articles(args.candidates, 2)
+    index = ArticleVectorIndex(':memory:', flush_every=len(viewed) + len(candidates) + 1)
+    for article in viewed + candidates:
+        index.add(article['url'], article)
+    index.save()
+    viewed_refs = [{'url': article['url']} for article in viewed]
+    candidate_refs = [{'url': article['url']} for article in candidates]
+
+    refit_time = min(timeit.repeat(lambda: refitting_similarity(viewed, candidates), number=1, repeat=args.repeat))
+    index_time = min(timeit.repeat(lambda: index.similarity(viewed_refs, candidate_refs), number=1,
+                                   repeat=args.repeat))
+    print(f"viewed={len(viewed)} candidates={len(candidates)}")
+    print(f"refitting:    {refit_time * 1000:.1f} ms")
+    print(f"vector index: {index_time * 1000:.1f} ms")
+    print(f"speed-up:     {refit_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,152 @@
 # db_postgresql_conn.py
 import logging
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from flask import has_app_context, g
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, scoped_session
 from dotenv import load_dotenv
 
 import os
-import sys
+import threading
+import weakref
 
 load_dotenv()
 
+_ready_tables = weakref.WeakKeyDictionary()
+_ready_tables_lock = threading.Lock()
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+_pool_counters = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidated": 0}
+
+
+def _scope():
+    """Sessions are scoped to the Flask app context, or to the thread outside of requests."""
+    if has_app_context():
+        return id(g._get_current_object())
+    return threading.get_ident()
+
+
+Session = scoped_session(sessionmaker(), scopefunc=_scope)
+
+
+def ensure_table(engine, table):
+    """
+    Creates a table if it does not exist yet, checking once per engine and table.
+    Args:
+        engine: Engine of the database.
+        table: The SQLAlchemy table, e.g. UserProfile.__table__.
+    """
+    with _ready_tables_lock:
+        created = _ready_tables.setdefault(engine, set())
+        if table.name not in created:
+            table.create(bind=engine, checkfirst=True)
+            created.add(table.name)
+
+
+def _count(name):
+    def listener(*args):
+        _pool_counters[name] += 1
+    return listener
+
+
+def get_engine():
+    """
+    Returns the process-wide engine, creating it on first use. Its QueuePool is sized with
+    DB_POOL_SIZE, DB_MAX_OVERFLOW and DB_POOL_TIMEOUT; connections are pinged before use and
+    recycled after DB_POOL_RECYCLE seconds. A forked process gets an engine of its own.
+    Returns:
+        Engine: The shared engine.
+    """
+    global _engine, _engine_pid
+    with _engine_lock:
+        if _engine is None or _engine_pid != os.getpid():
+            if _engine is not None:
+                # Inherited from the parent process: drop its sessions and connections without closing them
+                Session.registry.clear()
+                _engine.dispose(close=False)
+            _engine = create_engine(
+                os.getenv("DATABASE_URI_POSTGRESQL"),
+                pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+                pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+                pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+                pool_pre_ping=True
+            )
+            for name, counter in [("connect", "connects"), ("checkout", "checkouts"),
+                                  ("checkin", "checkins"), ("invalidate", "invalidated")]:
+                event.listen(_engine, name, _count(counter))
+            _engine_pid = os.getpid()
+            Session.configure(bind=_engine)
+        return _engine
+
+
+def dispose_engine():
+    """
+    Closes the pooled connections and drops the shared engine; the next call creates a new one.
+    """
+    global _engine, _engine_pid
+    with _engine_lock:
+        Session.remove()
+        if _engine is not None:
+            _engine.dispose()
+        _engine, _engine_pid = None, None
+
+
+def pool_stats():
+    """
+    Reports the state of the connection pool.
+    Returns:
+        dict: The pool size, checked in and out connections, overflow, and the number of
+        connections opened, checkouts, checkins and invalidated connections since start.
+    """
+    engine = get_engine()
+    pool = engine.pool
+    stats = {"pool": pool.__class__.__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    stats.update(_pool_counters)
+    return stats
+
+
+def remove_session(exception=None):
+    """
+    Ends the session of the current scope, rolling back what was not committed and returning
+    its connection to the pool.
+    """
+    Session.remove()
+
+
+def init_app(app):
+    """
+    Ties the session lifecycle to the Flask app context: the session of a request is removed
+    when its app context is torn down, even if the route did not close it.
+    """
+    app.teardown_appcontext(remove_session)
+
+
 def connect():
-    connection_string = os.getenv("DATABASE_URI_POSTGRESQL")
-    try:
-        engine = create_engine(connection_string)
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        return session, engine
-    except Exception as e:
-        logging.error(f"Error connecting to database: {e}", file=sys.stderr)
-        sys.exit(1)
+    """
+    Returns the session of the current request (or thread) and the shared engine.
+    Opening a session only checks a connection out of the pool when it is first used.
+    """
+    engine = get_engine()
+    return Session(), engine
+
 
-def close(session,engine):
+def close(session, engine=None):
+    """
+    Commits and closes a session, returning its connection to the pool. The engine is kept.
+    """
     try:
         if session.is_active:
             session.commit()
         session.close()
-        engine.dispose()
         logging.info("Session successfully closed.")
     except Exception as e:
         logging.error(f"Error while closing the session: {str(e)}")
         session.rollback()  # Rollback if any error occurred
+        session.close()
         logging.error("Session rollback completed due to error.")
-
-
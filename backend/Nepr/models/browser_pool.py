@@ -0,0 +1,135 @@
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+
+
+class BrowserPool:
+    """A size-bounded pool of long-lived headless Chrome drivers that scrapers lease per page."""
+
+    def __init__(self, service, options, size=None, max_pages=None, lease_timeout=None, factory=None):
+        """
+        Args:
+            service (Service): The chromedriver service used to start new browsers.
+            options (ChromeOptions): The options used to start new browsers.
+            size (int): Maximum number of browsers alive (and pages rendered) at the same time.
+            max_pages (int): Number of pages a browser renders before it is recycled.
+            lease_timeout (float): Seconds to wait for a free browser before giving up.
+            factory (callable): Creates a new driver; defaults to a Chrome webdriver.
+        """
+        self.service = service
+        self.options = options
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", 2))
+        self.max_pages = max_pages or int(os.getenv("BROWSER_MAX_PAGES", 50))
+        self.lease_timeout = lease_timeout or float(os.getenv("BROWSER_LEASE_TIMEOUT", 60))
+        self.factory = factory or self._create_driver
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._leased = 0
+        self._started = 0
+        self._recycled = 0
+        self._restarts = 0
+
+    def _create_driver(self):
+        return webdriver.Chrome(service=self.service, options=self.options)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f"Error closing browser: {e}")
+
+    @contextmanager
+    def lease(self):
+        """
+        Leases a browser for the duration of the block.
+        A browser that raises anything other than a wait timeout is considered crashed and replaced.
+        Raises:
+            TimeoutError: If no browser frees up within the lease timeout.
+        """
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise TimeoutError("No browser available in the pool")
+        entry = None
+        try:
+            with self._lock:
+                if self._idle:
+                    entry = self._idle.pop()
+                self._leased += 1
+            if entry is None:
+                entry = {"driver": self.factory(), "pages": 0}
+                with self._lock:
+                    self._started += 1
+            try:
+                yield entry["driver"]
+            except TimeoutException:
+                raise
+            except Exception:
+                logging.error("Browser failed while rendering, restarting it")
+                self._quit(entry["driver"])
+                with self._lock:
+                    self._restarts += 1
+                entry = None
+                raise
+        finally:
+            with self._lock:
+                self._leased -= 1
+            if entry is not None:
+                entry["pages"] += 1
+                if entry["pages"] >= self.max_pages:
+                    self._quit(entry["driver"])
+                    with self._lock:
+                        self._recycled += 1
+                else:
+                    with self._lock:
+                        self._idle.append(entry)
+            self._slots.release()
+
+    def stats(self):
+        """
+        Returns the pool metrics.
+        Returns:
+            dict: Leased, idle, started, recycled and restarted browser counts plus the pool size.
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "leased": self._leased,
+                "idle": len(self._idle),
+                "started": self._started,
+                "recycled": self._recycled,
+                "restarts": self._restarts
+            }
+
+    def close(self):
+        """Quits every idle browser."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._quit(entry["driver"])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool(service, options):
+    """
+    Returns the process-wide browser pool, creating it on first use.
+    Args:
+        service (Service): The chromedriver service used to start browsers.
+        options (ChromeOptions): The options used to start browsers.
+    Returns:
+        BrowserPool: The shared pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(service, options)
+            atexit.register(_pool.close)
+        return _pool
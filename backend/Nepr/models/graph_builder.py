@@ -8,16 +8,21 @@ from models.scraper import BeautifulSoupScraper
 from models.entity import Person, Organization, Author, Editor, Publisher
 from models.article import Article as ArticleModel
 from models.multimedia import AudioObject, ImageObject, VideoObject
+from models.wikidata import WikidataClient
+from utils.http_client import get_session
 
 
 class GraphBuilder:
-    def __init__(self, url,service,options):
+    def __init__(self, url, service, options, http=None, wikidata=None):
         self.graph = Graph()
         self.service = service
         self.options = options
+        self.http = http or get_session("wikidata")
+        self.wikidata = wikidata or WikidataClient(self.http)
         self.scraper = BeautifulSoupScraper(service,options)
         self.article = ArticleModel(node_uri=URIRef(url))
         self.json_ld_data = self.scraper.extract_json_ld(url)
+        self.json_ld_tier = self.scraper.json_ld_tier
         self.rdfa_data = self.scraper.extract_rdfa(url)
         self.article_data = self.scraper.extract_data(url)
 
@@ -196,119 +201,55 @@ class GraphBuilder:
             return organization
         return Organization(name=entity_name,node_uri=URIRef(entity_uri))
 
-    def get_wikidata_data(self, entity_name):
-        sparql_endpoint = "https://query.wikidata.org/sparql"
-
-        writing_keywords = [
-            'journalist', 'reporter', 'writer', 'author',
-            'columnist', 'editor', 'correspondent'
-        ]
-
-        query = f"""
-        SELECT ?entity ?entityLabel ?nationality ?nationalityLabel 
-               ?occupation ?occupationLabel ?birthDate ?birthPlace 
-               ?birthPlaceLabel ?deathDate ?deathPlace ?deathPlaceLabel 
-               ?affiliation ?affiliationLabel ?gender ?genderLabel
-        WHERE {{
-          {{
-            ?entity rdfs:label "{entity_name}"@en.
-          }} UNION {{
-            ?entity wdt:P2561 "{entity_name}"@en.
-          }}
-
-          OPTIONAL {{ ?entity wdt:P27 ?nationality. }}
-          OPTIONAL {{ ?entity wdt:P106 ?occupation. }}
-          OPTIONAL {{ ?entity wdt:P569 ?birthDate. }}
-          OPTIONAL {{ ?entity wdt:P19 ?birthPlace. }}
-          OPTIONAL {{ ?entity wdt:P570 ?deathDate. }}
-          OPTIONAL {{ ?entity wdt:P20 ?deathPlace. }}
-          OPTIONAL {{ ?entity wdt:P108 ?affiliation. }}
-          OPTIONAL {{ ?entity wdt:P21 ?gender. }}
-
-          SERVICE wikibase:label {{ bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }}
-        }}
-        LIMIT 10
+    @staticmethod
+    def collect_entity_names(json_ld):
         """
+        Collects the author, editor and publisher names of a JSON-LD article.
+        Args:
+            json_ld (dict): The article JSON-LD.
+        Returns:
+            tuple: (person names, organization names)
+        """
+        persons, organizations = [], []
+        for key in ('author', 'editor', 'publisher'):
+            value = json_ld.get(key)
+            items = value if isinstance(value, list) else [value]
+            names = organizations if key == 'publisher' else persons
+            for item in items:
+                name = item.get('name') if isinstance(item, dict) else item
+                if isinstance(name, str) and name:
+                    names.append(name)
+        return persons, organizations
+
+    def prefetch_entities(self, json_ld):
+        """
+        Resolves every author, editor and publisher of the article in batched Wikidata queries,
+        so the per-entity lookups made while building the graph are answered from the cache.
+        Args:
+            json_ld (dict): The article JSON-LD.
+        """
+        if not isinstance(json_ld, dict):
+            return
+        persons, organizations = self.collect_entity_names(json_ld)
+        if persons:
+            self.wikidata.prefetch_persons(persons)
+        if organizations:
+            self.wikidata.prefetch_organizations(organizations)
 
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0',
-                'Accept': 'application/sparql-results+json'
-            }
-
-            response = requests.get(sparql_endpoint,
-                                    params={"query": query, "format": "json"},
-                                    headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            if not data['results']['bindings']:
-                return None
-            matching_results = [
-                result for result in data['results']['bindings']
-                if 'occupationLabel' in result and
-                   result['occupationLabel'].get('value', '').lower() in writing_keywords
-            ]
-            if matching_results:
-                logging.info(f"Matching results: {matching_results}")
-                return self._extract_entity_info(matching_results[0])
-            return None
-
-        except Exception as e:
-            logging.error(f"Wikidata retrieval error: {e}")
-            return None
+    def get_wikidata_data(self, entity_name):
+        """
+        Fetches the Wikidata details of a writer, answering repeated names from the cache.
+        """
+        return self.wikidata.get_person(entity_name)
 
     def _extract_entity_info(self, result):
-        return {
-            'nationality': result.get('nationalityLabel', {}).get('value'),
-            'jobTitle': result.get('occupationLabel', {}).get('value'),
-            'birthDate': result.get('birthDate', {}).get('value'),
-            'birthPlace': result.get('birthPlaceLabel', {}).get('value'),
-            'deathDate': result.get('deathDate', {}).get('value'),
-            'deathPlace': result.get('deathPlaceLabel', {}).get('value'),
-            'affiliation': result.get('affiliationLabel', {}).get('value'),
-            'gender': result.get('genderLabel', {}).get('value')
-        }
+        return self.wikidata.extract_entity_info(result)
 
     def get_organization_wikidata_data(self, entity_name):
         """
         Fetch structured data for an organization (e.g., nationality, industry, CEO, publishing principles) from Wikidata.
         """
-        logging.info(f"Fetching Wikidata data for organization: {entity_name}")
-        sparql_endpoint = "https://query.wikidata.org/sparql"
-
-        query = f"""
-                   SELECT ?entity ?publishingPrinciples WHERE {{
-                     ?entity rdfs:label "{entity_name}"@en; 
-                     OPTIONAL {{ ?entity wdt:P1454 ?publishingPrinciples. }}  
-                   }}
-                   LIMIT 10
-                   """
-        logging.info(query)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/sparql-results+json'
-        }
-
-        try:
-            response = requests.get(sparql_endpoint, params={"query": query, "format": "json"}, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            # Process the results to find the first entity with publishing principles
-            for result in data['results']['bindings']:
-                publishing_principles = result.get('publishingPrinciples', {}).get('value')
-                if publishing_principles:  # Check if publishing principles exist
-                    return {
-                        'organization': result['entity']['value'],  # Use entity URI
-                        'publishingPrinciples': publishing_principles
-                    }
-
-            # If no entity with publishing principles is found, return None
-            return None
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Request failed- Wiki: {e}")
-            return None
+        return self.wikidata.get_organization(entity_name)
 
     @staticmethod
     def _set_key(key):
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy import Column, String, Text, DateTime, Float, Integer, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 import uuid
@@ -37,4 +37,52 @@ class UserFavorites(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_email = Column(String, ForeignKey('users.email', ondelete='CASCADE'), nullable=False)
     article_url = Column(Text, nullable=False)
-    date_favorited = Column(DateTime, nullable=False, default=datetime.now())
\ No newline at end of file
+    date_favorited = Column(DateTime, nullable=False, default=datetime.now())
+
+class UserProfile(Base):
+    """
+    Reading preferences of a user, updated on every history entry.
+    Counters and weights are exponentially decayed; they are stored as of updated_at.
+    """
+    __tablename__ = 'user_profiles'
+    user_email = Column(String, ForeignKey('users.email', ondelete='CASCADE'), primary_key=True)
+    keyword_counts = Column(JSON, nullable=False, default=dict)
+    author_counts = Column(JSON, nullable=False, default=dict)
+    publisher_counts = Column(JSON, nullable=False, default=dict)
+    wordcount_sketch = Column(JSON, nullable=False, default=dict)
+    centroid = Column(JSON, nullable=False, default=dict)
+    weight = Column(Float, nullable=False, default=0.0)
+    date_published_min = Column(DateTime)
+    date_published_max = Column(DateTime)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+class UserRecommendations(Base):
+    """Recommendations precomputed for a user by the batch job."""
+    __tablename__ = 'user_recommendations'
+    user_email = Column(String, ForeignKey('users.email', ondelete='CASCADE'), primary_key=True)
+    recommendations = Column(JSON, nullable=False, default=list)
+    generated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+class IngestJob(Base):
+    """
+    An asynchronous article ingest. Stored in the user database so that every replica of the
+    article service can report it, and so it survives restarts.
+    """
+    __tablename__ = 'ingest_jobs'
+    id = Column(String, primary_key=True)
+    user_email = Column(String, index=True)
+    url = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="queued")
+    submitted_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    timings = Column(JSON, nullable=False, default=dict)
+    extraction_tier = Column(String)
+    message = Column(Text)
+    result = Column(JSON)
+
+class DatasetVersion(Base):
+    """Number of writes to a Fuseki dataset, shared by every process caching its query results."""
+    __tablename__ = 'dataset_versions'
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
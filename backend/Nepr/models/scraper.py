@@ -1,6 +1,7 @@
 import demjson3
-from playwright.sync_api import sync_playwright
 import json
+import os
+from urllib.parse import urlparse
 from goose3 import Goose
 import langcodes
 import requests
@@ -18,10 +19,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+from models.browser_pool import get_browser_pool
+from utils.http_client import get_session
+
 class BeautifulSoupScraper:
     """A scraper class using BeautifulSoup to extract data from web pages."""
 
-    def __init__(self,service,options):
+    def __init__(self, service, options, browser_pool=None, http=None):
         logging.basicConfig(level=logging.INFO)
         DetectorFactory.seed = 0
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36"
@@ -32,6 +36,57 @@ class BeautifulSoupScraper:
         self.soup = None
         self.service = service
         self.options = options
+        self.browser_pool = browser_pool
+        self.http = http or get_session("publisher", retries=0, pool_connections=50)
+        self.headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Connection': 'keep-alive'
+        }
+        self.json_ld_tier = None
+        self.pages = {}
+        self.soups = {}
+        self.goose_articles = {}
+
+    def fetch_page(self, url):
+        """
+        Downloads a webpage once and keeps the response so every extractor reads the same bytes.
+        A failed download is kept too, so the other extractors fail at once instead of retrying it.
+        Args:
+            url (str): The URL of the webpage to fetch.
+        Returns:
+            requests.Response: The response holding the raw HTML of the page.
+        Raises:
+            ValueError: If the page could not be retrieved.
+        """
+        if url not in self.pages:
+            try:
+                self.pages[url] = self._get_html_content(url)
+            except ValueError as e:
+                self.pages[url] = e
+        if isinstance(self.pages[url], Exception):
+            raise self.pages[url]
+        return self.pages[url]
+
+    def _get_browser_pool(self):
+        """Returns the injected browser pool, falling back to the process-wide one."""
+        if self.browser_pool is None:
+            self.browser_pool = get_browser_pool(self.service, self.options)
+        return self.browser_pool
+
+    def _get_soup(self, url):
+        """Parses the fetched page with BeautifulSoup, reusing the parsed tree on later calls."""
+        if url not in self.soups:
+            self.soups[url] = BeautifulSoup(self.fetch_page(url).content, 'html.parser')
+        return self.soups[url]
+
+    def _get_goose_article(self, url):
+        """Runs Goose over the fetched HTML instead of letting it download the page again."""
+        if url not in self.goose_articles:
+            g = Goose()
+            self.goose_articles[url] = g.extract(url=url, raw_html=self.fetch_page(url).text)
+        return self.goose_articles[url]
 
     def extract_json_ld(self, url):
         """
@@ -43,25 +98,14 @@ class BeautifulSoupScraper:
         """
 
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Connection': 'keep-alive'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = self.fetch_page(url)
+            soup = self._get_soup(url)
             html_content = response.text
             self.soup = soup
             json_ld_data = self.extract_main_article_json_ld(soup, html_content, url)
             return json_ld_data
 
-        except requests.exceptions.Timeout:
-            logging.error(f"Request timed out while trying to fetch the URL: {url}")
-            return None
-
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logging.error(f"Error fetching URL: {e}")
             return None
 
@@ -74,10 +118,9 @@ class BeautifulSoupScraper:
             dict: A dictionary containing all extracted RDFa metadata without application details.
         """
         try:
-            g = Goose()
-            article_goose = g.extract(url=url)
+            article_goose = self._get_goose_article(url)
             logging.info(f"Goose article: {article_goose.opengraph}")
-            rdfa_data_extracted = article_goose.opengraph
+            rdfa_data_extracted = dict(article_goose.opengraph)
             if 'title' in rdfa_data_extracted:
                 rdfa_data_extracted['headline'] = rdfa_data_extracted.pop('title')
             if 'rich_attachment' in rdfa_data_extracted:
@@ -95,22 +138,25 @@ class BeautifulSoupScraper:
             return None
 
     def _get_html_content(self, url):
-        """Fetches the HTML content of a page with retry mechanism."""
-        headers = {"User-Agent": self.user_agent}
-
+        """Fetches the HTML content of a page with retry mechanism, waiting 2 s between attempts."""
         for attempt in range(self.max_attempts):
+            if attempt:
+                time.sleep(2)
             try:
-                response = requests.get(url, headers=headers, timeout=self.timeout)
+                response = self.http.get(url, headers=self.headers, timeout=self.timeout)
                 if response.status_code == 200:
                     return response
             except requests.RequestException:
-                time.sleep(2)
+                pass
         raise ValueError("Failed to retrieve webpage after multiple attempts.")
 
-    def _parse_article(self, article):
-        """Downloads, parses and processes an article."""
+    def _parse_article(self, article, html=None):
+        """Downloads (or loads the already fetched HTML), parses and processes an article."""
         try:
-            article.download()
+            if html:
+                article.download(input_html=html)
+            else:
+                article.download()
             article.parse()
             article.nlp()
             return article
@@ -124,12 +170,11 @@ class BeautifulSoupScraper:
         Returns: dict: A dictionary containing the extracted data.
             """
 
-        response = self._get_html_content(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        g = Goose()
-        article_goose = g.extract(url=url)
+        response = self.fetch_page(url)
+        soup = self._get_soup(url)
+        article_goose = self._get_goose_article(url)
         article = Article(url)
-        article = self._parse_article(article)
+        article = self._parse_article(article, response.text)
         content = article_goose.cleaned_text
         headline = article_goose.title
         logging.info(f"Goose content: {content}")
@@ -217,21 +262,20 @@ class BeautifulSoupScraper:
             list: A list of JSON-LD scripts or None if none are found.
         """
 
-        driver = webdriver.Chrome(service=self.service, options=self.options)
-        driver.get(url)
+        with self._get_browser_pool().lease() as driver:
+            driver.get(url)
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'player-microformat-renderer')))
+            json_ld_scripts = driver.find_elements(By.XPATH, '//script[@type="application/ld+json"]')
+            script_contents = [script.get_attribute('innerHTML') for script in json_ld_scripts]
 
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'player-microformat-renderer')))
-        json_ld_scripts = driver.find_elements(By.XPATH, '//script[@type="application/ld+json"]')
         json_ld_data = []
-        for script in json_ld_scripts:
-            script_content = script.get_attribute('innerHTML')
+        for script_content in script_contents:
             try:
                 json_data = json.loads(script_content)
                 json_ld_data.append(json_data)
             except json.JSONDecodeError:
                 logging.error(f"Error decoding JSON from script: {script_content}")
 
-        driver.quit()
         if not json_ld_data:
             logging.info("No JSON-LD scripts found.")
             return None
@@ -241,6 +285,9 @@ class BeautifulSoupScraper:
     def extract_main_article_json_ld(self, soup, html_content, page_url):
         """
         Extracts the main article JSON-LD object, prioritizing one with matching 'mainEntityOfPage' or 'url'.
+        The JSON-LD embedded in the static HTML is tried first; the page is only rendered in a browser
+        when no article-typed node is found there or the site is flagged as JS-rendered.
+        The tier that produced the data is kept in `json_ld_tier` ('static' or 'rendered').
         Args:
             soup (BeautifulSoup): The parsed HTML content of the page.
             html_content (str): The raw HTML content of the webpage.
@@ -248,6 +295,87 @@ class BeautifulSoupScraper:
         Returns:
             dict: The JSON-LD object for the main article, or None if no match is found.
         """
+        self.json_ld_tier = None
+        if soup is not None and not self.is_js_rendered(page_url):
+            main_article = self.select_main_article_json_ld(self.extract_json_ld_static(soup), page_url)
+            if main_article:
+                logging.info("Main article JSON-LD found in the static HTML.")
+                self.json_ld_tier = "static"
+                return main_article
+            logging.info("No article JSON-LD in the static HTML, rendering the page.")
+
+        if 'youtube.com' in page_url:
+            json_ld_scripts = self.extract_json_ld_youtube(page_url)
+        else:
+            json_ld_scripts = self.extract_json_ld_selenium(page_url)
+
+        main_article = self.select_main_article_json_ld(json_ld_scripts, page_url)
+        if main_article:
+            self.json_ld_tier = "rendered"
+        return main_article
+
+    @staticmethod
+    def is_js_rendered(page_url):
+        """
+        Checks whether a page only exposes its JSON-LD after JavaScript runs.
+        Sites are flagged through the comma-separated JS_RENDERED_DOMAINS environment variable;
+        YouTube is always rendered.
+        Args:
+            page_url (str): The URL of the webpage.
+        Returns:
+            bool: True if the page must be rendered in a browser.
+        """
+        domains = ['youtube.com'] + [domain.strip() for domain in os.getenv("JS_RENDERED_DOMAINS", "").split(',')
+                                     if domain.strip()]
+        host = urlparse(page_url).netloc.lower()
+        return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+    def extract_json_ld_static(self, soup):
+        """
+        Extracts the JSON-LD scripts embedded in the already downloaded HTML.
+        Args:
+            soup (BeautifulSoup): The parsed HTML content of the page.
+        Returns:
+            list: A list of JSON-LD objects, or None if the page has none.
+        """
+        all_json_ld_data = []
+        for script in soup.find_all('script', type='application/ld+json'):
+            json_ld_data = self._load_json_ld(script.string or script.get_text())
+            if json_ld_data is not None:
+                all_json_ld_data.append(json_ld_data)
+        return all_json_ld_data if all_json_ld_data else None
+
+    @staticmethod
+    def _load_json_ld(json_ld_content):
+        """
+        Parses a JSON-LD script, repairing malformed JSON when possible.
+        Args:
+            json_ld_content (str): The content of the script tag.
+        Returns:
+            dict | list: The parsed JSON-LD, or None if it cannot be parsed.
+        """
+        if not json_ld_content or not json_ld_content.strip():
+            return None
+        try:
+            return json.loads(json_ld_content)
+        except json.JSONDecodeError:
+            logging.info(f"Attempting to fix malformed JSON:\n{json_ld_content[:100]}...")
+        try:
+            jsonrepair = pythonmonkey.require('jsonrepair').jsonrepair
+            return json.loads(jsonrepair(json_ld_content))
+        except Exception as e:
+            logging.error(f"Failed to fix JSON: {e}")
+            return None
+
+    def select_main_article_json_ld(self, json_ld_scripts, page_url):
+        """
+        Selects the main article object among the JSON-LD scripts of a page.
+        Args:
+            json_ld_scripts (list): The JSON-LD objects found on the page.
+            page_url (str): The URL of the webpage.
+        Returns:
+            dict: The JSON-LD object for the main article, or None if no match is found.
+        """
 
         def is_valid_type(item_type, valid_types):
             """Check if the @type field matches the desired types."""
@@ -293,11 +421,6 @@ class BeautifulSoupScraper:
                 logging.info(f"Unexpected JSON-LD format: {type(json_data)} - {json_data}")
             return None
 
-        if 'youtube.com' in page_url:
-            json_ld_scripts = self.extract_json_ld_youtube(page_url)
-        else:
-            json_ld_scripts = self.extract_json_ld_selenium(page_url)
-
         if not json_ld_scripts:
             logging.info("No JSON-LD scripts found.")
             return None
@@ -335,57 +458,27 @@ class BeautifulSoupScraper:
         logging.info("No matching JSON-LD found.")
         return None
 
-
-    @staticmethod
-    def extract_json_ld_selenium(url: str):
+    def extract_json_ld_selenium(self, url: str):
         """
-        Extracts JSON-LD data from a webpage using Selenium.
+        Extracts JSON-LD data from a webpage rendered by a browser leased from the pool.
         Args:
             url (str): The URL of the webpage to extract JSON-LD from.
         Returns:
             list: A list of JSON-LD objects extracted from the webpage.
         """
-        def make_json_valid(malformed_json: str) -> str:
-            """
-            Attempts to fix malformed JSON strings and return valid JSON.
-            Args:
-                malformed_json (str): The malformed JSON string.
-            Returns:
-                str: A corrected JSON string or raises an error if unfixable.
-            """
-            try:
-                jsonrepair = pythonmonkey.require('jsonrepair').jsonrepair
-                repaired = jsonrepair(malformed_json)
-                return repaired
-            except demjson3.JSONDecodeError as e:
-                logging.error(f"Failed to fix JSON: {e}")
-                return None
-
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url)
-            page.wait_for_load_state('domcontentloaded')
-
-            json_ld_scripts = page.query_selector_all('script[type="application/ld+json"]')
-            all_json_ld_data = []
-            for script in json_ld_scripts:
-                try:
-                    json_ld_content = script.inner_text()
-                    try:
-                        json_ld_data = json.loads(json_ld_content)
-                    except json.JSONDecodeError:
-                        logging.info(f"Attempting to fix malformed JSON:\n{json_ld_content[:100]}...")
-                        fixed_json = make_json_valid(json_ld_content)
-                        if fixed_json:
-                            json_ld_data = json.loads(fixed_json)
-                        else:
-                            continue
+        with self._get_browser_pool().lease() as driver:
+            driver.get(url)
+            json_ld_scripts = driver.find_elements(By.CSS_SELECTOR, 'script[type="application/ld+json"]')
+            script_contents = [script.get_attribute('innerHTML') for script in json_ld_scripts]
 
+        all_json_ld_data = []
+        for json_ld_content in script_contents:
+            try:
+                json_ld_data = self._load_json_ld(json_ld_content)
+                if json_ld_data is not None:
                     all_json_ld_data.append(json_ld_data)
-                except Exception as e:
-                    logging.error(f"An error occurred while processing script: {e}")
-                    continue
+            except Exception as e:
+                logging.error(f"An error occurred while processing script: {e}")
+                continue
 
-            browser.close()
-            return all_json_ld_data if all_json_ld_data else None
\ No newline at end of file
+        return all_json_ld_data if all_json_ld_data else None
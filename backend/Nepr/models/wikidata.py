@@ -0,0 +1,275 @@
+import argparse
+import logging
+import os
+
+import requests
+
+from models.wikidata_cache import get_wikidata_cache
+from utils.http_client import get_session
+from utils.ttl_cache import MISSING
+
+SPARQL_ENDPOINT = "https://query.wikidata.org/sparql"
+
+WRITING_KEYWORDS = [
+    'journalist', 'reporter', 'writer', 'author',
+    'columnist', 'editor', 'correspondent'
+]
+
+KNOWN_PUBLISHERS = [
+    "Reuters", "Associated Press", "Agence France-Presse", "BBC News", "CNN",
+    "The New York Times", "The Washington Post", "The Guardian", "Al Jazeera",
+    "Bloomberg News", "NPR", "Financial Times", "The Wall Street Journal"
+]
+
+
+class WikidataClient:
+    """Looks up authors and publishers on Wikidata, answering repeated names from the cache."""
+
+    def __init__(self, http=None, cache=None, batch_size=None):
+        self.http = http or get_session("wikidata")
+        self.cache = cache or get_wikidata_cache()
+        self.batch_size = batch_size or int(os.getenv("WIKIDATA_BATCH_SIZE", 50))
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+    def get_person(self, entity_name):
+        """
+        Returns the Wikidata details of a writer (journalist, reporter, editor, ...).
+        Args:
+            entity_name (str): Name of the person.
+        Returns:
+            dict: The person details, or None if no writer matches or the query failed.
+        """
+        cached = self.cache.get('person', entity_name)
+        if cached is not MISSING:
+            return cached
+        try:
+            data = self.fetch_person(entity_name)
+        except Exception as e:
+            logging.error(f"Wikidata retrieval error: {e}")
+            return None
+        self.cache.set('person', entity_name, data)
+        return data
+
+    def get_organization(self, entity_name):
+        """
+        Returns the Wikidata details of an organization.
+        Args:
+            entity_name (str): Name of the organization.
+        Returns:
+            dict: The organization URI and publishing principles, or None if not found.
+        """
+        cached = self.cache.get('organization', entity_name)
+        if cached is not MISSING:
+            return cached
+        try:
+            data = self.fetch_organization(entity_name)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request failed- Wiki: {e}")
+            return None
+        self.cache.set('organization', entity_name, data)
+        return data
+
+    def fetch_person(self, entity_name):
+        """Queries Wikidata for a person, raising on request errors."""
+        query = f"""
+        SELECT ?entity ?entityLabel ?nationality ?nationalityLabel
+               ?occupation ?occupationLabel ?birthDate ?birthPlace
+               ?birthPlaceLabel ?deathDate ?deathPlace ?deathPlaceLabel
+               ?affiliation ?affiliationLabel ?gender ?genderLabel
+        WHERE {{
+          {{
+            ?entity rdfs:label "{self._escape(entity_name)}"@en.
+          }} UNION {{
+            ?entity wdt:P2561 "{self._escape(entity_name)}"@en.
+          }}
+
+          OPTIONAL {{ ?entity wdt:P27 ?nationality. }}
+          OPTIONAL {{ ?entity wdt:P106 ?occupation. }}
+          OPTIONAL {{ ?entity wdt:P569 ?birthDate. }}
+          OPTIONAL {{ ?entity wdt:P19 ?birthPlace. }}
+          OPTIONAL {{ ?entity wdt:P570 ?deathDate. }}
+          OPTIONAL {{ ?entity wdt:P20 ?deathPlace. }}
+          OPTIONAL {{ ?entity wdt:P108 ?affiliation. }}
+          OPTIONAL {{ ?entity wdt:P21 ?gender. }}
+
+          SERVICE wikibase:label {{ bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }}
+        }}
+        LIMIT 10
+        """
+        headers = {
+            'User-Agent': 'Mozilla/5.0',
+            'Accept': 'application/sparql-results+json'
+        }
+        response = self.http.get(SPARQL_ENDPOINT,
+                                 params={"query": query, "format": "json"},
+                                 headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        return self._select_person(data['results']['bindings'])
+
+    def _select_person(self, bindings):
+        """Picks the first result whose occupation is a writing job."""
+        if not bindings:
+            return None
+        matching_results = [
+            result for result in bindings
+            if 'occupationLabel' in result and
+               result['occupationLabel'].get('value', '').lower() in WRITING_KEYWORDS
+        ]
+        if matching_results:
+            logging.info(f"Matching results: {matching_results}")
+            return self.extract_entity_info(matching_results[0])
+        return None
+
+    def fetch_organization(self, entity_name):
+        """Queries Wikidata for an organization, raising on request errors."""
+        logging.info(f"Fetching Wikidata data for organization: {entity_name}")
+        query = f"""
+                   SELECT ?entity ?publishingPrinciples WHERE {{
+                     ?entity rdfs:label "{self._escape(entity_name)}"@en;
+                     OPTIONAL {{ ?entity wdt:P1454 ?publishingPrinciples. }}
+                   }}
+                   LIMIT 10
+                   """
+        logging.info(query)
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'application/sparql-results+json'
+        }
+        response = self.http.get(SPARQL_ENDPOINT, params={"query": query, "format": "json"}, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        return self._select_organization(data['results']['bindings'])
+
+    @staticmethod
+    def _select_organization(bindings):
+        """Picks the first entity that has publishing principles."""
+        for result in bindings:
+            publishing_principles = result.get('publishingPrinciples', {}).get('value')
+            if publishing_principles:
+                return {
+                    'organization': result['entity']['value'],
+                    'publishingPrinciples': publishing_principles
+                }
+        return None
+
+    def prefetch_persons(self, names):
+        """
+        Resolves every uncached person name with one VALUES query per chunk and caches the answers.
+        Args:
+            names (list): Person names, e.g. all authors and editors of an article.
+        """
+        self._prefetch('person', names, """
+        SELECT ?name ?entity ?nationalityLabel ?occupationLabel ?birthDate ?birthPlaceLabel
+               ?deathDate ?deathPlaceLabel ?affiliationLabel ?genderLabel
+        WHERE {{
+          VALUES ?name {{ {values} }}
+          {{ ?entity rdfs:label ?name. }} UNION {{ ?entity wdt:P2561 ?name. }}
+
+          OPTIONAL {{ ?entity wdt:P27 ?nationality. }}
+          OPTIONAL {{ ?entity wdt:P106 ?occupation. }}
+          OPTIONAL {{ ?entity wdt:P569 ?birthDate. }}
+          OPTIONAL {{ ?entity wdt:P19 ?birthPlace. }}
+          OPTIONAL {{ ?entity wdt:P570 ?deathDate. }}
+          OPTIONAL {{ ?entity wdt:P20 ?deathPlace. }}
+          OPTIONAL {{ ?entity wdt:P108 ?affiliation. }}
+          OPTIONAL {{ ?entity wdt:P21 ?gender. }}
+
+          SERVICE wikibase:label {{ bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }}
+        }}
+        """, self._select_person)
+
+    def prefetch_organizations(self, names):
+        """
+        Resolves every uncached organization name with one VALUES query per chunk and caches the answers.
+        Args:
+            names (list): Organization names, e.g. all publishers of an article.
+        """
+        self._prefetch('organization', names, """
+        SELECT ?name ?entity ?publishingPrinciples WHERE {{
+          VALUES ?name {{ {values} }}
+          ?entity rdfs:label ?name.
+          OPTIONAL {{ ?entity wdt:P1454 ?publishingPrinciples. }}
+        }}
+        """, self._select_organization)
+
+    def _prefetch(self, kind, names, query_template, select):
+        pending = {}
+        for name in names:
+            if name and isinstance(name, str) and self.cache.get(kind, name) is MISSING:
+                pending.setdefault(self.cache.normalize(name), name)
+        pending_names = list(pending.values())
+        headers = {
+            'User-Agent': 'Mozilla/5.0',
+            'Accept': 'application/sparql-results+json'
+        }
+        for start in range(0, len(pending_names), self.batch_size):
+            chunk = pending_names[start:start + self.batch_size]
+            values = " ".join(f'"{self._escape(name)}"@en' for name in chunk)
+            try:
+                response = self.http.get(SPARQL_ENDPOINT,
+                                         params={"query": query_template.format(values=values), "format": "json"},
+                                         headers=headers)
+                response.raise_for_status()
+                bindings = response.json()['results']['bindings']
+            except Exception as e:
+                logging.error(f"Wikidata batch retrieval error: {e}")
+                continue
+            grouped = {self.cache.normalize(name): [] for name in chunk}
+            for result in bindings:
+                key = self.cache.normalize(result.get('name', {}).get('value', ''))
+                if key in grouped:
+                    grouped[key].append(result)
+            for name in chunk:
+                self.cache.set(kind, name, select(grouped[self.cache.normalize(name)]))
+
+    @staticmethod
+    def extract_entity_info(result):
+        return {
+            'nationality': result.get('nationalityLabel', {}).get('value'),
+            'jobTitle': result.get('occupationLabel', {}).get('value'),
+            'birthDate': result.get('birthDate', {}).get('value'),
+            'birthPlace': result.get('birthPlaceLabel', {}).get('value'),
+            'deathDate': result.get('deathDate', {}).get('value'),
+            'deathPlace': result.get('deathPlaceLabel', {}).get('value'),
+            'affiliation': result.get('affiliationLabel', {}).get('value'),
+            'gender': result.get('genderLabel', {}).get('value')
+        }
+
+    def warm_up(self, names, kind='organization'):
+        """
+        Preloads the cache with a list of entities.
+        Args:
+            names (list): Entity names to resolve.
+            kind (str): 'organization' or 'person'.
+        Returns:
+            int: Number of names that were not cached yet and have been looked up.
+        """
+        pending = [name for name in names if self.cache.get(kind, name) is MISSING]
+        if kind == 'organization':
+            self.prefetch_organizations(pending)
+        else:
+            self.prefetch_persons(pending)
+        return len(pending)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preload the Wikidata enrichment cache.")
+    parser.add_argument("names", nargs="*", help="Entity names to preload (defaults to well-known publishers)")
+    parser.add_argument("--file", help="File with one entity name per line")
+    parser.add_argument("--kind", choices=["organization", "person"], default="organization")
+    args = parser.parse_args()
+
+    names = list(args.names)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            names.extend(line.strip() for line in f if line.strip())
+    if not names:
+        names = KNOWN_PUBLISHERS
+
+    client = WikidataClient()
+    loaded = client.warm_up(names, kind=args.kind)
+    print(f"Preloaded {loaded} of {len(names)} {args.kind} entries. Cache stats: {client.cache.stats()}")
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from utils.ttl_cache import TTLCache, MISSING
+
+
+class WikidataCache:
+    """
+    Caches Wikidata enrichment results per entity kind and normalized name.
+    An in-process LRU sits in front of an SQLite store so entries survive restarts.
+    "No match" results are cached too, with a shorter lifetime.
+    """
+
+    def __init__(self, path=None, ttl=None, negative_ttl=None, maxsize=None):
+        """
+        Args:
+            path (str): SQLite file of the persistent store, ':memory:' keeps it in process.
+            ttl (float): Lifetime in seconds of a found entity.
+            negative_ttl (float): Lifetime in seconds of a "no match" result.
+            maxsize (int): Number of entries kept in the in-process LRU.
+        """
+        self.path = path or os.getenv("WIKIDATA_CACHE_PATH", "wikidata_cache.sqlite3")
+        self.ttl = ttl or float(os.getenv("WIKIDATA_CACHE_TTL", 7 * 24 * 3600))
+        self.negative_ttl = negative_ttl or float(os.getenv("WIKIDATA_NEGATIVE_TTL", 24 * 3600))
+        self.memory = TTLCache(maxsize or int(os.getenv("WIKIDATA_CACHE_SIZE", 10000)), self.ttl)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS wikidata_entities ("
+            "kind TEXT NOT NULL, name TEXT NOT NULL, payload TEXT, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, name))"
+        )
+        self._connection.commit()
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(name):
+        """Normalizes an entity name so spacing and case variants share one entry."""
+        return " ".join(str(name).split()).casefold()
+
+    def get(self, kind, name):
+        """
+        Looks up an entity.
+        Args:
+            kind (str): The entity kind, e.g. 'person' or 'organization'.
+            name (str): The entity name.
+        Returns:
+            The cached Wikidata data, None for a cached "no match", or MISSING when not cached.
+        """
+        key = (kind, self.normalize(name))
+        value = self.memory.get(key)
+        if value is MISSING:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT payload, expires_at FROM wikidata_entities WHERE kind = ? AND name = ?", key
+                ).fetchone()
+            if row is None or row[1] < time.time():
+                self.misses += 1
+                return MISSING
+            value = json.loads(row[0]) if row[0] is not None else None
+            self.memory.set(key, value, ttl=row[1] - time.time())
+            self.disk_hits += 1
+        if value is None:
+            self.negative_hits += 1
+        return value
+
+    def set(self, kind, name, value):
+        """
+        Stores the Wikidata data of an entity; None records a "no match".
+        Args:
+            kind (str): The entity kind, e.g. 'person' or 'organization'.
+            name (str): The entity name.
+            value (dict): The Wikidata data or None.
+        """
+        key = (kind, self.normalize(name))
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self.memory.set(key, value, ttl=ttl)
+        payload = json.dumps(value) if value is not None else None
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO wikidata_entities (kind, name, payload, expires_at) VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], payload, time.time() + ttl)
+                )
+                self._connection.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Error writing Wikidata cache: {e}")
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        Returns:
+            dict: In-process LRU counters plus disk hits, negative hits and misses.
+        """
+        memory_stats = self.memory.stats()
+        return {
+            "memory": memory_stats,
+            "disk_hits": self.disk_hits,
+            "negative_hits": self.negative_hits,
+            "hits": memory_stats["hits"] + self.disk_hits,
+            "misses": self.misses
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_wikidata_cache():
+    """
+    Returns the process-wide Wikidata cache, creating it on first use.
+    Returns:
+        WikidataCache: The shared cache.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = WikidataCache()
+        return _cache
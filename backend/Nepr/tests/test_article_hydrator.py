@@ -0,0 +1,68 @@
+import unittest
+
+from api.services.article_hydrator import ArticleHydrator
+
+SCHEMA = "http://schema.org/"
+
+
+def row(p, o, sub_p=None, sub_o=None):
+    result = {'p': {'value': f"{SCHEMA}{p}"}, 'o': {'value': o}}
+    if sub_p:
+        result['subP'] = {'value': f"{SCHEMA}{sub_p}"}
+        result['subO'] = {'value': sub_o}
+    return result
+
+
+class TestArticleHydrator(unittest.TestCase):
+    def setUp(self):
+        self.hydrator = ArticleHydrator()
+
+    def test_scalars_and_keywords(self):
+        article = self.hydrator.hydrate([
+            row("headline", "Title"),
+            row("wordCount", "120"),
+            row("keywords", "politics"),
+            row("keywords", "economy"),
+        ], "http://example.com/a")
+        self.assertEqual(article['url'], "http://example.com/a")
+        self.assertEqual(article['headline'], "Title")
+        self.assertEqual(article['wordCount'], 120)
+        self.assertEqual(article['keywords'], ["politics", "economy"])
+
+    def test_nested_entities_built_from_their_rows(self):
+        author = "http://example.com/author/Jane_Doe"
+        publisher = "http://example.com/publisher/Daily"
+        image = "http://example.com/image/1"
+        article = self.hydrator.hydrate([
+            row("author", author, "name", "Jane Doe"),
+            row("author", author, "@type", "Person"),
+            row("author", author, "nationality", "Romania"),
+            row("publisher", publisher, "@type", "Organization"),
+            row("publisher", publisher, "name", "Daily"),
+            row("image", image, "width", "640"),
+            row("image", image, "url", "http://example.com/1.jpg"),
+            row("editor", "http://example.com/editor/Ed", "name", "Ed"),
+            row("audio", "http://example.com/audio/1", "duration", "PT1M"),
+        ], "http://example.com/a")
+
+        self.assertEqual(len(article['author']), 1)
+        self.assertEqual(article['author'][0]['name'], "Jane Doe")
+        self.assertEqual(article['author'][0]['nationality'], "Romania")
+        self.assertEqual(article['publisher'][0]['name'], "Daily")
+        self.assertNotIn('jobTitle', article['publisher'][0])
+        self.assertEqual(article['image'], [{"height": None, "width": 640, "url": "http://example.com/1.jpg",
+                                             "@type": None}])
+        self.assertEqual(article['editor'][0]['name'], "Ed")
+        self.assertEqual(article['audio'][0]['duration'], "PT1M")
+
+    def test_invalid_row_is_skipped(self):
+        article = self.hydrator.hydrate([
+            row("wordCount", "many"),
+            row("headline", "Title"),
+        ], "http://example.com/a")
+        self.assertIsNone(article['wordCount'])
+        self.assertEqual(article['headline'], "Title")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from models.browser_pool import BrowserPool
+
+
+class TestBrowserPool(unittest.TestCase):
+    def setUp(self):
+        self.drivers = []
+
+        def factory():
+            driver = MagicMock()
+            self.drivers.append(driver)
+            return driver
+
+        self.pool = BrowserPool(None, None, size=1, max_pages=2, lease_timeout=0.1, factory=factory)
+
+    def test_lease_reuses_browser(self):
+        with self.pool.lease() as first:
+            pass
+        with self.pool.lease() as second:
+            self.assertEqual(self.pool.stats()['leased'], 1)
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.stats()['started'], 1)
+
+    def test_browser_recycled_after_max_pages(self):
+        for _ in range(3):
+            with self.pool.lease():
+                pass
+        self.drivers[0].quit.assert_called_once()
+        stats = self.pool.stats()
+        self.assertEqual(stats['started'], 2)
+        self.assertEqual(stats['recycled'], 1)
+        self.assertEqual(stats['idle'], 1)
+
+    def test_crashed_browser_is_restarted(self):
+        with self.assertRaises(WebDriverException):
+            with self.pool.lease():
+                raise WebDriverException("chrome not reachable")
+        self.drivers[0].quit.assert_called_once()
+        self.assertEqual(self.pool.stats()['restarts'], 1)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+    def test_wait_timeout_keeps_browser(self):
+        with self.assertRaises(TimeoutException):
+            with self.pool.lease():
+                raise TimeoutException("element not found")
+        self.drivers[0].quit.assert_not_called()
+        self.assertEqual(self.pool.stats()['idle'], 1)
+
+    def test_concurrency_cap(self):
+        with self.pool.lease():
+            with self.assertRaises(TimeoutError):
+                with self.pool.lease():
+                    pass
+        self.assertEqual(self.pool.stats()['leased'], 0)
+
+    def test_close_quits_idle_browsers(self):
+        with self.pool.lease():
+            pass
+        self.pool.close()
+        self.drivers[0].quit.assert_called_once()
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import math
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.services.cooccurrence_service import CooccurrenceIndex
+from databases.db_postgresql_conn import ensure_table
+from models.models import UserHistory, UserFavorites
+
+
+class TestCooccurrenceIndex(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        ensure_table(engine, UserHistory.__table__)
+        ensure_table(engine, UserFavorites.__table__)
+        self.session = sessionmaker(bind=engine)()
+        self.now = datetime(2024, 5, 1)
+        self.index = CooccurrenceIndex(neighbours=2, favorite_weight=3, refresh_seconds=0)
+
+    def tearDown(self):
+        self.session.close()
+
+    def view(self, email, url, minutes=0):
+        self.session.add(UserHistory(user_email=email, article_url=url,
+                                     date_accessed=self.now + timedelta(minutes=minutes)))
+        self.session.commit()
+
+    def test_neighbours_are_truncated_and_ordered(self):
+        self.index.add_interactions([
+            ("u1", "http://a.com", 1.0), ("u1", "http://b.com", 1.0), ("u1", "http://c.com", 1.0),
+            ("u2", "http://a.com", 1.0), ("u2", "http://b.com", 1.0),
+            ("u3", "http://d.com", 1.0)
+        ])
+        neighbours = self.index.neighbours_of("http://a.com")
+        self.assertEqual([url for url, _ in neighbours], ["http://b.com", "http://c.com"])
+        self.assertAlmostEqual(neighbours[0][1], 1.0)
+        self.assertEqual(self.index.neighbours_of("http://d.com"), [])
+        self.assertEqual(self.index.neighbours_of("http://unknown.com"), [])
+
+    def test_scores_exclude_history(self):
+        self.index.add_interactions([
+            ("u1", "http://a.com", 1.0), ("u1", "http://b.com", 1.0),
+            ("u2", "http://b.com", 1.0), ("u2", "http://c.com", 1.0)
+        ])
+        scores = self.index.scores(["http://a.com", "http://b.com"])
+        self.assertEqual(set(scores), {"http://c.com"})
+        self.assertAlmostEqual(scores["http://c.com"], (1 / math.sqrt(2)) / 2)
+        self.assertEqual(self.index.scores([]), {})
+
+    def test_favorites_weigh_more(self):
+        self.view("u1", "http://a.com")
+        self.view("u1", "http://b.com")
+        self.view("u2", "http://a.com")
+        self.view("u2", "http://c.com")
+        self.session.add(UserFavorites(user_email="u2", article_url="http://a.com", date_favorited=self.now))
+        self.session.commit()
+        self.assertEqual(self.index.refresh(self.session), 5)
+        self.assertEqual(self.index.neighbours_of("http://a.com")[0][0], "http://c.com")
+
+    def test_incremental_refresh_matches_rebuild(self):
+        self.view("u1", "http://a.com")
+        self.view("u1", "http://b.com")
+        self.index.refresh_if_stale(self.session).join()
+        self.assertEqual(self.index.stats()['interactions'], 2)
+
+        # Rows at the watermark that were already read are skipped
+        self.view("u2", "http://a.com")
+        self.view("u2", "http://c.com", minutes=5)
+        self.view("u1", "http://c.com", minutes=5)
+        self.assertEqual(self.index.refresh(self.session), 3)
+        self.assertEqual(self.index.refresh(self.session), 0)
+
+        rebuilt = CooccurrenceIndex(neighbours=2, favorite_weight=3)
+        rebuilt.refresh(self.session, rebuild=True)
+        for url in ["http://a.com", "http://b.com", "http://c.com"]:
+            self.assertEqual(self.index.neighbours_of(url), rebuilt.neighbours_of(url))
+        self.assertEqual(self.index.stats(), rebuilt.stats())
+
+    def test_new_readers_update_the_lists_their_article_appears_in(self):
+        self.index.add_interactions([("u1", "http://a.com", 1.0), ("u1", "http://b.com", 1.0),
+                                     ("u2", "http://b.com", 1.0), ("u2", "http://c.com", 1.0)])
+        # u3 only reads c, but the similarity of b to c changes with the norm of c
+        self.assertEqual(self.index.add_interactions([("u3", "http://c.com", 1.0)]), 2)
+
+        rebuilt = CooccurrenceIndex(neighbours=2)
+        rebuilt.add_interactions([("u1", "http://a.com", 1.0), ("u1", "http://b.com", 1.0),
+                                  ("u2", "http://b.com", 1.0), ("u2", "http://c.com", 1.0),
+                                  ("u3", "http://c.com", 1.0)])
+        for url in ["http://a.com", "http://b.com", "http://c.com"]:
+            self.assertEqual(self.index.neighbours_of(url), rebuilt.neighbours_of(url))
+
+    def test_refresh_runs_in_background_while_lookups_read_current_lists(self):
+        self.index.add_interactions([("u1", "http://a.com", 1.0), ("u1", "http://b.com", 1.0)])
+        self.view("u2", "http://a.com")
+        self.view("u2", "http://c.com")
+        with self.index._update_lock:
+            worker = self.index.refresh_if_stale(self.session)
+            self.assertIsNone(self.index.refresh_if_stale(self.session))
+            self.assertEqual([url for url, _ in self.index.neighbours_of("http://a.com")], ["http://b.com"])
+        worker.join()
+        self.assertEqual(self.index.stats()['interactions'], 2)
+        self.assertEqual([url for url, _ in self.index.neighbours_of("http://a.com")], ["http://c.com"])
+
+        self.view("u2", "http://b.com", minutes=5)
+        self.assertIsNone(self.index.refresh_if_stale(self.session, wait=True))
+        self.assertEqual(self.index.stats()['interactions'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
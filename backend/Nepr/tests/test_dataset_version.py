@@ -0,0 +1,52 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.services.dataset_version import DatasetVersionCounter
+
+
+class TestDatasetVersionCounter(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        self.session_factory = sessionmaker(bind=engine)
+
+    def test_write_in_one_process_is_seen_by_another(self):
+        writer = DatasetVersionCounter(session_factory=self.session_factory, check_seconds=0)
+        reader = DatasetVersionCounter(session_factory=self.session_factory, check_seconds=0)
+        before = reader.current()
+        writer.bump()
+        writer.bump()
+        self.assertEqual(writer.current(), (2, 2))
+        self.assertEqual(reader.current(), (2, 0))
+        self.assertNotEqual(reader.current(), before)
+
+    def test_shared_counter_read_at_most_every_check_interval(self):
+        writer = DatasetVersionCounter(session_factory=self.session_factory, check_seconds=0)
+        reader = DatasetVersionCounter(session_factory=self.session_factory, check_seconds=3600)
+        self.assertEqual(reader.current(), (0, 0))
+        writer.bump()
+        self.assertEqual(reader.current(), (0, 0))
+
+    def test_unreachable_database_still_invalidates_locally(self):
+        def broken():
+            raise ConnectionError("down")
+
+        counter = DatasetVersionCounter(session_factory=broken, check_seconds=0)
+        before = counter.current()
+        counter.bump()
+        self.assertNotEqual(counter.current(), before)
+
+    @patch.dict(os.environ, {"DATABASE_URI_POSTGRESQL": ""})
+    def test_local_counter_without_database(self):
+        counter = DatasetVersionCounter()
+        counter.bump()
+        self.assertEqual(counter.current(), (0, 1))
+        self.assertEqual(counter.stats()["dataset_version"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
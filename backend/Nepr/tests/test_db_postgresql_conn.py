@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import text
+
+from databases import db_postgresql_conn
+from databases.db_postgresql_conn import connect, close, dispose_engine, init_app, pool_stats
+
+
+class TestSharedEngine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.environment = patch.dict(os.environ, {
+            "DATABASE_URI_POSTGRESQL": f"sqlite:///{os.path.join(self.directory.name, 'users.db')}",
+            "DB_POOL_SIZE": "2"
+        })
+        self.environment.start()
+        dispose_engine()
+        self.app = Flask(__name__)
+        init_app(self.app)
+
+    def tearDown(self):
+        dispose_engine()
+        self.environment.stop()
+        self.directory.cleanup()
+
+    def test_requests_reuse_pooled_connections(self):
+        connects = db_postgresql_conn._pool_counters["connects"]
+        for _ in range(3):
+            session, engine = connect()
+            session.execute(text("SELECT 1"))
+            close(session, engine)
+        self.assertIs(connect()[1], engine)
+        stats = pool_stats()
+        self.assertEqual(stats["pool"], "QueuePool")
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["checkedout"], 0)
+        self.assertEqual(stats["connects"] - connects, 1)
+
+    def test_session_scoped_to_app_context_and_removed_on_teardown(self):
+        with self.app.app_context():
+            session, _ = connect()
+            self.assertIs(connect()[0], session)
+            # The route never closes its session: the teardown returns the connection
+            session.execute(text("SELECT 1"))
+            self.assertEqual(pool_stats()["checkedout"], 1)
+        self.assertEqual(pool_stats()["checkedout"], 0)
+
+        with self.app.app_context():
+            self.assertIsNot(connect()[0], session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import gzip
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from requests.structures import CaseInsensitiveDict
+
+from utils.gateway import service_timeout, upstream_url, request_headers, response_headers, stream_response, \
+    route_of, RouteLimiter, RouteBusy
+
+
+class TestGateway(unittest.TestCase):
+    def test_upstream_url(self):
+        self.assertEqual(upstream_url("http://127.0.0.1:5001", "article", ""), "http://127.0.0.1:5001/article")
+        self.assertEqual(upstream_url("http://127.0.0.1:5001", "article", "search", b"keywords=a+b&limit=5"),
+                         "http://127.0.0.1:5001/article/search?keywords=a+b&limit=5")
+
+    @patch.dict(os.environ, {'GATEWAY_TIMEOUT_USER': '5'})
+    def test_service_timeout(self):
+        self.assertEqual(service_timeout("user", {"user": 30}, 60), 5.0)
+        self.assertEqual(service_timeout("article", {"article": 120}, 60), 120.0)
+        self.assertEqual(service_timeout("auth", {}, 60), 60.0)
+
+    def test_hop_by_hop_headers_are_dropped(self):
+        forwarded = request_headers([("Host", "gateway"), ("Authorization", "Bearer x"), ("Connection", "keep-alive"),
+                                     ("Content-Length", "12"), ("Accept-Encoding", "gzip")])
+        self.assertEqual(forwarded, {"Authorization": "Bearer x", "Accept-Encoding": "gzip"})
+        returned = response_headers(CaseInsensitiveDict({
+            "Content-Type": "application/n-triples", "Transfer-Encoding": "chunked",
+            "Access-Control-Allow-Origin": "*", "Content-Encoding": "gzip"
+        }))
+        self.assertEqual(returned, [("Content-Type", "application/n-triples"), ("Content-Encoding", "gzip")])
+
+    def test_body_streamed_undecoded(self):
+        body = gzip.compress(b"<http://a> <http://b> <http://c> .\n" * 1000)
+        upstream = MagicMock()
+        upstream.status_code = 206
+        upstream.headers = CaseInsensitiveDict({"Content-Type": "application/n-triples", "Content-Encoding": "gzip",
+                                                "Content-Length": str(len(body))})
+        upstream.raw.stream.return_value = iter([body[:100], body[100:]])
+
+        response = stream_response(upstream)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(b"".join(response.response), body)
+        self.assertEqual(upstream.raw.stream.call_args.kwargs['decode_content'], False)
+        upstream.close.assert_called()
+
+
+class TestRouteLimiter(unittest.TestCase):
+    def test_route_of(self):
+        self.assertEqual(route_of("article", "create/async"), "article/create")
+        self.assertEqual(route_of("article", ""), "article")
+
+    def test_waiting_requests_are_bounded(self):
+        async def scenario():
+            limiter = RouteLimiter({"article/create": 1}, max_waiting=1)
+            order = []
+
+            async def request(name, hold):
+                async with limiter.slot("article/create"):
+                    order.append(name)
+                    await hold.wait()
+
+            first_hold, second_hold = asyncio.Event(), asyncio.Event()
+            first = asyncio.ensure_future(request("first", first_hold))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(request("second", second_hold))
+            await asyncio.sleep(0)
+            with self.assertRaises(RouteBusy):
+                await request("third", asyncio.Event())
+            async with limiter.slot("article/search"):
+                order.append("unlimited")
+
+            self.assertEqual(limiter.stats()["article/create"],
+                             {"limit": 1, "free": 0, "waiting": 1, "rejected": 1})
+            first_hold.set()
+            second_hold.set()
+            await asyncio.gather(first, second)
+            return order
+
+        self.assertEqual(asyncio.run(scenario()), ["first", "unlimited", "second"])
+
+
+if __name__ == '__main__':
+    unittest.main()
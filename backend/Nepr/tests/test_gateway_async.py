@@ -0,0 +1,131 @@
+import asyncio
+import gzip
+import unittest
+from unittest.mock import patch
+
+import jwt
+
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase, TestServer
+
+from api_gataway_async import create_app, limiter_key
+from utils.gateway import SERVICES, RouteLimiter
+from utils.rate_limit import MemoryBucketStore, RateLimiter
+
+SECRET = "the-key-the-services-sign-their-tokens-with"
+
+
+class TestAsyncGateway(AioHTTPTestCase):
+    async def get_application(self):
+        self.release = asyncio.Event()
+        self.body = gzip.compress(b"<http://a> <http://b> <http://c> .\n" * 1000)
+
+        async def export(request):
+            return web.Response(body=self.body, status=201, headers={
+                "Content-Type": "application/n-triples", "Content-Encoding": "gzip",
+                "X-Query": request.query_string, "Access-Control-Allow-Origin": "http://upstream"})
+
+        async def create(request):
+            await self.release.wait()
+            return web.json_response(await request.json())
+
+        upstream = web.Application()
+        upstream.router.add_get("/article/data/export", export)
+        upstream.router.add_post("/article/create", create)
+        self.upstream = TestServer(upstream)
+        await self.upstream.start_server()
+        self.services = patch.dict(SERVICES, {"article": str(self.upstream.make_url("")).rstrip("/"),
+                                              "user": "http://127.0.0.1:1"})
+        self.services.start()
+        budgets = {"expensive": (2, 0.01), "default": (120, 20)}
+        return create_app(RouteLimiter({"article/create": 1}, max_waiting=0),
+                          rate_limiter=RateLimiter(MemoryBucketStore(), budgets, secret=SECRET))
+
+    async def asyncTearDown(self):
+        self.services.stop()
+        await self.upstream.close()
+        await super().asyncTearDown()
+
+    async def test_body_and_status_streamed_unchanged(self):
+        response = await self.client.get("/article/data/export?format=ntriples", auto_decompress=False)
+        self.assertEqual(response.status, 201)
+        self.assertEqual(await response.read(), self.body)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["X-Query"], "format=ntriples")
+        self.assertEqual(response.headers["Access-Control-Allow-Origin"], "*")
+
+    async def test_route_limit_rejects_over_capacity(self):
+        first = asyncio.ensure_future(self.client.post("/article/create", json={"url": "http://a.com"}))
+        while self.app[limiter_key].stats().get("article/create", {}).get("free") != 0:
+            await asyncio.sleep(0.01)
+        busy = await self.client.post("/article/create", json={"url": "http://b.com"})
+        self.assertEqual(busy.status, 503)
+        self.release.set()
+        response = await first
+        self.assertEqual(await response.json(), {"url": "http://a.com"})
+
+        limits = await (await self.client.get("/_gateway/limits")).json()
+        self.assertEqual(limits["article/create"], {"limit": 1, "free": 1, "waiting": 0, "rejected": 1})
+
+    async def test_rate_limit_per_subject_and_route(self):
+        self.release.set()
+        alice, bob = ({"Authorization": "Bearer " + jwt.encode({"sub": subject}, SECRET, algorithm="HS256")}
+                      for subject in ("alice", "bob"))
+        for _ in range(2):
+            self.assertEqual((await self.client.post("/article/create", json={}, headers=alice)).status, 200)
+        limited = await self.client.post("/article/create", json={}, headers=alice)
+        self.assertEqual(limited.status, 429)
+        self.assertEqual(limited.headers["Retry-After"], "100")
+        self.assertEqual((await self.client.post("/article/create", json={}, headers=bob)).status, 200)
+        self.assertEqual((await self.client.get("/article/data/export", headers=alice)).status, 201)
+
+    async def test_unknown_and_unavailable_services(self):
+        self.assertEqual((await self.client.get("/unknown")).status, 404)
+        self.assertEqual((await self.client.get("/user/history")).status, 503)
+        preflight = await self.client.options("/user/history", headers={"Access-Control-Request-Headers": "x"})
+        self.assertEqual(preflight.status, 200)
+        self.assertEqual(preflight.headers["Access-Control-Allow-Headers"], "x")
+
+
+class TestAsyncGatewayReplicas(AioHTTPTestCase):
+    async def get_application(self):
+        self.hits = {"failing": 0, "healthy": 0}
+
+        def replica(name, status):
+            async def handler(request):
+                self.hits[name] += 1
+                return web.json_response({"replica": name}, status=status)
+            upstream = web.Application()
+            upstream.router.add_route("*", "/article/{path:.*}", handler)
+            return TestServer(upstream)
+
+        self.replicas = [replica("failing", 503), replica("healthy", 200)]
+        for server in self.replicas:
+            await server.start_server()
+        self.services = patch.dict(SERVICES, {"article": [str(server.make_url("")).rstrip("/")
+                                                          for server in self.replicas]})
+        self.services.start()
+        return create_app(RouteLimiter({}))
+
+    async def asyncTearDown(self):
+        self.services.stop()
+        for server in self.replicas:
+            await server.close()
+        await super().asyncTearDown()
+
+    async def test_idempotent_requests_retried_on_another_replica(self):
+        for _ in range(4):
+            response = await self.client.get("/article/search")
+            self.assertEqual(await response.json(), {"replica": "healthy"})
+        self.assertEqual(self.hits["healthy"], 4)
+
+        statuses = [(await self.client.post("/article/create")).status for _ in range(4)]
+        self.assertIn(503, statuses)
+
+        upstreams = await (await self.client.get("/_gateway/upstreams")).json()
+        failing = next(stats for stats in upstreams["article"] if stats["errors"])
+        self.assertEqual(failing["errors"], self.hits["failing"])
+
+
+if __name__ == '__main__':
+    unittest.main()
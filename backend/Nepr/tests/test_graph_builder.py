@@ -9,6 +9,8 @@ from rdflib import Graph, URIRef, Literal
 from langcodes import Language
 from models.graph_builder import GraphBuilder
 from models.scraper import BeautifulSoupScraper
+from models.wikidata import WikidataClient
+from models.wikidata_cache import WikidataCache
 
 
 class TestGraphBuilder(unittest.TestCase):
@@ -23,6 +25,7 @@ class TestGraphBuilder(unittest.TestCase):
         self.graph_builder = GraphBuilder(self.test_url, self.service, self.options)
         self.graph_builder.scraper = MagicMock()
         self.graph_builder.scraper.extract_data = MagicMock()
+        self.graph_builder.wikidata = WikidataClient(cache=WikidataCache(':memory:'))
 
     @patch('models.scraper.BeautifulSoupScraper.extract_json_ld',
            return_value=[{"@type": "Article", "author": "Test Author"}])
@@ -31,7 +34,7 @@ class TestGraphBuilder(unittest.TestCase):
         self.assertEqual(len(graph_builder.json_ld_data), 1)
         self.assertIsInstance(graph_builder.graph, Graph)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_wikidata_data(self, mock_requests_get):
         mock_requests_get.return_value.json.return_value = {
             'results': {'bindings': [{
@@ -69,7 +72,7 @@ class TestGraphBuilder(unittest.TestCase):
         triples = list(graph_builder.graph)
         self.assertIn(expected_triple, triples)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_parse_person_data(self, mock_get):
         # Mock successful response
         mock_get.return_value.json.return_value = {
@@ -97,7 +100,7 @@ class TestGraphBuilder(unittest.TestCase):
         self.assertEqual(data['affiliation'], "Test Affiliation")
         self.assertEqual(data['gender'], "Male")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_parse_person_data_missing_fields(self, mock_get):
         # Mock response with missing fields
         mock_get.return_value.json.return_value = {
@@ -120,13 +123,13 @@ class TestGraphBuilder(unittest.TestCase):
         self.assertIsNone(data.get('affiliation'))
         self.assertIsNone(data.get('gender'))
 
-    @patch("requests.get", side_effect=requests.exceptions.RequestException("Error"))
+    @patch("requests.Session.get", side_effect=requests.exceptions.RequestException("Error"))
     def test_parse_person_data_request_exception(self, mock_get):
         data = self.graph_builder.get_wikidata_data("Invalid Name")
         self.assertIsNone(data)
 
 
-    @patch("requests.get", side_effect=requests.exceptions.RequestException("Error"))
+    @patch("requests.Session.get", side_effect=requests.exceptions.RequestException("Error"))
     def test_fetch_organization_data_request_exception(self, mock_get):
         data = self.graph_builder.get_organization_wikidata_data("Invalid Org")
         self.assertIsNone(data)
@@ -314,6 +317,7 @@ class TestGraphBuilder3(unittest.TestCase):
         self.options.add_argument('--no-sandbox')
         self.options.add_argument('--disable-dev-shm-usage')
         self.graph_builder = GraphBuilder(self.url, self.service, self.options)
+        self.graph_builder.wikidata = WikidataClient(cache=WikidataCache(':memory:'))
 
     @patch('models.graph_builder.BeautifulSoupScraper')
     def test_add_author_to_graph(self, MockScraper):
@@ -399,7 +403,7 @@ class TestGraphBuilder3(unittest.TestCase):
         organization = self.graph_builder.add_organization_details(entity_uri, entity_name)
         self.assertEqual(organization.publishingPrinciples, "Principles URL")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_wikidata_data(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -421,7 +425,7 @@ class TestGraphBuilder3(unittest.TestCase):
         self.assertEqual(data['birthDate'], "1980-01-01")
         self.assertEqual(data['gender'], "Male")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_organization_wikidata_data(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -476,6 +480,17 @@ class TestGraphBuilderStaticMethods(unittest.TestCase):
         result = GraphBuilder._set_key('other')
         self.assertEqual(result, expected_keys)
 
+    def test_collect_entity_names(self):
+        json_ld = {
+            "author": [{"name": "Jane Doe"}, "John Roe"],
+            "editor": {"name": "Ed Itor"},
+            "publisher": {"@type": "Organization", "name": "Publisher Inc."},
+            "headline": "Title"
+        }
+        persons, organizations = GraphBuilder.collect_entity_names(json_ld)
+        self.assertEqual(persons, ["Jane Doe", "John Roe", "Ed Itor"])
+        self.assertEqual(organizations, ["Publisher Inc."])
+
     @patch("models.scraper.BeautifulSoupScraper.extract_data")
     def test_add_keywords_to_graph_no_keywords(self, mock_extract_data):
         article_url = "http://example.com/article"
@@ -0,0 +1,37 @@
+import gzip
+import json
+import unittest
+
+from api.services.graph_export import ndjson_lines, gzip_chunks
+
+
+class TestGraphExport(unittest.TestCase):
+    def test_ndjson_lines(self):
+        lines = [
+            b'<http://a.com> <http://schema.org/headline> "Titlu \\u0103"@ro .',
+            b'',
+            b'<http://a.com> <http://schema.org/wordCount> "120"^^<http://www.w3.org/2001/XMLSchema#integer> .',
+            b'<http://a.com> <http://schema.org/author> <http://example.com/author/Jane> .',
+            b'<http://a.com> <http://schema.org/about> _:topic .',
+            b'_:topic <http://schema.org/name> "http://example.com" .',
+        ]
+        records = [json.loads(line) for line in ndjson_lines(lines)]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0], {"s": "http://a.com", "p": "http://schema.org/headline",
+                                      "o": "Titlu ă", "o_type": "literal", "lang": "ro"})
+        self.assertEqual(records[1]["datatype"], "http://www.w3.org/2001/XMLSchema#integer")
+        self.assertEqual((records[2]["o"], records[2]["o_type"]), ("http://example.com/author/Jane", "uri"))
+        # Blank nodes keep their prefix and label, and a literal looking like an IRI stays a literal
+        self.assertEqual(records[3]["o_type"], "bnode")
+        self.assertTrue(records[3]["o"].startswith("_:"))
+        self.assertEqual(records[4]["s"], records[3]["o"])
+        self.assertEqual((records[4]["o"], records[4]["o_type"]), ("http://example.com", "literal"))
+
+    def test_gzip_chunks(self):
+        chunks = [b"<http://a.com> <http://b> <http://c> .\n"] * 1000
+        compressed = b"".join(gzip_chunks(iter(chunks)))
+        self.assertEqual(gzip.decompress(compressed), b"".join(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from utils.http_client import HttpClient
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpClient()
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_session_is_shared_per_target(self):
+        self.assertIs(self.client.session('fuseki'), self.client.session('fuseki'))
+        self.assertIsNot(self.client.session('fuseki'), self.client.session('wikidata'))
+
+    def test_session_pool_and_retry_settings(self):
+        session = self.client.session('fuseki', pool_size=4, retries=2, timeout=5)
+        adapter = session.get_adapter('http://localhost:3030')
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(session.default_timeout, 5)
+
+    @patch.dict(os.environ, {'HTTP_POOL_SIZE': '8', 'HTTP_POOL_SIZE_WIKIDATA': '2'})
+    def test_environment_overrides_per_target(self):
+        self.assertEqual(self.client.session('fuseki').get_adapter('https://x')._pool_maxsize, 8)
+        self.assertEqual(self.client.session('wikidata').get_adapter('https://x')._pool_maxsize, 2)
+
+    @patch('requests.Session.send')
+    def test_default_timeout_applied(self, mock_send):
+        session = self.client.session('publisher', timeout=7)
+        session.get('http://example.com')
+        self.assertEqual(mock_send.call_args.kwargs['timeout'], 7)
+
+    def test_read_only_posts_are_retried(self):
+        calls = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                calls.append(self.path)
+                self.send_response(503 if calls.count(self.path) == 1 else 200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            session = self.client.session('fuseki', retries=2, backoff=0)
+            url = f"http://127.0.0.1:{server.server_port}/NEPR-2024"
+            self.assertEqual(session.post(f"{url}/query", data="SELECT").status_code, 200)
+            self.assertEqual(session.post(f"{url}/update", data="DROP").status_code, 503)
+            self.assertEqual(calls, ["/NEPR-2024/query", "/NEPR-2024/query", "/NEPR-2024/update"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
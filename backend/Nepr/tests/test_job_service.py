@@ -0,0 +1,74 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.services.job_service import IngestJobService
+
+
+class TestIngestJobService(unittest.TestCase):
+    def setUp(self):
+        self.sparql_service = MagicMock()
+        self.release = threading.Event()
+
+        def create_and_insert_graph(url, report):
+            self.release.wait(5)
+            report['timings'] = {'scrape': 0.5, 'upload': 0.1}
+            report['json_ld_tier'] = 'static'
+            return True, "Graph created successfully", {"url": url}
+
+        self.sparql_service.create_and_insert_graph.side_effect = create_and_insert_graph
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        self.session_factory = sessionmaker(bind=engine)
+        self.jobs = IngestJobService(self.sparql_service, max_workers=1, max_queue=2,
+                                     session_factory=self.session_factory)
+
+    def tearDown(self):
+        self.release.set()
+        self.jobs.executor.shutdown(wait=True)
+
+    def test_job_runs_and_reports_result(self):
+        job = self.jobs.submit("http://example.com/a", "alice@example.com")
+        self.assertEqual(job['status'], 'queued')
+        self.release.set()
+        self.jobs.executor.shutdown(wait=True)
+
+        finished = self.jobs.get(job['id'], "alice@example.com")
+        self.assertEqual(finished['status'], 'succeeded')
+        self.assertEqual(finished['result'], {"url": "http://example.com/a"})
+        self.assertEqual(finished['timings'], {'scrape': 0.5, 'upload': 0.1})
+        self.assertEqual(finished['extraction_tier'], 'static')
+        self.assertEqual(self.jobs.stats()['active'], 0)
+
+    def test_submit_rejected_when_queue_full(self):
+        self.assertIsNotNone(self.jobs.submit("http://example.com/a"))
+        self.assertIsNotNone(self.jobs.submit("http://example.com/b"))
+        self.assertIsNone(self.jobs.submit("http://example.com/c"))
+
+    def test_failed_ingest(self):
+        self.sparql_service.create_and_insert_graph.side_effect = RuntimeError("boom")
+        job = self.jobs.submit("http://example.com/a")
+        self.jobs.executor.shutdown(wait=True)
+        finished = self.jobs.get(job['id'])
+        self.assertEqual(finished['status'], 'failed')
+        self.assertIn("boom", finished['message'])
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.jobs.get("missing"))
+
+    def test_job_visible_to_other_replicas_of_its_owner_only(self):
+        job = self.jobs.submit("http://example.com/a", "alice@example.com")
+        self.release.set()
+        self.jobs.executor.shutdown(wait=True)
+
+        replica = IngestJobService(self.sparql_service, max_workers=1, session_factory=self.session_factory)
+        self.assertEqual(replica.get(job['id'], "alice@example.com")['status'], 'succeeded')
+        self.assertIsNone(replica.get(job['id'], "mallory@example.com"))
+        replica.executor.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
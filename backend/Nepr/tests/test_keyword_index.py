@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import MagicMock
+
+from api.services.keyword_index import KeywordIndex, tokenize
+
+
+class TestKeywordIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KeywordIndex(':memory:')
+        self.index.add("http://a.com", ["Économie mondiale", "Climate change"])
+        self.index.add("http://b.com", ["Climate", "Elections"])
+
+    def test_tokenize_folds_case_and_accents(self):
+        self.assertEqual(tokenize("Économie  MONDIALE, São-Paulo"), ["economie", "mondiale", "sao", "paulo"])
+
+    def test_match_all_and_any(self):
+        self.assertEqual(self.index.search(["climate", "economie"]), ["http://a.com"])
+        self.assertEqual(sorted(self.index.search(["economie", "elections"], match_all=False)),
+                         ["http://a.com", "http://b.com"])
+        self.assertEqual(self.index.search(["elections"], match_all=False, among=["http://a.com", "http://b.com",
+                                                                                 "http://c.com"]), ["http://b.com"])
+        self.assertEqual(self.index.search(["climate"], among=[]), [])
+
+    def test_prefix_and_folded_query(self):
+        self.assertEqual(self.index.search(["ÉCON"]), ["http://a.com"])
+        self.assertEqual(sorted(self.index.search(["clim"])), ["http://a.com", "http://b.com"])
+
+    def test_ranked_counts_matched_words(self):
+        self.assertEqual(self.index.search_ranked(["climate", "economie", "climate"]),
+                         [("http://a.com", 2, ""), ("http://b.com", 1, "")])
+        self.assertEqual(self.index.search_ranked(["nothing"]), [])
+
+    def test_ranked_newest_first_from_keyset_position(self):
+        for day in range(1, 8):
+            self.index.add(f"http://news.com/{day}", ["Climate"], f"2024-01-0{day}T00:00:00")
+        self.index.add("http://news.com/undated", ["Climate"])
+        ranked = self.index.search_ranked(["climate"], limit=3)
+        self.assertEqual([url for url, _, _ in ranked], ["http://news.com/7", "http://news.com/6", "http://news.com/5"])
+        url, count, date = ranked[-1]
+        rest = self.index.search_ranked(["climate"], position={'c': count, 'd': date, 'u': url})
+        self.assertEqual([url for url, _, _ in rest], ["http://news.com/4", "http://news.com/3", "http://news.com/2",
+                                                        "http://news.com/1", "http://a.com", "http://b.com",
+                                                        "http://news.com/undated"])
+
+    def test_reindex_and_remove(self):
+        self.index.add("http://a.com", ["Sports"])
+        self.assertEqual(self.index.search(["climate"]), ["http://b.com"])
+        self.index.remove("http://b.com")
+        self.assertEqual(self.index.search(["climate"]), [])
+        self.assertEqual(self.index.stats()['articles'], 1)
+
+    def test_rebuild_from_fuseki(self):
+        http = MagicMock()
+        http.post.return_value.json.return_value = {'results': {'bindings': [
+            {'article': {'value': "http://c.com"}, 'keyword': {'value': "Tennis"}, 'date': {'value': "2024-05-01"}},
+            {'article': {'value': "http://d.com"}}
+        ]}}
+        self.assertFalse(self.index.is_built())
+        self.assertEqual(self.index.rebuild("http://fuseki", http=http), 2)
+        self.assertTrue(self.index.is_built())
+        self.assertEqual(self.index.search(["tennis"]), ["http://c.com"])
+        self.assertEqual(self.index.search_ranked(["tennis"]), [("http://c.com", 1, "2024-05-01")])
+        self.assertEqual(self.index.search(["climate"]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
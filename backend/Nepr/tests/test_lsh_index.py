@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from api.services.lsh_index import RandomProjectionLSH
+
+
+class TestRandomProjectionLSH(unittest.TestCase):
+    def setUp(self):
+        self.lsh = RandomProjectionLSH(2 ** 12, tables=4, bits=8)
+        rng = np.random.default_rng(1)
+        self.vectors = csr_matrix(rng.random((50, 2 ** 12)) * (rng.random((50, 2 ** 12)) < 0.02))
+
+    def test_signatures_are_deterministic(self):
+        keys = self.lsh.signatures(self.vectors)
+        self.assertEqual(keys.shape, (50, 4))
+        self.assertEqual(keys.dtype, np.uint32)
+        self.assertTrue((keys < 2 ** 8).all())
+        other = RandomProjectionLSH(2 ** 12, tables=4, bits=8)
+        np.testing.assert_array_equal(other.signatures(self.vectors), keys)
+        np.testing.assert_array_equal(self.lsh.signatures(self.vectors * 3), keys)
+
+    def test_lookup_finds_identical_vector_first(self):
+        self.lsh.set_keys(self.lsh.signatures(self.vectors))
+        keys = self.lsh.signatures(self.vectors[7])[0]
+        rows = self.lsh.lookup(keys)
+        self.assertEqual(rows[0], 7)
+        self.assertEqual(list(self.lsh.lookup(keys, limit=1)), [7])
+        self.assertGreaterEqual(len(self.lsh.lookup(keys, probe=True)), len(rows))
+
+    def test_lookup_on_empty_index(self):
+        self.assertEqual(len(self.lsh.lookup(self.lsh.signatures(self.vectors[0])[0])), 0)
+
+    def test_rejects_too_many_bits(self):
+        with self.assertRaises(ValueError):
+            RandomProjectionLSH(2 ** 12, bits=33)
+
+
+if __name__ == '__main__':
+    unittest.main()
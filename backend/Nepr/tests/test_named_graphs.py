@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import MagicMock
+
+from api.services.named_graphs import article_graph, migrate_default_graph
+
+
+def articles(*urls):
+    return {'results': {'bindings': [{'article': {'value': url}} for url in urls]}}
+
+
+class TestNamedGraphs(unittest.TestCase):
+    def test_article_graph(self):
+        self.assertEqual(article_graph("http://a.com/news"), "http://a.com/news#graph")
+        self.assertEqual(article_graph("http://a.com/news#top"), "http://a.com/news#graph")
+
+    def test_migration_copies_every_article_before_deleting(self):
+        http = MagicMock()
+        http.post.return_value.json.side_effect = [
+            articles("http://a.com", "http://b.com"), articles("http://c.com"),
+            {'results': {'bindings': [{'triples': {'value': "3"}}]}}
+        ]
+        report = migrate_default_graph("http://fuseki", http=http, batch_size=2, page_size=2)
+        self.assertEqual(report, {"articles": 3, "remaining_default_triples": 3})
+
+        updates = [call.kwargs['data'] for call in http.post.call_args_list
+                   if call.args[0].endswith("/update")]
+        self.assertEqual(len(updates), 4)
+        self.assertTrue(all(update.startswith("INSERT") for update in updates[:2]))
+        self.assertTrue(all(update.startswith("DELETE") for update in updates[2:]))
+        self.assertIn("GRAPH <http://a.com#graph>", updates[0])
+        self.assertIn("GRAPH <http://b.com#graph>", updates[0])
+        self.assertIn("<http://c.com> ?p ?o", updates[3])
+
+    def test_empty_default_graph(self):
+        http = MagicMock()
+        http.post.return_value.json.side_effect = [articles(), {'results': {'bindings': []}}]
+        self.assertEqual(migrate_default_graph("http://fuseki", http=http),
+                         {"articles": 0, "remaining_default_triples": 0})
+        self.assertEqual(http.post.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+
+
+class TestPagination(unittest.TestCase):
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit(None), 10)
+        self.assertEqual(parse_limit("25"), 25)
+        self.assertEqual(parse_limit("500"), 100)
+        self.assertEqual(parse_limit("5000", default=1000, maximum=10000), 5000)
+        with self.assertRaises(ValueError):
+            parse_limit("0")
+        with self.assertRaises(ValueError):
+            parse_limit("ten")
+
+    def test_cursor_round_trip(self):
+        position = {'d': "2024-12-01T10:00:00+00:00", 'u': "http://example.com/a?b=1&c=\"2\""}
+        token = encode_cursor(position)
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token), position)
+        self.assertIsNone(decode_cursor(None))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not a cursor")
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor(["list"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.services.profile_service import ProfileService
+
+
+def vector(*indices):
+    values = np.ones(len(indices), dtype=np.float32) / np.sqrt(len(indices))
+    return csr_matrix((values, list(indices), [0, len(indices)]), shape=(1, 16))
+
+
+class TestProfileService(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        self.session = sessionmaker(bind=engine)()
+        self.profiles = ProfileService(half_life_days=10)
+        self.now = datetime(2024, 5, 1)
+        self.climate = {
+            'url': "http://a.com", 'keywords': ["climate", "energy"], 'wordCount': 400,
+            'author': [{'name': "Ana Pop"}], 'publisher': {'name': "Daily"}, 'datePublished': "2024-04-02T10:00:00Z"
+        }
+        self.sport = {
+            'url': "http://b.com", 'keywords': "football", 'wordCount': 1600,
+            'author': [{'name': "Ion Ionescu"}], 'datePublished': "2024-01-15"
+        }
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_views_update_counters_and_centroid(self):
+        self.assertIsNone(self.profiles.get_profile(self.session, "user@example.com"))
+        self.assertTrue(self.profiles.record_view(self.session, "user@example.com", self.climate, vector(0, 1),
+                                                  self.now))
+        self.assertTrue(self.profiles.record_view(self.session, "user@example.com", self.climate, vector(0, 1),
+                                                  self.now))
+        self.profiles.record_view(self.session, "user@example.com", self.sport, vector(2), self.now)
+
+        profile = self.profiles.get_profile(self.session, "user@example.com")
+        self.assertEqual(profile.weight, 3.0)
+        preferences = self.profiles.preferences(profile)
+        self.assertEqual(preferences['keywords'].split()[:2], ["climate", "energy"])
+        self.assertEqual(preferences['author_name'], "Ana Pop")
+        self.assertEqual(preferences['publisher'], "Daily")
+        self.assertEqual(preferences['datePublished_min'], datetime(2024, 1, 15))
+        self.assertEqual(preferences['datePublished_max'], datetime(2024, 4, 2, 10))
+        self.assertLessEqual(preferences['wordcount_min'], 480)
+        self.assertGreaterEqual(preferences['wordcount_max'], 400)
+
+        centroid = self.profiles.centroid(profile, 16).toarray().ravel()
+        np.testing.assert_allclose(centroid[:3], [2 / np.sqrt(2) / 3, 2 / np.sqrt(2) / 3, 1 / 3], rtol=1e-5)
+
+    def test_old_views_decay(self):
+        self.profiles.record_view(self.session, "user@example.com", self.sport, vector(2),
+                                  self.now - timedelta(days=30))
+        self.profiles.record_view(self.session, "user@example.com", self.climate, vector(0, 1), self.now)
+        profile = self.profiles.get_profile(self.session, "user@example.com")
+        self.assertAlmostEqual(profile.keyword_counts['football'], 0.125)
+        self.assertAlmostEqual(profile.weight, 1.125)
+        self.assertEqual(self.profiles.preferences(profile)['author_name'], "Ana Pop")
+
+    def test_counters_are_truncated(self):
+        profiles = ProfileService(max_terms=2, centroid_features=2)
+        profile = profiles.new_profile("user@example.com")
+        profiles.apply_view(profile, self.climate, vector(0, 1, 2, 3), self.now)
+        profiles.apply_view(profile, self.sport, vector(3), self.now)
+        self.assertEqual(len(profile.keyword_counts), 2)
+        self.assertIn(3, profile.centroid['indices'])
+        self.assertEqual(len(profile.centroid['indices']), 2)
+
+    def test_build_profile_replaces_existing(self):
+        self.profiles.record_view(self.session, "user@example.com", self.sport, vector(2), self.now)
+        profile = self.profiles.build_profile(self.session, "user@example.com", [
+            (self.climate, vector(0, 1), self.now - timedelta(days=1)),
+            (self.climate, vector(0, 1), self.now)
+        ])
+        self.assertIsNotNone(profile)
+        self.assertNotIn('football', self.profiles.get_profile(self.session, "user@example.com").keyword_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
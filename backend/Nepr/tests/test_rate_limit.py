@@ -0,0 +1,73 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import jwt
+
+from utils.rate_limit import MemoryBucketStore, RedisBucketStore, RateLimiter, budget, jwt_subject, BUDGETS
+
+SECRET = "the-key-the-services-sign-their-tokens-with"
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_bucket_refill_and_retry_after(self):
+        store = MemoryBucketStore()
+        self.assertEqual([store.take("a", 2, 0.5, now=0) for _ in range(3)], [0.0, 0.0, 2.0])
+        self.assertEqual(store.take("a", 2, 0.5, now=1), 1.0)
+        self.assertEqual(store.take("a", 2, 0.5, now=2), 0.0)
+        self.assertEqual(store.take("b", 2, 0.5, now=2), 0.0)
+
+    def test_full_buckets_are_swept(self):
+        store = MemoryBucketStore(sweep_every=3)
+        store.take("a", 2, 1.0, now=0)
+        store.take("b", 2, 1.0, now=0)
+        store.take("c", 2, 1.0, now=5)
+        self.assertEqual(len(store), 1)
+
+    def test_jwt_subject(self):
+        token = jwt.encode({"sub": "alice"}, SECRET, algorithm="HS256")
+        self.assertEqual(jwt_subject(f"Bearer {token}", SECRET), "alice")
+        self.assertIsNone(jwt_subject(f"Bearer {token}", None))
+        self.assertIsNone(jwt_subject("Bearer garbage", SECRET))
+        self.assertIsNone(jwt_subject(f"Basic {token}", SECRET))
+        self.assertIsNone(jwt_subject(None, SECRET))
+        forged = jwt.encode({"sub": "alice"}, "a-key-chosen-by-whoever-forged-the-token", algorithm="HS256")
+        self.assertIsNone(jwt_subject(f"Bearer {forged}", SECRET))
+        unsigned = jwt.encode({"sub": "alice"}, None, algorithm="none")
+        self.assertIsNone(jwt_subject(f"Bearer {unsigned}", SECRET))
+
+    @patch.dict(os.environ, {"RATE_LIMIT_CHEAP": "10,2.5"})
+    def test_budget(self):
+        self.assertEqual(budget("cheap", BUDGETS), (10.0, 2.5))
+        self.assertEqual(budget("unknown", BUDGETS), BUDGETS["default"])
+
+    def test_route_classes_have_separate_buckets(self):
+        limiter = RateLimiter(MemoryBucketStore(), {"expensive": (1, 0.1), "cheap": (2, 1.0), "default": (5, 1.0)},
+                              secret=SECRET)
+        token = "Bearer " + jwt.encode({"sub": "alice"}, SECRET, algorithm="HS256")
+        self.assertEqual(limiter.check("article", "create", token, "10.0.0.1"), 0)
+        self.assertEqual(limiter.check("article", "create/async", token, "10.0.0.2"), 10)
+        self.assertEqual(limiter.check("article", "search", token, "10.0.0.1"), 0)
+        self.assertEqual(limiter.check("article", "create", None, "10.0.0.1"), 0)
+
+    def test_forged_token_counts_against_its_address(self):
+        limiter = RateLimiter(MemoryBucketStore(), {"expensive": (1, 0.1), "default": (5, 1.0)}, secret=SECRET)
+        forged = "Bearer " + jwt.encode({"sub": "alice"}, "a-key-chosen-by-whoever-forged-the-token", algorithm="HS256")
+        self.assertEqual(limiter.check("article", "create", forged, "10.0.0.9"), 0)
+        self.assertEqual(limiter.check("article", "create", forged, "10.0.0.9"), 10)
+        # The bucket of the user the token claims to be is untouched
+        token = "Bearer " + jwt.encode({"sub": "alice"}, SECRET, algorithm="HS256")
+        self.assertEqual(limiter.check("article", "create", token, "10.0.0.1"), 0)
+
+    def test_redis_store_fails_open(self):
+        client = MagicMock()
+        client.register_script.return_value.side_effect = [b"0.5", ConnectionError("down")]
+        store = RedisBucketStore(client)
+        self.assertEqual(store.take("expensive:user:alice", 5, 0.1, now=7), 0.5)
+        self.assertEqual(client.register_script.return_value.call_args.kwargs,
+                         {"keys": ["ratelimit:expensive:user:alice"], "args": [5, 0.1, 7]})
+        self.assertEqual(store.take("expensive:user:alice", 5, 0.1, now=8), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from scipy.sparse import csr_matrix
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.services.profile_service import ProfileService
+from api.services.recommendation_service import RecommendationService, recommend_chunk, recent_histories, \
+    active_users, summarize
+from databases.db_postgresql_conn import ensure_table
+from models.models import UserHistory
+
+
+class TestRecommendationService(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        ensure_table(engine, UserHistory.__table__)
+        self.session = sessionmaker(bind=engine)()
+        self.recommendations = RecommendationService(max_age_minutes=60)
+        self.now = datetime.now()
+        for email, url, minutes in [("a@example.com", "http://1.com", 30), ("a@example.com", "http://2.com", 10),
+                                    ("b@example.com", "http://3.com", 60 * 24 * 40)]:
+            self.session.add(UserHistory(user_email=email, article_url=url,
+                                         date_accessed=self.now - timedelta(minutes=minutes)))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_fresh_until_expired_or_profile_changes(self):
+        self.assertIsNone(self.recommendations.get_fresh(self.session, "a@example.com"))
+        self.assertTrue(self.recommendations.save(self.session, "a@example.com", [{'url': "http://4.com"}],
+                                                  self.now - timedelta(minutes=5)))
+        self.assertEqual(self.recommendations.get_fresh(self.session, "a@example.com"), [{'url': "http://4.com"}])
+        self.assertIsNone(self.recommendations.get_fresh(self.session, "a@example.com", profile_updated_at=self.now))
+
+        self.recommendations.save(self.session, "a@example.com", [], self.now - timedelta(minutes=90))
+        self.assertIsNone(self.recommendations.get_fresh(self.session, "a@example.com"))
+
+    def test_users_and_histories(self):
+        self.assertEqual(active_users(self.session), ["a@example.com", "b@example.com"])
+        self.assertEqual(active_users(self.session, active_days=30), ["a@example.com"])
+        self.assertEqual(recent_histories(self.session, ["a@example.com"], limit=1),
+                         {"a@example.com": ["http://2.com"]})
+        self.assertEqual(recent_histories(self.session, ["a@example.com", "b@example.com", "c@example.com"], limit=1),
+                         {"a@example.com": ["http://2.com"], "b@example.com": ["http://3.com"], "c@example.com": []})
+
+    def test_recommend_chunk(self):
+        profiles = ProfileService()
+        profiles.record_view(self.session, "a@example.com", {'keywords': ["climate"]},
+                             csr_matrix(([1.0], [3], [0, 1]), shape=(1, 8)))
+        sparql_service = MagicMock()
+        sparql_service.vector_index.n_features = 8
+        sparql_service.get_articles_by_urls.return_value = [{'url': "http://3.com", 'keywords': ["football"]}]
+        sparql_service.vector_index.vectors.return_value = csr_matrix(([1.0], [5], [0, 1]), shape=(1, 8))
+
+        def batch(user_requests, max_recommendations, report):
+            report['users'] = {email: 0.01 for email in user_requests}
+            report['fetch'] = 0.02
+            return {email: [{'url': "http://4.com"}] for email in user_requests}
+
+        sparql_service.get_recommendations_batch.side_effect = batch
+        report = recommend_chunk(self.session, sparql_service, ["a@example.com", "b@example.com", "c@example.com"],
+                                 5, profile_service=profiles, recommendation_service=self.recommendations)
+
+        user_requests = sparql_service.get_recommendations_batch.call_args.args[0]
+        self.assertEqual(list(user_requests), ["a@example.com", "b@example.com"])
+        history, profile = user_requests["a@example.com"]
+        self.assertEqual(history, ["http://2.com", "http://1.com"])
+        self.assertEqual(profile['preferences']['keywords'], "climate")
+        # b had a history but no profile yet: it is built from the history
+        self.assertEqual(user_requests["b@example.com"][1]['preferences']['keywords'], "football")
+        self.assertIsNotNone(profiles.get_profile(self.session, "b@example.com"))
+        self.assertEqual(report['skipped'], ["c@example.com"])
+        self.assertEqual(self.recommendations.get_fresh(self.session, "a@example.com"), [{'url': "http://4.com"}])
+
+        summary = summarize([report], 3, 0.5)
+        self.assertEqual((summary['recommended'], summary['skipped'], summary['failed']), (2, 1, 0))
+        self.assertEqual(summary['users_per_second'], 4.0)
+        self.assertEqual({entry['user'] for entry in summary['slowest']}, {"a@example.com", "b@example.com"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ import requests
 from bs4 import BeautifulSoup
 from flask import Response
 
+from models.browser_pool import BrowserPool
 from models.scraper import BeautifulSoupScraper
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
@@ -17,10 +18,11 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         self.options.add_argument('--headless')
         self.options.add_argument('--no-sandbox')
         self.options.add_argument('--disable-dev-shm-usage')
-        self.scraper = BeautifulSoupScraper(self.service, self.options)
+        self.browser_pool = BrowserPool(self.service, self.options, size=1)
+        self.scraper = BeautifulSoupScraper(self.service, self.options, self.browser_pool)
 
-    @patch('requests.get')
-    @patch('goose3.Goose')
+    @patch('requests.Session.get')
+    @patch('models.scraper.Goose')
     def test_extract_rdfa(self, mock_goose, mock_get):
         # Simulate the HTTP response
         mock_response = MagicMock()
@@ -28,21 +30,22 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         mock_response.text = '<html><head><title>Sample Title</title><meta property="og:title" content="Sample Article"></head></html>'
         mock_get.return_value = mock_response
 
-        # Mock Goose extraction
+        # Mock Goose extraction over the fetched page
         mock_goose_instance = MagicMock()
         mock_goose.return_value = mock_goose_instance
-        mock_goose_instance.extract.return_value.cleaned_text = "Sample cleaned text from Goose"
+        mock_goose_instance.extract.return_value.opengraph = {"title": "Sample Article", "rich_attachment": True}
 
-        # Call the extract_rdfa method
+        # Call the extract_rdfa method twice: the page is fetched and parsed by Goose once
         scraper = BeautifulSoupScraper(self.service, self.options)
         result = scraper.extract_rdfa('https://example.com')
-        print("Extracted RDFa:", result)  # Debugging print statement
+        scraper.extract_rdfa('https://example.com')
 
-        # Check if the result matches the expected RDFa structure
-        expected_result = None
-        self.assertEqual(result, expected_result)
+        # Check that Goose read the shared page instead of downloading it again
+        self.assertEqual(result, {"headline": "Sample Article"})
+        mock_get.assert_called_once()
+        mock_goose_instance.extract.assert_called_once_with(url='https://example.com', raw_html=mock_response.text)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_extract_data_http_failure(self, mock_requests_get):
         # Simulate an HTTP failure (RequestException)
         mock_requests_get.side_effect = requests.RequestException("Request failed")
@@ -65,7 +68,7 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         mock_goose.return_value = mock_goose_instance
 
     @patch('langdetect.detect')
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_detect_language(self, mock_get, mock_detect):
         mock_detect.return_value = 'en'
         mock_response = MagicMock()
@@ -83,7 +86,8 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         mock_browser.find_elements.return_value = []
         result = self.scraper.extract_json_ld_youtube("https://example.com")
         self.assertIsNone(result)
-        mock_browser.quit.assert_called_once()
+        mock_browser.quit.assert_not_called()
+        self.assertEqual(self.browser_pool.stats()['idle'], 1)
 
     @patch('models.scraper.webdriver.Chrome')
     def test_extract_json_ld_youtube_no_json_ld(self, mock_chrome):
@@ -93,7 +97,8 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         mock_browser.find_elements.return_value = []
         result = self.scraper.extract_json_ld_youtube("https://example.com")
         self.assertIsNone(result)
-        mock_browser.quit.assert_called_once()
+        mock_browser.quit.assert_not_called()
+        self.assertEqual(self.browser_pool.stats()['idle'], 1)
 
     @patch('models.scraper.webdriver.Chrome')
     def test_extract_json_ld_youtube_valid(self, mock_chrome):
@@ -106,7 +111,8 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         result = self.scraper.extract_json_ld_youtube("https://example.com")
         expected = [{"@context": "http://schema.org", "@type": "VideoObject", "name": "Test Video"}]
         self.assertEqual(result, expected)
-        mock_browser.quit.assert_called_once()
+        mock_browser.quit.assert_not_called()
+        self.assertEqual(self.browser_pool.stats()['idle'], 1)
 
     @patch('models.scraper.webdriver.Chrome')
     def test_extract_json_ld_youtube_invalid_json(self, mock_chrome):
@@ -118,60 +124,61 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         mock_script.get_attribute.return_value = '{"@context": "http://schema.org", "@type": "VideoObject", "name": "Test Video"'
         result = self.scraper.extract_json_ld_youtube("https://example.com")
         self.assertIsNone(result)
-        mock_browser.quit.assert_called_once()
+        mock_browser.quit.assert_not_called()
+        self.assertEqual(self.browser_pool.stats()['idle'], 1)
 
-    @patch('models.scraper.sync_playwright')
-    def test_extract_json_ld_selenium_valid(self, mock_playwright):
+    @patch('models.scraper.webdriver.Chrome')
+    def test_extract_json_ld_selenium_valid(self, mock_chrome):
         mock_browser = MagicMock()
-        mock_page = MagicMock()
         mock_script = MagicMock()
-        mock_playwright.return_value.__enter__.return_value.chromium.launch.return_value = mock_browser
-        mock_browser.new_page.return_value = mock_page
-        mock_page.query_selector_all.return_value = [mock_script]
-        mock_script.inner_text.return_value = '{"@context": "http://schema.org", "@type": "Article", "headline": "Test Article"}'
-        result = BeautifulSoupScraper.extract_json_ld_selenium("https://example.com")
+        mock_chrome.return_value = mock_browser
+        mock_browser.find_elements.return_value = [mock_script]
+        mock_script.get_attribute.return_value = '{"@context": "http://schema.org", "@type": "Article", "headline": "Test Article"}'
+        result = self.scraper.extract_json_ld_selenium("https://example.com")
         expected = [{"@context": "http://schema.org", "@type": "Article", "headline": "Test Article"}]
         self.assertEqual(result, expected)
-        mock_browser.close.assert_called_once()
+        mock_browser.get.assert_called_once_with("https://example.com")
+        mock_browser.quit.assert_not_called()
 
-    @patch('models.scraper.sync_playwright')
-    def test_extract_json_ld_selenium_invalid_json(self, mock_playwright):
+    @patch('models.scraper.webdriver.Chrome')
+    def test_extract_json_ld_selenium_invalid_json(self, mock_chrome):
         mock_browser = MagicMock()
-        mock_page = MagicMock()
         mock_script = MagicMock()
-        mock_playwright.return_value.__enter__.return_value.chromium.launch.return_value = mock_browser
-        mock_browser.new_page.return_value = mock_page
-        mock_page.query_selector_all.return_value = [mock_script]
-        mock_script.inner_text.return_value = '{"@context": "http://schema.org", "@type": "Article", "headline": "Test Article"'
-        result = BeautifulSoupScraper.extract_json_ld_selenium("https://example.com")
+        mock_chrome.return_value = mock_browser
+        mock_browser.find_elements.return_value = [mock_script]
+        mock_script.get_attribute.return_value = '{"@context": "http://schema.org", "@type": "Article", "headline": "Test Article"'
+        result = self.scraper.extract_json_ld_selenium("https://example.com")
         # Invalid json is corrected by the method
         expected = [{"@context": "http://schema.org", "@type": "Article", "headline": "Test Article"}]
         self.assertEqual(result, expected)
-        mock_browser.close.assert_called_once()
 
-    @patch('models.scraper.sync_playwright')
-    def test_extract_json_ld_selenium_no_json_ld(self, mock_playwright):
+    @patch('models.scraper.webdriver.Chrome')
+    def test_extract_json_ld_selenium_no_json_ld(self, mock_chrome):
         mock_browser = MagicMock()
-        mock_page = MagicMock()
-        mock_playwright.return_value.__enter__.return_value.chromium.launch.return_value = mock_browser
-        mock_browser.new_page.return_value = mock_page
-        mock_page.query_selector_all.return_value = []
-        result = BeautifulSoupScraper.extract_json_ld_selenium("https://example.com")
+        mock_chrome.return_value = mock_browser
+        mock_browser.find_elements.return_value = []
+        result = self.scraper.extract_json_ld_selenium("https://example.com")
         self.assertIsNone(result)
-        mock_browser.close.assert_called_once()
 
-    @patch('models.scraper.sync_playwright')
-    def test_extract_json_ld_selenium_empty(self, mock_playwright):
+    @patch('models.scraper.webdriver.Chrome')
+    def test_extract_json_ld_selenium_empty(self, mock_chrome):
         mock_browser = MagicMock()
-        mock_page = MagicMock()
         mock_script = MagicMock()
-        mock_playwright.return_value.__enter__.return_value.chromium.launch.return_value = mock_browser
-        mock_browser.new_page.return_value = mock_page
-        mock_page.query_selector_all.return_value = [mock_script]
-        mock_script.inner_text.return_value = ''
-        result = BeautifulSoupScraper.extract_json_ld_selenium("https://example.com")
+        mock_chrome.return_value = mock_browser
+        mock_browser.find_elements.return_value = [mock_script]
+        mock_script.get_attribute.return_value = ''
+        result = self.scraper.extract_json_ld_selenium("https://example.com")
         self.assertIsNone(result)
-        mock_browser.close.assert_called_once()
+
+    @patch('models.scraper.webdriver.Chrome')
+    def test_extract_json_ld_selenium_reuses_browser(self, mock_chrome):
+        mock_browser = MagicMock()
+        mock_chrome.return_value = mock_browser
+        mock_browser.find_elements.return_value = []
+        self.scraper.extract_json_ld_selenium("https://example.com/a")
+        self.scraper.extract_json_ld_selenium("https://example.com/b")
+        mock_chrome.assert_called_once()
+        self.assertEqual(self.browser_pool.stats()['started'], 1)
 
     def test_get_full_language_name(self):
         result = self.scraper.get_full_language_name('en')
@@ -181,13 +188,13 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         result = self.scraper.detect_language_full_name("This is a sample text.")
         self.assertEqual(result, ('en', 'English'))
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_extract_json_ld_failure(self, mock_get):
         mock_get.side_effect = requests.exceptions.RequestException("Failed to fetch URL")
         result = self.scraper.extract_json_ld('https://example.com')
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_extract_rdfa_failure(self, mock_get):
         # Simulate a failed HTTP request
         mock_get.side_effect = requests.exceptions.RequestException("Failed to fetch URL")
@@ -198,6 +205,40 @@ class TestBeautifulSoupScraper(unittest.TestCase):
         # Assert that the result is None due to the failure
         self.assertIsNone(result)
 
+    @patch('models.scraper.Goose')
+    @patch('requests.Session.get')
+    def test_fetch_page_downloads_once(self, mock_get, mock_goose):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = '<html lang="en"><head><meta property="og:title" content="Sample"></head></html>'
+        mock_response.content = mock_response.text.encode()
+        mock_get.return_value = mock_response
+        mock_goose.return_value.extract.return_value.opengraph = {'title': 'Sample'}
+
+        scraper = BeautifulSoupScraper(self.service, self.options)
+        scraper.fetch_page('https://example.com')
+        scraper._get_soup('https://example.com')
+        result = scraper.extract_rdfa('https://example.com')
+
+        self.assertEqual(result, {'headline': 'Sample'})
+        mock_get.assert_called_once()
+        mock_goose.return_value.extract.assert_called_once_with(url='https://example.com',
+                                                                raw_html=mock_response.text)
+
+    @patch('models.scraper.time.sleep')
+    @patch('requests.Session.get')
+    def test_failed_fetch_is_not_retried_by_other_extractors(self, mock_get, mock_sleep):
+        mock_get.return_value.status_code = 503
+
+        scraper = BeautifulSoupScraper(self.service, self.options)
+        self.assertIsNone(scraper.extract_json_ld('https://example.com'))
+        self.assertIsNone(scraper.extract_rdfa('https://example.com'))
+        with self.assertRaises(ValueError):
+            scraper._get_soup('https://example.com')
+
+        self.assertEqual(mock_get.call_count, scraper.max_attempts)
+        self.assertEqual(mock_sleep.call_count, scraper.max_attempts - 1)
+
 
 class TestBeautifulSoupScraper2(unittest.TestCase):
     def setUp(self):
@@ -406,7 +447,7 @@ class TestScraperData(unittest.TestCase):
         self.options.add_argument('--disable-dev-shm-usage')
         self.scraper = BeautifulSoupScraper(self.service, self.options)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_html_content_success(self, mock_get):
         # Setup mock response
         mock_response = MagicMock()
@@ -418,10 +459,10 @@ class TestScraperData(unittest.TestCase):
 
         # Assert that the response was returned successfully
         self.assertEqual(result, mock_response)
-        mock_get.assert_called_once_with("https://example.com", headers={"User-Agent": scraper.user_agent},
+        mock_get.assert_called_once_with("https://example.com", headers=scraper.headers,
                                          timeout=scraper.timeout)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_html_content_retry(self, mock_get):
         # Simulate retries and then success
         mock_response = MagicMock()
@@ -436,7 +477,7 @@ class TestScraperData(unittest.TestCase):
         self.assertEqual(result, mock_response)
         self.assertEqual(mock_get.call_count, 3)  # Should have retried 2 times
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_html_content_failure(self, mock_get):
         # Simulate failure to get the HTML content
         mock_get.side_effect = requests.exceptions.RequestException
@@ -478,7 +519,7 @@ class TestBeautifulSoupScraper3(unittest.TestCase):
         self.options.add_argument('--no-sandbox')
         self.options.add_argument('--disable-dev-shm-usage')
 
-    @patch('requests.get')  # Mock only requests.get
+    @patch('requests.Session.get')  # Mock only requests.get
     @patch('goose3.Goose')  # Mock Goose
     @patch('newspaper.Article')  # Mock Newspaper Article
     def test_extract_data(self, mock_article, mock_goose, mock_requests_get):
@@ -550,6 +591,18 @@ class TestBeautifulSoupScraper3(unittest.TestCase):
         self.assertEqual(article.keywords, ['keyword1', 'keyword2'])
         self.assertEqual(article.html, "<html><body><h1>Sample Content</h1></body></html>")
 
+    def test_parse_article_reuses_fetched_html(self):
+        article = MagicMock()
+        article.keywords = ['keyword1']
+        html = "<html><body><h1>Sample Content</h1></body></html>"
+
+        scraper = BeautifulSoupScraper(self.service, self.options)
+        result = scraper._parse_article(article, html)
+
+        article.download.assert_called_once_with(input_html=html)
+        article.parse.assert_called_once()
+        self.assertEqual(result.keywords, ['keyword1'])
+
 
 class TestDetectLanguageBeautifulSoupScraper(unittest.TestCase):
     def setUp(self):
@@ -664,7 +717,7 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         self.options.add_argument('--disable-dev-shm-usage')
         self.scraper = BeautifulSoupScraper(self.service, self.options)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('models.scraper.BeautifulSoupScraper.extract_main_article_json_ld')
     def test_extract_json_ld_success(self, mock_extract_main_article_json_ld, mock_requests_get):
         # Case 1: Valid URL and JSON-LD found
@@ -685,7 +738,7 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         # Assert that the result is the expected JSON-LD data
         self.assertEqual(result, {"key": "value"})
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('models.scraper.BeautifulSoupScraper.extract_main_article_json_ld')
     def test_extract_json_ld_no_json_ld(self, mock_extract_main_article_json_ld, mock_requests_get):
         # Case 2: Valid URL but no JSON-LD found
@@ -706,7 +759,7 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         # Assert that the result is None (no JSON-LD found)
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_extract_json_ld_invalid_url(self, mock_requests_get):
         # Case 3: Invalid URL (RequestException)
 
@@ -719,7 +772,7 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         # Assert that the result is None (due to the request exception)
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_extract_json_ld_http_error(self, mock_requests_get):
         # Case 4: Valid URL but HTTP error (404)
 
@@ -736,7 +789,7 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         # Assert that the result is None due to the HTTP error
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('models.scraper.BeautifulSoupScraper.extract_main_article_json_ld')
     def test_extract_json_ld_unexpected_json_ld(self, mock_extract_main_article_json_ld, mock_requests_get):
         # Case 5: Valid URL but with unexpected structure in JSON-LD
@@ -757,7 +810,7 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         # Assert that the result contains the unexpected structure (as it's still a valid JSON-LD)
         self.assertEqual(result, {"unexpected": "structure"})
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     @patch('models.scraper.BeautifulSoupScraper.extract_main_article_json_ld')
     def test_extract_json_ld_invalid_json(self, mock_extract_main_article_json_ld, mock_requests_get):
         # Case 6: Valid URL but malformed or invalid JSON in JSON-LD
@@ -779,5 +832,37 @@ class TestBeautifulSoupScraperJsonLoad(unittest.TestCase):
         self.assertIsNone(result)
 
 
+    @patch.object(BeautifulSoupScraper, 'extract_json_ld_selenium')
+    def test_extract_main_article_json_ld_static_first(self, mock_extract_json_ld_selenium):
+        scraper = BeautifulSoupScraper(self.service, self.options)
+        page_url = 'https://www.example.com/article/static'
+        soup = BeautifulSoup(
+            '<html><head><script type="application/ld+json">'
+            '{"@type": "NewsArticle", "headline": "Static headline"}'
+            '</script></head></html>', 'html.parser')
+
+        result = scraper.extract_main_article_json_ld(soup, '', page_url)
+
+        self.assertEqual(result['headline'], 'Static headline')
+        self.assertEqual(scraper.json_ld_tier, 'static')
+        mock_extract_json_ld_selenium.assert_not_called()
+
+    @patch.object(BeautifulSoupScraper, 'extract_json_ld_selenium')
+    def test_extract_main_article_json_ld_rendered_fallback(self, mock_extract_json_ld_selenium):
+        scraper = BeautifulSoupScraper(self.service, self.options)
+        page_url = 'https://www.example.com/article/rendered'
+        soup = BeautifulSoup(
+            '<html><head><script type="application/ld+json">'
+            '{"@type": "WebSite", "name": "Example"}'
+            '</script></head></html>', 'html.parser')
+        mock_extract_json_ld_selenium.return_value = [{'@type': 'Article', 'headline': 'Rendered headline'}]
+
+        result = scraper.extract_main_article_json_ld(soup, '', page_url)
+
+        self.assertEqual(result['headline'], 'Rendered headline')
+        self.assertEqual(scraper.json_ld_tier, 'rendered')
+        mock_extract_json_ld_selenium.assert_called_once_with(page_url)
+
+
 if __name__ == '__main__':
     unittest.main()
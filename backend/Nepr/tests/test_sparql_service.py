@@ -0,0 +1,408 @@
+import re
+import unittest
+from unittest.mock import MagicMock
+
+from api.services.cooccurrence_service import CooccurrenceIndex
+from api.services.keyword_index import KeywordIndex
+from api.services.sparql_service import SPARQLService
+from api.services.vector_index import ArticleVectorIndex
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def binding(article, p, o, sub_p=None, sub_o=None):
+    result = {
+        'article': {'value': article},
+        'p': {'value': f"http://schema.org/{p}"},
+        'o': {'value': o}
+    }
+    if sub_p:
+        result['subP'] = {'value': f"http://schema.org/{sub_p}"}
+        result['subO'] = {'value': sub_o}
+    return result
+
+
+class TestGetArticlesByUrls(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.service = SPARQLService(None, None, http=self.http, keyword_index=KeywordIndex(':memory:'))
+
+    def test_single_query_grouped_in_input_order(self):
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            binding("http://a.com", "headline", "Article A"),
+            binding("http://b.com", "headline", "Article B"),
+            binding("http://a.com", "keywords", "politics"),
+        ]}}
+        articles = self.service.get_articles_by_urls(["http://b.com", "http://missing.com", "http://a.com"])
+
+        self.http.post.assert_called_once()
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn("VALUES ?article { <http://b.com> <http://missing.com> <http://a.com> }", query)
+        self.assertEqual([article['url'] for article in articles], ["http://b.com", "http://a.com"])
+        self.assertEqual(articles[0]['headline'], "Article B")
+        self.assertEqual(articles[1]['keywords'], ["politics"])
+
+    def test_empty_input_skips_query(self):
+        self.assertEqual(self.service.get_articles_by_urls([]), [])
+        self.http.post.assert_not_called()
+
+    def test_search_certain_articles_uses_batch(self):
+        self.http.post.return_value.json.return_value = {'results': {'bindings': []}}
+        self.assertEqual(self.service.search_certain_articles(["http://a.com", "http://b.com"]), [])
+        self.http.post.assert_called_once()
+
+
+class TestKeywordSearch(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.http.post.return_value.json.return_value = {'results': {'bindings': []}}
+        self.index = KeywordIndex(':memory:')
+        self.service = SPARQLService(None, None, http=self.http, keyword_index=self.index)
+
+    def test_falls_back_to_contains_until_index_is_built(self):
+        self.service.search_ranked_match(["Climate", "change"])
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn('IF(EXISTS { ?article schema:keywords ?keyword0 . '
+                      'FILTER(CONTAINS(LCASE(STR(?keyword0)), "climate")) }, 1, 0)', query)
+        self.assertIn("FILTER(?matchCount > 0)", query)
+        self.assertIn("ORDER BY DESC(?matches) DESC(?sortDate) STR(?article)", query)
+
+    def test_scores_resolved_from_index(self):
+        self.index.add("http://a.com", ["Climate change"])
+        self.index.add("http://b.com", ["Elections"])
+        self.index.mark_built()
+
+        self.service.search_ranked_match(["climate", "change"])
+        self.http.post.assert_called_once()
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn("VALUES (?article ?keywordScore) { (<http://a.com> 2) }", query)
+        self.assertNotIn("CONTAINS", query)
+
+        self.http.post.reset_mock()
+        self.service.search_advanced_ranked_match("elections", inLanguage="en")
+        keyword_query, criteria_query = [call.kwargs['data'] for call in self.http.post.call_args_list]
+        self.assertIn("VALUES (?article ?keywordScore) { (<http://b.com> 1) }", keyword_query)
+        self.assertIn("BIND((?keywordScore + IF(", keyword_query)
+        self.assertNotIn("VALUES", criteria_query)
+
+    def test_no_candidate_skips_query(self):
+        self.index.mark_built()
+        self.assertEqual(self.service.search_ranked_match(["nothing"]), [])
+        self.http.post.assert_not_called()
+
+    def test_common_term_pages_newest_first_past_a_batch(self):
+        articles = {f"http://news.com/{day:02d}": f"2024-01-{day:02d}" for day in range(1, 31)}
+        for url, date in articles.items():
+            self.index.add(url, ["Climate"], date)
+        self.index.add("http://news.com/no-headline", ["Climate"], "2024-01-20x")
+        self.index.mark_built()
+
+        def fuseki(url, data, headers):
+            # Lists the candidates of the VALUES block that have a headline, in the order given
+            response = MagicMock(status_code=200)
+            candidates = re.findall(r"\(<([^>]+)> (\d+)\)", data)
+            response.json.return_value = {'results': {'bindings': [
+                {'article': {'value': candidate}, 'headline': {'value': candidate},
+                 'datePublished': {'value': articles[candidate]}, 'matches': {'value': count}}
+                for candidate, count in candidates if candidate in articles]}}
+            return response
+
+        self.http.post.side_effect = fuseki
+        seen, cursor = [], None
+        while True:
+            page, _, cursor = self.service.search_articles_by_keywords("climate", limit=7, cursor=cursor)
+            seen.extend(article['url'] for article in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(articles, reverse=True))
+
+    def test_advanced_search_pages_candidates_in_bounded_batches(self):
+        # Odd days are in English; the articles 31-35 are English but match no term
+        articles = {f"http://news.com/{day:02d}": (f"2024-01-{day:02d}", day % 2, day <= 30) for day in range(1, 36)}
+        for url, (date, _, keyword) in articles.items():
+            if keyword:
+                self.index.add(url, ["Climate"], date)
+        self.index.mark_built()
+        self.service.keyword_batch = 4
+
+        def fuseki(url, data, headers):
+            # Ranks the articles of the VALUES block, or all of them without one, like the summary query
+            response = MagicMock(status_code=200)
+            candidates = dict(re.findall(r"\(<([^>]+)> (\d+)\)", data))
+            self.assertLessEqual(len(candidates), 4)
+            having = re.search(r'MAX\(\?matchCount\) < (\d+).*?< "([^"]*)".*?STR\(\?article\) > "([^"]*)"', data)
+            rows = []
+            for candidate, (date, english, _) in articles.items():
+                if "VALUES" in data and candidate not in candidates:
+                    continue
+                matches = int(candidates.get(candidate, 0)) + english
+                if not matches:
+                    continue
+                if having:
+                    count, after_date, after_url = int(having.group(1)), having.group(2), having.group(3)
+                    if not (matches < count or matches == count and (
+                            date < after_date or date == after_date and candidate > after_url)):
+                        continue
+                rows.append((-matches, [-ord(c) for c in date], candidate, date))
+            limit = int(re.search(r"LIMIT (\d+)", data).group(1))
+            response.json.return_value = {'results': {'bindings': [
+                {'article': {'value': candidate}, 'headline': {'value': candidate},
+                 'datePublished': {'value': date}, 'matches': {'value': str(-matches)}}
+                for matches, _, candidate, date in sorted(rows)[:limit]]}}
+            return response
+
+        self.http.post.side_effect = fuseki
+        seen, cursor = [], None
+        while True:
+            page, _, cursor = self.service.advanced_search(
+                keywords="climate", inLanguage="en", limit=6, cursor=cursor)
+            seen.extend(article['url'] for article in page)
+            if cursor is None:
+                break
+        expected = [url for url, (date, english, keyword) in sorted(
+            articles.items(), key=lambda item: (-(item[1][1] + item[1][2]), [-ord(c) for c in item[1][0]]))
+            if english or keyword]
+        self.assertEqual(seen, expected)
+
+    def test_rows_labelled_by_match_count(self):
+        self.http.post.return_value.status_code = 200
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            {'article': {'value': "http://a.com"}, 'matches': {'value': "2"}},
+            {'article': {'value': "http://b.com"}, 'matches': {'value': "1"}}
+        ]}}
+        articles, match_type, _ = self.service.search_articles_by_keywords("climate change")
+        self.assertEqual([article['matchType'] for article in articles], ['Exact', 'Partial'])
+        self.assertEqual(match_type, "Mixed matches")
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.http.post.return_value.status_code = 200
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            {'article': {'value': "http://a.com"}, 'headline': {'value': "Article A"}, 'matches': {'value': "2"}}
+        ]}}
+        self.service = SPARQLService(None, None, http=self.http, keyword_index=KeywordIndex(':memory:'))
+
+    def test_repeated_search_is_cached(self):
+        first = self.service.search_articles_by_keywords("Climate  change")
+        second = self.service.search_articles_by_keywords("climate change")
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], "Exact matches")
+        self.http.post.assert_called_once()
+        self.assertEqual(self.service.search_cache_stats()['hits'], 1)
+
+    def test_write_invalidates_cache(self):
+        self.http.put.return_value.status_code = 201
+        self.service.get_all_articles()
+        self.service.insert_graph("<http://a.com> <http://schema.org/headline> \"A\" .", "http://a.com")
+        self.service.get_all_articles()
+        self.assertEqual(self.http.post.call_count, 2)
+        self.assertEqual(self.service.search_cache_stats()['dataset_version'], 1)
+
+    def test_article_graph_is_replaced(self):
+        self.http.put.return_value.status_code = 201
+        self.service.insert_graph("<http://a.com> <http://schema.org/headline> \"A\" .", url="http://a.com")
+        self.assertEqual(self.http.put.call_args.kwargs['params'], {'graph': "http://a.com#graph"})
+        # The session's default timeout applies
+        self.assertNotIn('timeout', self.http.put.call_args.kwargs)
+        self.http.post.assert_not_called()
+        self.assertEqual(self.service.search_cache_stats()['dataset_version'], 1)
+
+    def test_delete_drops_article_graph(self):
+        self.service.keyword_index.add("http://a.com", ["climate"])
+        self.http.post.return_value.status_code = 204
+        self.assertEqual(self.service.delete_article_by_url("http://a.com"), (True, "Article deleted successfully"))
+        update = self.http.post.call_args.kwargs['data']
+        self.assertTrue(update.startswith("DROP SILENT GRAPH <http://a.com#graph> ;"))
+        # Articles not migrated to their own graph yet are deleted from the default graph
+        self.assertIn("GRAPH <urn:x-arq:DefaultGraph> { <http://a.com> ?p ?o }", update)
+        self.assertEqual(self.service.keyword_index.search(["climate"]), [])
+
+    def test_empty_results_are_not_cached(self):
+        self.http.post.return_value.json.return_value = {'results': {'bindings': []}}
+        self.service.get_all_articles()
+        self.service.get_all_articles()
+        self.assertEqual(self.http.post.call_count, 2)
+
+
+class TestPaging(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.http.post.return_value.status_code = 200
+        self.service = SPARQLService(None, None, http=self.http, keyword_index=KeywordIndex(':memory:'))
+
+    def rows(self, *urls):
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            {'article': {'value': url}, 'datePublished': {'value': "2024-01-0%d" % (index + 1)}}
+            for index, url in enumerate(urls)
+        ]}}
+
+    def test_next_cursor_when_more_rows(self):
+        self.rows("http://a.com", "http://b.com", "http://c.com")
+        articles, next_cursor = self.service.get_all_articles(limit=2)
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn("LIMIT 3", query)
+        self.assertIn("ORDER BY DESC(?sortDate) STR(?article)", query)
+        self.assertEqual([article['url'] for article in articles], ["http://a.com", "http://b.com"])
+        self.assertEqual(decode_cursor(next_cursor), {'d': "2024-01-02", 'u': "http://b.com"})
+
+        self.rows("http://c.com")
+        articles, next_cursor = self.service.get_all_articles(limit=2, cursor=next_cursor)
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn('< "2024-01-02"', query)
+        self.assertIn('STR(?article) > "http://b.com"', query)
+        self.assertIsNone(next_cursor)
+
+    def test_ranked_cursor_carries_match_count(self):
+        self.rows("http://a.com", "http://b.com")
+        articles, match_type, next_cursor = self.service.search_articles_by_keywords("climate", limit=1)
+        self.assertEqual(match_type, "Partial matches")
+        self.assertEqual(decode_cursor(next_cursor), {'c': 0, 'd': "2024-01-01", 'u': "http://a.com"})
+
+        self.rows()
+        articles, match_type, next_cursor = self.service.search_articles_by_keywords("climate", limit=1,
+                                                                                     cursor=next_cursor)
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn("MAX(?matchCount) < 0 || (MAX(?matchCount) = 0 && (", query)
+        self.assertEqual(articles, [])
+        self.assertEqual(self.http.post.call_count, 2)
+
+    def test_data_pages_by_graph_with_blank_nodes(self):
+        def triple(graph, s, o, o_type='uri'):
+            return {'g': {'type': 'uri', 'value': graph}, 's': {'type': 'uri', 'value': s},
+                    'p': {'type': 'uri', 'value': "http://schema.org/author"}, 'o': {'type': o_type, 'value': o}}
+
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            triple("http://a.com#graph", "http://a.com", "b0", 'bnode'),
+            triple("http://a.com#graph", "http://a.com", "http://example.com/author"),
+            triple("http://b.com#graph", "http://b.com", "b1", 'bnode')
+        ]}}
+        triples, next_cursor = self.service.get_all_data(limit=2)
+        self.assertEqual([t['o']['value'] for t in triples], ["b0", "http://example.com/author"])
+        self.assertEqual(decode_cursor(next_cursor), {'g': "http://a.com#graph"})
+        self.assertNotIn("STR(?s)", self.http.post.call_args.kwargs['data'])
+
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            triple("http://b.com#graph", "http://b.com", "b1", 'bnode')
+        ]}}
+        triples, next_cursor = self.service.get_all_data(limit=2, cursor=next_cursor)
+        self.assertIn('FILTER(STR(?g) > "http://a.com#graph")', self.http.post.call_args.kwargs['data'])
+        self.assertEqual(triples[0]['o'], {'type': 'bnode', 'value': "b1"})
+        self.assertIsNone(next_cursor)
+
+    def test_graph_larger_than_page_is_returned_whole(self):
+        first_page = [{'g': {'value': "http://a.com#graph"}, 's': {'value': "http://a.com"},
+                       'p': {'value': "http://schema.org/headline"}, 'o': {'value': str(i)}} for i in range(2)]
+        whole_graph = first_page + [dict(first_page[0], o={'value': "2"})]
+        self.http.post.return_value.json.side_effect = [{'results': {'bindings': first_page}},
+                                                        {'results': {'bindings': whole_graph}}]
+        triples, next_cursor = self.service.get_all_data(limit=1)
+        self.assertEqual(len(triples), 3)
+        self.assertIn("VALUES ?g { <http://a.com#graph> }", self.http.post.call_args.kwargs['data'])
+        self.assertEqual(decode_cursor(next_cursor), {'g': "http://a.com#graph"})
+
+    def test_data_rejects_old_cursor(self):
+        with self.assertRaises(ValueError):
+            self.service.get_all_data(cursor=encode_cursor({'s': "http://a.com", 'p': "x", 'o': "y"}))
+
+
+class TestRecommendations(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.vector_index = ArticleVectorIndex(':memory:', n_features=2 ** 12)
+        self.cooccurrence = CooccurrenceIndex(neighbours=10)
+        self.service = SPARQLService(None, None, http=self.http, keyword_index=KeywordIndex(':memory:'),
+                                     vector_index=self.vector_index, cooccurrence=self.cooccurrence)
+
+    def test_candidates_come_from_vector_index(self):
+        self.vector_index.add("http://a.com", {'headline': "Climate change summit"})
+        self.vector_index.add("http://b.com", {'headline': "Climate summit ends"})
+        self.vector_index.add("http://c.com", {'headline': "Football results"})
+        viewed = {'results': {'bindings': [binding("http://a.com", "headline", "Climate change summit")]}}
+        candidates = {'results': {'bindings': [
+            binding("http://b.com", "headline", "Climate summit ends"),
+            binding("http://c.com", "headline", "Football results")
+        ]}}
+        self.http.post.return_value.json.side_effect = [viewed, candidates]
+
+        recommendations = self.service.get_recommendations(["http://a.com"])
+        self.assertEqual(self.http.post.call_count, 2)
+        query = self.http.post.call_args.kwargs['data']
+        self.assertIn("VALUES ?article { <http://b.com> <http://c.com> }", query)
+        self.assertEqual([article['url'] for article in recommendations], ["http://b.com", "http://c.com"])
+
+    def test_profile_skips_history_fetch(self):
+        self.vector_index.add("http://b.com", {'headline': "Climate summit ends"})
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            binding("http://b.com", "headline", "Climate summit ends")
+        ]}}
+        profile = {
+            'preferences': {'keywords': "climate", 'author_name': None, 'publisher': None},
+            'centroid': self.vector_index.vectorize([{'headline': "Climate change summit"}])
+        }
+        recommendations = self.service.get_recommendations(["http://a.com"], profile=profile)
+        self.http.post.assert_called_once()
+        self.assertEqual([article['url'] for article in recommendations], ["http://b.com"])
+        self.assertGreater(recommendations[0]['similarity_score'], 0)
+
+    def test_batch_fetches_candidates_once(self):
+        self.vector_index.add("http://b.com", {'headline': "Climate summit ends"})
+        self.vector_index.add("http://c.com", {'headline': "Football results"})
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            binding("http://b.com", "headline", "Climate summit ends"),
+            binding("http://c.com", "headline", "Football results")
+        ]}}
+        profile = {'preferences': {}, 'centroid': self.vector_index.vectorize([{'headline': "Climate"}])}
+        report = {}
+        recommendations = self.service.get_recommendations_batch(
+            {"a@example.com": (["http://c.com"], profile), "b@example.com": ([], profile)}, report=report)
+        self.http.post.assert_called_once()
+        self.assertEqual([article['url'] for article in recommendations["a@example.com"]], ["http://b.com"])
+        self.assertEqual(len(recommendations["b@example.com"]), 2)
+        self.assertEqual(set(report['users']), {"a@example.com", "b@example.com"})
+        self.assertIn('fetch', report)
+
+    def test_articles_read_together_are_blended_in(self):
+        self.vector_index.add("http://b.com", {'headline': "Climate summit ends"})
+        self.cooccurrence.add_interactions([("u1@example.com", "http://a.com", 1.0),
+                                            ("u1@example.com", "http://d.com", 1.0)])
+        self.http.post.return_value.json.return_value = {'results': {'bindings': [
+            binding("http://b.com", "headline", "Climate summit ends"),
+            binding("http://d.com", "headline", "Football results")
+        ]}}
+        profile = {'preferences': {}, 'centroid': self.vector_index.vectorize([{'headline': "Climate summit"}])}
+        recommendations = self.service.get_recommendations(["http://a.com"], profile=profile)
+
+        self.assertIn("<http://d.com>", self.http.post.call_args.kwargs['data'])
+        scores = {article['url']: article for article in recommendations}
+        self.assertAlmostEqual(scores["http://d.com"]['cf_score'], 1.0)
+        self.assertEqual(scores["http://b.com"]['cf_score'], 0.0)
+        weight = self.service.cf_weight
+        self.assertAlmostEqual(scores["http://d.com"]['final_score'],
+                               (1 - weight) * 0.7 * scores["http://d.com"]['similarity_score'] + weight)
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.service = SPARQLService(None, None, http=self.http, keyword_index=KeywordIndex(':memory:'))
+
+    def test_streams_chunks_and_closes_response(self):
+        response = self.http.get.return_value
+        response.iter_content.return_value = iter([b"<http://a> <http://b> <http://c> .\n"])
+        media_type, chunks = self.service.export_data("ntriples")
+        self.assertEqual(media_type, "application/n-triples")
+        self.assertTrue(self.http.get.call_args.kwargs['stream'])
+        self.assertTrue(self.http.get.call_args.args[0].endswith("/NEPR-2024/data?graph=urn:x-arq:UnionGraph"))
+        response.close.assert_not_called()
+        self.assertEqual(b"".join(chunks), b"<http://a> <http://b> <http://c> .\n")
+        response.close.assert_called_once()
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            self.service.export_data("xml")
+        self.http.get.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from utils.upstreams import UpstreamPool, create_pools, max_attempts, record_probes, replica_urls
+
+
+class TestUpstreamPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = UpstreamPool(["http://a", "http://b", "http://c"], max_failures=2, ejection_seconds=60)
+        self.a, self.b, self.c = self.pool.upstreams
+
+    def test_least_outstanding(self):
+        first, second = self.pool.acquire(), self.pool.acquire()
+        self.assertNotEqual(first, second)
+        self.pool.release(first, 0.01, False)
+        third = self.pool.acquire()
+        self.assertNotIn(third, (second,))
+        self.assertEqual(sorted(upstream.outstanding for upstream in self.pool.upstreams), [0, 1, 1])
+
+    def test_round_robin(self):
+        pool = UpstreamPool(["http://a", "http://b"], strategy="round_robin")
+        urls = []
+        for _ in range(4):
+            upstream = pool.acquire()
+            urls.append(upstream.url)
+        self.assertEqual(urls, ["http://a", "http://b", "http://a", "http://b"])
+
+    def test_ejection_after_consecutive_failures(self):
+        self.a.outstanding = 2
+        self.pool.release(self.a, 0.5, True)
+        self.pool.release(self.a, 0.5, True)
+        self.assertEqual(self.a.ejections, 1)
+        for _ in range(10):
+            upstream = self.pool.acquire()
+            self.assertIsNot(upstream, self.a)
+            self.pool.release(upstream, 0.01, False)
+        stats = self.pool.stats()[0]
+        self.assertFalse(stats["available"])
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual(stats["latency_ms"]["max"], 500.0)
+
+    def test_success_resets_failures(self):
+        self.a.outstanding = 3
+        self.pool.release(self.a, 0.1, True)
+        self.pool.release(self.a, 0.1, False)
+        self.pool.release(self.a, 0.1, True)
+        self.assertEqual(self.a.ejections, 0)
+
+    def test_unavailable_replicas_used_as_last_resort(self):
+        record_probes({"article": self.pool}, {"http://a": 404, "http://b": None, "http://c": 500})
+        self.assertEqual([upstream.healthy for upstream in self.pool.upstreams], [True, False, False])
+        self.assertIs(self.pool.acquire(), self.a)
+        self.assertIn(self.pool.acquire([self.a]), (self.b, self.c))
+        self.assertIsNone(self.pool.acquire([self.a, self.b, self.c]))
+
+    @patch.dict(os.environ, {"GATEWAY_UPSTREAMS_ARTICLE": "http://a, http://b", "GATEWAY_RETRIES": "5"})
+    def test_pools_and_attempts(self):
+        pools = create_pools({"article": "http://x", "user": ["http://u1", "http://u2"], "auth": "http://u1"})
+        self.assertEqual([upstream.url for upstream in pools["article"].upstreams], ["http://a", "http://b"])
+        self.assertEqual(replica_urls(pools), ["http://a", "http://b", "http://u1", "http://u2"])
+        self.assertEqual(max_attempts("GET", pools["article"]), 2)
+        self.assertEqual(max_attempts("POST", pools["article"]), 1)
+        self.assertEqual(max_attempts("GET", pools["auth"]), 1)
+
+    @patch.dict(os.environ, {"GATEWAY_UPSTREAMS_ARTICLE": " , "})
+    def test_empty_upstream_lists(self):
+        pools = create_pools({"article": "http://x"})
+        self.assertEqual([upstream.url for upstream in pools["article"].upstreams], ["http://x"])
+        with self.assertRaises(ValueError):
+            create_pools({"user": []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from api.services.vector_index import ArticleVectorIndex, article_text
+
+
+class TestArticleVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = ArticleVectorIndex(self.directory.name, n_features=2 ** 12, flush_every=2)
+        self.climate = {'url': "http://a.com", 'headline': "Climate change summit", 'keywords': ["climate"]}
+        self.football = {'url': "http://b.com", 'headline': "Football results", 'keywords': "sport league"}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_article_text(self):
+        self.assertEqual(article_text(self.football), "Football results sport league")
+
+    def test_vectors_are_normalized_and_saved(self):
+        self.index.add(self.climate['url'], self.climate)
+        self.assertEqual(self.index.stats()['pending'], 1)
+        self.index.add(self.football['url'], self.football)
+        self.assertEqual(self.index.stats()['articles'], 2)
+        self.assertEqual(self.index.stats()['pending'], 0)
+
+        reopened = ArticleVectorIndex(self.directory.name, n_features=2 ** 12)
+        vectors = reopened.vectors([{'url': "http://b.com"}, {'url': "http://a.com"}])
+        np.testing.assert_allclose(vectors.multiply(vectors).sum(axis=1).A.ravel(), [1, 1], rtol=1e-5)
+        np.testing.assert_allclose(vectors[1].toarray(), self.index.vectorize([self.climate]).toarray())
+
+    def test_similarity_of_candidates_to_viewed(self):
+        self.index.add(self.climate['url'], self.climate)
+        scores = self.index.similarity(
+            [{'url': "http://a.com"}],
+            [{'url': "http://c.com", 'headline': "Climate summit"}, self.football]
+        )
+        self.assertEqual(scores.shape, (2,))
+        self.assertGreater(scores[0], scores[1])
+
+    def test_nearest_articles(self):
+        tennis = {'url': "http://c.com", 'headline': "Tennis open final", 'keywords': ["tennis"]}
+        for article in (self.climate, self.football, tennis):
+            self.index.add(article['url'], article)
+        self.index.add("http://d.com", {'headline': "Climate summit ends"})
+        self.index.exact_limit = 0
+
+        found = self.index.similar_articles([{'url': "http://a.com"}], k=2, exclude=["http://a.com"])
+        self.assertEqual(found[0][0], "http://d.com")
+        self.assertNotIn("http://a.com", [url for url, _ in found])
+        self.assertEqual(len(found), 2)
+
+        self.index.remove("http://d.com")
+        found = self.index.similar_articles([{'url': "http://a.com"}], k=3)
+        self.assertEqual(found[0][0], "http://a.com")
+        self.assertNotIn("http://d.com", [url for url, _ in found])
+
+    def test_remove(self):
+        self.index.add(self.climate['url'], self.climate)
+        self.index.save()
+        self.index.remove(self.climate['url'])
+        self.index.save()
+        self.assertEqual(ArticleVectorIndex(self.directory.name, n_features=2 ** 12).stats()['articles'], 0)
+
+    def test_rebuild_from_fuseki(self):
+        http = MagicMock()
+        http.post.return_value.json.return_value = {'results': {'bindings': [
+            {'article': {'value': "http://c.com"}, 'headline': {'value': "Tennis"}, 'keyword': {'value': "sport"}},
+            {'article': {'value': "http://c.com"}, 'headline': {'value': "Tennis"}, 'keyword': {'value': "open"}}
+        ]}}
+        self.index.add(self.climate['url'], self.climate)
+        self.assertEqual(self.index.rebuild("http://fuseki", http=http), 1)
+        np.testing.assert_allclose(
+            self.index.vectors([{'url': "http://c.com"}]).toarray(),
+            self.index.vectorize([{'headline': "Tennis", 'keywords': ["sport", "open"]}]).toarray()
+        )
+        self.assertEqual(self.index.stats()['articles'], 1)
+
+    def test_pending_changes_survive_restart_and_are_shared(self):
+        other = ArticleVectorIndex(self.directory.name, n_features=2 ** 12, flush_every=10)
+        other.sync_seconds = 0
+        self.index.add(self.climate['url'], self.climate)
+
+        found = other.similar_articles([self.climate], k=1)
+        self.assertEqual(found[0][0], "http://a.com")
+        reopened = ArticleVectorIndex(self.directory.name, n_features=2 ** 12)
+        self.assertEqual(reopened.stats()['pending'], 1)
+
+    def test_add_catches_up_with_the_journal(self):
+        index = ArticleVectorIndex(self.directory.name, n_features=2 ** 12, flush_every=10)
+        index.sync_seconds = 3600
+        other = ArticleVectorIndex(self.directory.name, n_features=2 ** 12, flush_every=10)
+        other.add(self.football['url'], self.football)
+        index.add(self.climate['url'], self.climate)
+        self.assertEqual(index.stats()['pending'], 2)
+        self.assertEqual(index.journal_position(), 2)
+
+    def test_concurrent_saves_keep_each_others_articles(self):
+        other = ArticleVectorIndex(self.directory.name, n_features=2 ** 12, flush_every=10)
+        self.index.add(self.climate['url'], self.climate)
+        other.add(self.football['url'], self.football)
+        self.index.save()
+        other.save()
+
+        stats = ArticleVectorIndex(self.directory.name, n_features=2 ** 12).stats()
+        self.assertEqual(stats['articles'], 2)
+        self.assertEqual(stats['pending'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
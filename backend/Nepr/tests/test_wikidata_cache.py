@@ -0,0 +1,121 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from models.wikidata import WikidataClient
+from models.wikidata_cache import WikidataCache
+from utils.ttl_cache import TTLCache, MISSING
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', None, ttl=-1)
+        self.assertIs(cache.get('a'), MISSING)
+
+    def test_none_is_cached(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', None)
+        self.assertIsNone(cache.get('a'))
+
+
+class TestWikidataCache(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_entries_persist_on_disk(self):
+        WikidataCache(self.path).set('organization', 'Reuters', {'publishingPrinciples': 'url'})
+        cache = WikidataCache(self.path)
+        self.assertEqual(cache.get('organization', '  reuters '), {'publishingPrinciples': 'url'})
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+
+    def test_negative_entries_use_negative_ttl(self):
+        cache = WikidataCache(self.path, negative_ttl=0.01)
+        cache.set('person', 'Staff Writer', None)
+        self.assertIsNone(cache.get('person', 'Staff Writer'))
+        self.assertEqual(cache.stats()['negative_hits'], 1)
+        time.sleep(0.02)
+        self.assertIs(cache.get('person', 'Staff Writer'), MISSING)
+
+
+class TestWikidataClient(unittest.TestCase):
+    def setUp(self):
+        self.http = MagicMock()
+        self.client = WikidataClient(http=self.http, cache=WikidataCache(':memory:'))
+
+    def test_repeated_names_hit_cache(self):
+        self.http.get.return_value.json.return_value = {'results': {'bindings': [{
+            'occupationLabel': {'value': 'Journalist'},
+            'genderLabel': {'value': 'Female'}
+        }]}}
+        first = self.client.get_person("Jane Doe")
+        second = self.client.get_person("jane  doe")
+        self.assertEqual(first, second)
+        self.assertEqual(first['jobTitle'], 'Journalist')
+        self.http.get.assert_called_once()
+
+    def test_no_match_is_cached(self):
+        self.http.get.return_value.json.return_value = {'results': {'bindings': []}}
+        self.assertIsNone(self.client.get_organization("Unknown Org"))
+        self.assertIsNone(self.client.get_organization("Unknown Org"))
+        self.http.get.assert_called_once()
+
+    def test_errors_are_not_cached(self):
+        self.http.get.side_effect = requests.exceptions.RequestException("Error")
+        self.assertIsNone(self.client.get_organization("Reuters"))
+        self.assertIsNone(self.client.get_organization("Reuters"))
+        self.assertEqual(self.http.get.call_count, 2)
+
+    def test_warm_up_skips_cached_names(self):
+        self.http.get.return_value.json.return_value = {'results': {'bindings': []}}
+        self.assertEqual(self.client.warm_up(["Reuters", "BBC News"]), 2)
+        self.assertEqual(self.client.warm_up(["Reuters", "BBC News"]), 0)
+
+    def test_prefetch_resolves_names_in_one_request(self):
+        self.http.get.return_value.json.return_value = {'results': {'bindings': [
+            {'name': {'value': 'Jane Doe'}, 'occupationLabel': {'value': 'Journalist'}},
+            {'name': {'value': 'John Roe'}, 'occupationLabel': {'value': 'Painter'}}
+        ]}}
+        self.client.prefetch_persons(["Jane Doe", "John Roe", "jane doe", "Nobody"])
+        self.http.get.assert_called_once()
+        query = self.http.get.call_args.kwargs['params']['query']
+        self.assertIn('VALUES ?name { "Jane Doe"@en "John Roe"@en "Nobody"@en }', query)
+
+        self.assertEqual(self.client.get_person("Jane Doe")['jobTitle'], 'Journalist')
+        self.assertIsNone(self.client.get_person("John Roe"))
+        self.assertIsNone(self.client.get_person("Nobody"))
+        self.http.get.assert_called_once()
+
+    def test_prefetch_chunks_and_skips_cached_names(self):
+        self.client.batch_size = 2
+        self.http.get.return_value.json.return_value = {'results': {'bindings': []}}
+        self.client.cache.set('organization', 'Reuters', None)
+        self.client.prefetch_organizations(["Reuters", "BBC News", "CNN", "NPR"])
+        self.assertEqual(self.http.get.call_count, 2)
+
+    def test_prefetch_errors_are_not_cached(self):
+        self.http.get.side_effect = requests.exceptions.RequestException("Error")
+        self.client.prefetch_organizations(["Reuters"])
+        self.assertIs(self.client.cache.get('organization', 'Reuters'), MISSING)
+
+
+if __name__ == '__main__':
+    unittest.main()
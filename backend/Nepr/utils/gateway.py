@@ -0,0 +1,188 @@
+import asyncio
+import os
+
+from flask import Response
+
+# Address of the service behind each first path segment of the gateway
+SERVICES = {
+    "user": "http://127.0.0.1:5002",
+    "article": "http://127.0.0.1:5001",
+    "auth": "http://127.0.0.1:5002",
+    "email": "http://127.0.0.1:5002"
+}
+
+TIMEOUT = 60
+
+# Read timeouts per service; article creation scrapes and enriches the page before answering
+SERVICE_TIMEOUTS = {
+    "article": 120
+}
+
+CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", 5))
+
+# Maximum in-flight requests per route, the routes not listed being unlimited
+ROUTE_LIMITS = {
+    "article/create": 32
+}
+
+# Headers that only apply to one connection and are never forwarded by a proxy
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+              "transfer-encoding", "upgrade"}
+
+# Size of the chunks of upstream bodies streamed to the client
+CHUNK_SIZE = 64 * 1024
+
+
+def service_timeout(service, timeouts, default):
+    """
+    Returns the read timeout of a service: GATEWAY_TIMEOUT_<SERVICE> if set, else its entry in
+    the timeouts table, else the default.
+    """
+    value = os.getenv(f"GATEWAY_TIMEOUT_{service.upper()}")
+    return float(value) if value is not None else float(timeouts.get(service, default))
+
+
+def upstream_url(service_url, service, path, query_string=b""):
+    """
+    Rewrites a gateway URL to the URL of the service: /<service>/<path>?<query> is forwarded
+    unchanged to the service address.
+    """
+    full_url = f"{service_url}/{service}/{path}" if path else f"{service_url}/{service}"
+    if query_string:
+        full_url += '?' + (query_string.decode('utf-8') if isinstance(query_string, bytes) else query_string)
+    return full_url
+
+
+def request_headers(headers):
+    """
+    Returns the client headers forwarded upstream: all but Host, the hop-by-hop headers and
+    Content-Length, which the HTTP client sets for the forwarded body.
+    """
+    return {key: value for key, value in headers
+            if key.lower() not in HOP_BY_HOP and key.lower() not in ("host", "content-length")}
+
+
+def response_headers(headers):
+    """
+    Returns the upstream headers forwarded to the client: all but the hop-by-hop headers and the
+    CORS headers, which the gateway sets itself. Content-Encoding and Content-Length are kept,
+    as the body is forwarded undecoded.
+    """
+    return [(key, value) for key, value in headers.items()
+            if key.lower() not in HOP_BY_HOP and not key.lower().startswith("access-control-")]
+
+
+def stream_response(upstream):
+    """
+    Streams an upstream response to the client without buffering or decoding it.
+    Args:
+        upstream: A requests response opened with stream=True.
+    Returns:
+        Response: The response with the upstream status and headers, closing the upstream
+        connection (back to its pool) once the body is sent.
+    """
+    def body():
+        try:
+            yield from upstream.raw.stream(CHUNK_SIZE, decode_content=False)
+        finally:
+            upstream.close()
+
+    response = Response(body(), status=upstream.status_code, headers=response_headers(upstream.headers))
+    response.call_on_close(upstream.close)
+    return response
+
+
+def route_of(service, path):
+    """
+    Returns the route of a request: its service and the first segment of its path,
+    e.g. 'article/create' for /article/create/async.
+    """
+    segment = path.split('/', 1)[0] if path else ""
+    return f"{service}/{segment}" if segment else service
+
+
+def route_limit(route, limits):
+    """
+    Returns the concurrency limit of a route: GATEWAY_LIMIT_<ROUTE> if set (e.g.
+    GATEWAY_LIMIT_ARTICLE_CREATE), else its entry in the limits table, else None.
+    """
+    value = os.getenv(f"GATEWAY_LIMIT_{route.upper().replace('/', '_')}")
+    if value is not None:
+        return int(value)
+    return limits.get(route)
+
+
+class RouteLimiter:
+    """
+    Bounds the in-flight requests of each route on an event loop. Requests over the limit wait
+    for a slot; once `max_waiting` requests wait on a route, further ones are rejected, so a
+    slow route holds a bounded number of requests in memory.
+    """
+
+    def __init__(self, limits=None, max_waiting=None):
+        """
+        Args:
+            limits (dict): Maximum in-flight requests per route, see route_limit.
+            max_waiting (int): Maximum requests waiting per route.
+        """
+        self.limits = ROUTE_LIMITS if limits is None else limits
+        self.max_waiting = max_waiting if max_waiting is not None else int(os.getenv("GATEWAY_MAX_WAITING", 256))
+        self._semaphores = {}
+        self._waiting = {}
+        self._rejected = {}
+
+    def slot(self, route):
+        """
+        Returns an async context manager holding an in-flight slot of a route.
+        Raises:
+            RouteBusy: On entry, if the route already has `max_waiting` requests waiting.
+        """
+        return _Slot(self, route)
+
+    def _semaphore(self, route):
+        # Only limited routes get a semaphore, so arbitrary paths do not grow the table
+        if route not in self._semaphores:
+            limit = route_limit(route, self.limits)
+            if not limit:
+                return None
+            self._semaphores[route] = asyncio.Semaphore(limit)
+        return self._semaphores[route]
+
+    def stats(self):
+        """
+        Returns the limit, free slots, waiting and rejected requests of each limited route.
+        """
+        return {route: {"limit": route_limit(route, self.limits), "free": semaphore._value,
+                        "waiting": self._waiting.get(route, 0), "rejected": self._rejected.get(route, 0)}
+                for route, semaphore in self._semaphores.items()}
+
+
+class RouteBusy(Exception):
+    """Raised when a route has too many requests waiting for a slot."""
+
+
+class _Slot:
+    def __init__(self, limiter, route):
+        self.limiter, self.route = limiter, route
+        self.semaphore = limiter._semaphore(route)
+
+    async def __aenter__(self):
+        if self.semaphore is None:
+            return self
+        limiter = self.limiter
+        if self.semaphore.locked():
+            if limiter._waiting.get(self.route, 0) >= limiter.max_waiting:
+                limiter._rejected[self.route] = limiter._rejected.get(self.route, 0) + 1
+                raise RouteBusy(self.route)
+            limiter._waiting[self.route] = limiter._waiting.get(self.route, 0) + 1
+            try:
+                await self.semaphore.acquire()
+            finally:
+                limiter._waiting[self.route] -= 1
+        else:
+            await self.semaphore.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.semaphore is not None:
+            self.semaphore.release()
@@ -0,0 +1,120 @@
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class _PooledSession(requests.Session):
+    """A requests session that applies a default timeout to every call."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+# Paths of read-only endpoints queried with POST (SPARQL queries), safe to retry like a GET
+READ_ONLY_POST_PATHS = ("/query", "/sparql")
+
+
+class _ReadOnlyPostAdapter(HTTPAdapter):
+    """
+    Pooled adapter that also retries POSTs to read-only endpoints, through a second pool whose
+    retries allow POST. urllib3 never retries a POST by default, since replaying a write could
+    apply it twice; SPARQL updates and Graph Store uploads keep that behaviour.
+    """
+
+    def __init__(self, query_adapter, **kwargs):
+        super().__init__(**kwargs)
+        self.query_adapter = query_adapter
+
+    def send(self, request, *args, **kwargs):
+        if request.method == "POST" and urlparse(request.url).path.endswith(READ_ONLY_POST_PATHS):
+            return self.query_adapter.send(request, *args, **kwargs)
+        return super().send(request, *args, **kwargs)
+
+    def close(self):
+        super().close()
+        self.query_adapter.close()
+
+
+class HttpClient:
+    """
+    Keeps one pooled, keep-alive session per target host (Fuseki, Wikidata, publishers, ...).
+    Every setting can be overridden per target through the environment, e.g. HTTP_POOL_SIZE_FUSEKI
+    takes precedence over HTTP_POOL_SIZE.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name, target, default):
+        value = os.getenv(f"{name}_{target.upper()}", os.getenv(name))
+        return type(default)(value) if value is not None else default
+
+    def session(self, target, **overrides):
+        """
+        Returns the shared session for a target host, creating it on first use.
+        Args:
+            target (str): Name of the target host, e.g. 'fuseki' or 'wikidata'.
+            overrides: Defaults for pool_size, pool_connections, timeout, retries or backoff
+                used when the environment does not configure them.
+        Returns:
+            requests.Session: A session with connection pooling, a default timeout and backoff retries.
+        """
+        with self._lock:
+            if target not in self._sessions:
+                self._sessions[target] = self._create_session(target, overrides)
+            return self._sessions[target]
+
+    def _create_session(self, target, overrides):
+        pool_size = self._setting("HTTP_POOL_SIZE", target, overrides.get('pool_size', 10))
+        pool_connections = self._setting("HTTP_POOL_CONNECTIONS", target, overrides.get('pool_connections', 10))
+        timeout = self._setting("HTTP_TIMEOUT", target, float(overrides.get('timeout', 30)))
+        retries = self._setting("HTTP_RETRIES", target, overrides.get('retries', 3))
+        backoff = self._setting("HTTP_BACKOFF", target, float(overrides.get('backoff', 0.5)))
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False
+        )
+        query_retry = retry.new(allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"})
+        query_adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_size,
+                                    max_retries=query_retry)
+        adapter = _ReadOnlyPostAdapter(query_adapter, pool_connections=pool_connections, pool_maxsize=pool_size,
+                                       max_retries=retry)
+        session = _PooledSession(timeout)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        """Closes every pooled connection."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+http_client = HttpClient()
+
+
+def get_session(target, **overrides):
+    """
+    Returns the process-wide pooled session for a target host.
+    Args:
+        target (str): Name of the target host, e.g. 'fuseki' or 'wikidata'.
+    Returns:
+        requests.Session: The shared session.
+    """
+    return http_client.session(target, **overrides)
@@ -0,0 +1,60 @@
+import base64
+import binascii
+import json
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    """
+    Parses a page size request parameter.
+    Args:
+        value (str): The raw parameter, None when absent.
+        default (int): Page size used when the parameter is absent.
+        maximum (int): Largest accepted page size.
+    Returns:
+        int: The page size.
+    Raises:
+        ValueError: If the value is not a positive integer.
+    """
+    if value is None or value == "":
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def encode_cursor(position):
+    """
+    Encodes a keyset position into an opaque cursor token.
+    Args:
+        position (dict): The sort key values of the last returned item.
+    Returns:
+        str: The URL-safe cursor token.
+    """
+    payload = json.dumps(position, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decodes a cursor token produced by encode_cursor.
+    Args:
+        token (str): The cursor token, None or empty for the first page.
+    Returns:
+        dict: The keyset position, or None for the first page.
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
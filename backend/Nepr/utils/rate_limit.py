@@ -0,0 +1,181 @@
+import logging
+import math
+import os
+import threading
+import time
+
+import jwt
+
+from utils.gateway import route_of
+
+# Class of each route; every class has its own budget, so abusing one does not drain the others
+ROUTE_CLASSES = {
+    "article/create": "expensive",
+    "article/search": "cheap"
+}
+
+# Algorithm the services sign their tokens with, the flask_jwt_extended default
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+
+# Token bucket of each class: (capacity, tokens refilled per second)
+BUDGETS = {
+    "expensive": (5, 5 / 60),
+    "cheap": (60, 10.0),
+    "default": (120, 20.0)
+}
+
+
+def budget(route_class, budgets):
+    """
+    Returns the bucket of a route class: RATE_LIMIT_<CLASS> as 'capacity,per_second' if set,
+    else its entry in the budgets table, else the default entry.
+    """
+    value = os.getenv(f"RATE_LIMIT_{route_class.upper()}")
+    if value:
+        capacity, rate = value.split(",")
+        return float(capacity), float(rate)
+    capacity, rate = budgets.get(route_class, budgets["default"])
+    return float(capacity), float(rate)
+
+
+def jwt_subject(authorization, secret):
+    """
+    Returns the subject of the bearer token of an Authorization header, None without a valid one.
+    The token is verified with the key the services sign it with, so a forged token cannot be
+    counted against the bucket of another user.
+    Args:
+        authorization: Authorization header of the request.
+        secret: JWT_SECRET_KEY of the services; without it no token is trusted.
+    """
+    if not secret or not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(authorization[7:].strip(), secret, algorithms=[JWT_ALGORITHM]).get("sub")
+    except jwt.PyJWTError:
+        return None
+
+
+class MemoryBucketStore:
+    """
+    Token buckets of one process. Buckets that have refilled completely are dropped
+    periodically, so the store only keeps the recently active clients.
+    """
+    blocking = False
+
+    def __init__(self, sweep_every=10000):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._sweep_every = sweep_every
+        self._calls = 0
+
+    def take(self, key, capacity, rate, now=None):
+        """
+        Takes a token from a bucket.
+        Returns:
+            float: 0 if the token was taken, else the seconds until one is available.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if tokens >= 1:
+                tokens -= 1
+            # Bucket state, with the time it will be full again
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._calls += 1
+            if self._calls % self._sweep_every == 0:
+                self._sweep(now)
+            return wait
+
+    def _sweep(self, now):
+        # A full bucket is indistinguishable from a new one
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """
+    Token buckets shared by every gateway process through Redis, updated atomically by a Lua
+    script. Calls block on the network, see `blocking`; requests pass while Redis is unreachable.
+    """
+    blocking = True
+
+    SCRIPT = """
+    local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens, updated = tonumber(bucket[1]) or capacity, tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self._script = client.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        try:
+            return float(self._script(keys=[self.prefix + key], args=[capacity, rate, now]))
+        except Exception as e:
+            logging.error(f"Rate limit store error: {e}")
+            return 0.0
+
+
+def create_store():
+    """
+    Returns the bucket store: a Redis one when RATE_LIMIT_REDIS_URL is set, else an in-memory one.
+    """
+    url = os.getenv("RATE_LIMIT_REDIS_URL")
+    if not url:
+        return MemoryBucketStore()
+    import redis
+    return RedisBucketStore(redis.Redis.from_url(url))
+
+
+class RateLimiter:
+    """
+    Rate limits the gateway per client and route class with token buckets. Clients are keyed by
+    the subject of their JWT, or by their address for anonymous requests and tokens that fail
+    verification.
+    """
+
+    def __init__(self, store=None, budgets=None, classes=None, secret=None):
+        """
+        Args:
+            store: MemoryBucketStore or RedisBucketStore, see create_store.
+            budgets (dict): Bucket of each route class, see BUDGETS.
+            classes (dict): Class of each route, see ROUTE_CLASSES.
+            secret (str): Key the tokens are verified with, defaults to JWT_SECRET_KEY.
+        """
+        self.store = store or create_store()
+        self.secret = secret or os.getenv("JWT_SECRET_KEY")
+        self.budgets = BUDGETS if budgets is None else budgets
+        self.classes = ROUTE_CLASSES if classes is None else classes
+        self.enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+
+    def check(self, service, path, authorization, address):
+        """
+        Counts a request against the bucket of its client and route class.
+        Args:
+            service: Name of the service.
+            path: Path of the request within the service.
+            authorization: Authorization header of the request.
+            address: Address of the client.
+        Returns:
+            int: 0 if the request may proceed, else the seconds to send in Retry-After.
+        """
+        if not self.enabled:
+            return 0
+        route_class = self.classes.get(route_of(service, path), "default")
+        subject = jwt_subject(authorization, self.secret)
+        client = f"user:{subject}" if subject else f"address:{address}"
+        capacity, rate = budget(route_class, self.budgets)
+        wait = self.store.take(f"{route_class}:{client}", capacity, rate)
+        return math.ceil(wait) if wait > 0 else 0
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from collections import deque
+from itertools import count
+
+import numpy as np
+
+# Methods retried on another replica: replaying them cannot apply a change twice
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Upstream statuses retried on another replica, as the replica did not handle the request
+RETRY_STATUSES = {502, 503, 504}
+
+# Path requested by the active health probes, and seconds between two probes of a replica
+HEALTH_PATH = os.getenv("GATEWAY_HEALTH_PATH", "/")
+HEALTH_INTERVAL = float(os.getenv("GATEWAY_HEALTH_INTERVAL", 10))
+
+
+class Upstream:
+    """A replica of a service, with its in-flight requests, health and latency statistics."""
+
+    def __init__(self, url, latency_window=512):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.healthy = True
+        self.latencies = deque(maxlen=latency_window)
+
+    def available(self, now):
+        return self.healthy and self.ejected_until <= now
+
+    def stats(self, now):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "url": self.url,
+            "available": self.available(now),
+            "healthy": self.healthy,
+            "ejected_for": round(max(self.ejected_until - now, 0.0), 1),
+            "ejections": self.ejections,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)) * 1000, 1),
+                "p95": round(float(np.percentile(latencies, 95)) * 1000, 1),
+                "max": round(float(latencies.max()) * 1000, 1)
+            }
+        }
+
+
+class UpstreamPool:
+    """
+    Balances the requests of a service over its replicas, by least outstanding requests or round
+    robin. A replica is ejected for `ejection_seconds` after `max_failures` consecutive 5xx
+    responses or connection errors, and skipped while its health probe fails. When no replica
+    is available the pool still picks one, since failing every request would not be better.
+    Safe to share between threads.
+    """
+
+    def __init__(self, urls, strategy=None, max_failures=None, ejection_seconds=None):
+        """
+        Args:
+            urls (list): Base URLs of the replicas.
+            strategy (str): 'least_outstanding' or 'round_robin'.
+            max_failures (int): Consecutive failures after which a replica is ejected.
+            ejection_seconds (float): Time an ejected replica receives no request.
+        Raises:
+            ValueError: If there is no replica, as no request could be sent.
+        """
+        if not urls:
+            raise ValueError("An upstream pool needs at least one replica")
+        self.upstreams = [Upstream(url) for url in urls]
+        self.strategy = strategy or os.getenv("GATEWAY_BALANCING", "least_outstanding")
+        self.max_failures = max_failures or int(os.getenv("GATEWAY_MAX_FAILURES", 5))
+        self.ejection_seconds = ejection_seconds if ejection_seconds is not None else \
+            float(os.getenv("GATEWAY_EJECTION_SECONDS", 30))
+        self._turn = count()
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude=()):
+        """
+        Picks the replica of the next request and counts the request as outstanding on it.
+        Args:
+            exclude: Replicas already tried by the request.
+        Returns:
+            Upstream: The replica, None if every replica was tried.
+        """
+        with self._lock:
+            now = time.monotonic()
+            untried = [upstream for upstream in self.upstreams if upstream not in exclude]
+            candidates = [upstream for upstream in untried if upstream.available(now)] or untried
+            if not candidates:
+                return None
+            if self.strategy == "round_robin":
+                upstream = candidates[next(self._turn) % len(candidates)]
+            else:
+                lowest = min(upstream.outstanding for upstream in candidates)
+                tied = [upstream for upstream in candidates if upstream.outstanding == lowest]
+                upstream = tied[next(self._turn) % len(tied)]
+            upstream.outstanding += 1
+            upstream.requests += 1
+            return upstream
+
+    def release(self, upstream, seconds, failed):
+        """
+        Ends a request on a replica.
+        Args:
+            upstream (Upstream): The replica returned by acquire.
+            seconds (float): Time to the upstream response headers, or to the error.
+            failed (bool): True for a 5xx response or a connection error or timeout.
+        """
+        with self._lock:
+            upstream.outstanding -= 1
+            upstream.latencies.append(seconds)
+            if not failed:
+                upstream.consecutive_failures = 0
+                return
+            upstream.errors += 1
+            upstream.consecutive_failures += 1
+            if upstream.consecutive_failures >= self.max_failures:
+                upstream.ejected_until = time.monotonic() + self.ejection_seconds
+                upstream.consecutive_failures = 0
+                upstream.ejections += 1
+
+    def record_probe(self, upstream, healthy):
+        """Records the result of an active health probe of a replica."""
+        with self._lock:
+            upstream.healthy = healthy
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return [upstream.stats(now) for upstream in self.upstreams]
+
+
+def upstream_urls(service, address):
+    """
+    Returns the replica URLs of a service: GATEWAY_UPSTREAMS_<SERVICE> (comma-separated) if it
+    lists any URL, else its SERVICES entry, a URL or a list of URLs.
+    """
+    value = os.getenv(f"GATEWAY_UPSTREAMS_{service.upper()}", "")
+    urls = [url.strip() for url in value.split(",") if url.strip()]
+    if urls:
+        return urls
+    return [address] if isinstance(address, str) else list(address)
+
+
+def create_pools(services):
+    """
+    Creates the upstream pool of every service.
+    Args:
+        services (dict): The SERVICES routing table.
+    Returns:
+        dict: Service name -> UpstreamPool.
+    Raises:
+        ValueError: If a service has no replica.
+    """
+    return {service: UpstreamPool(upstream_urls(service, address)) for service, address in services.items()}
+
+
+def max_attempts(method, pool):
+    """
+    Returns how many replicas a request may be sent to: GATEWAY_RETRIES + 1 for idempotent
+    methods, bounded by the number of replicas, and 1 for the others.
+    """
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return 1
+    return max(1, min(int(os.getenv("GATEWAY_RETRIES", 2)) + 1, len(pool.upstreams)))
+
+
+def probe_healthy(status):
+    """A replica answering its probe below 500, even 404, is up."""
+    return status is not None and status < 500
+
+
+def replica_urls(pools):
+    """Returns the distinct replica URLs of the pools, probed once even when shared by several services."""
+    return sorted({upstream.url for pool in pools.values() for upstream in pool.upstreams})
+
+
+def record_probes(pools, statuses):
+    """
+    Records the results of a round of health probes.
+    Args:
+        pools (dict): Service name -> UpstreamPool.
+        statuses (dict): Replica URL -> status of its probe, None on error.
+    """
+    for pool in pools.values():
+        for upstream in pool.upstreams:
+            pool.record_probe(upstream, probe_healthy(statuses.get(upstream.url)))
+
+
+class HealthChecker:
+    """Probes the replicas of every pool from a background thread, every HEALTH_INTERVAL seconds."""
+
+    def __init__(self, pools, probe, interval=None):
+        self.pools = pools
+        self.probe = probe
+        self.interval = interval or HEALTH_INTERVAL
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the probes, if they are not running yet."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="gateway-health", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            record_probes(self.pools, {url: self.probe(url) for url in replica_urls(self.pools)})
+            time.sleep(self.interval)